@@ -0,0 +1,326 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from track_io import read_track, write_track, utm_to_latlon, valid_mask, list_csv_files
+from track_geometry import distinct_mask
+from spatial_index import SegmentIndex
+
+# 포함 검사에서 한 번에 처리하는 점 개수 (점 x 칸 안 변 쌍 배열의 메모리 제한)
+CHUNK = 100000
+
+
+class PolygonIndex:
+    """
+    다각형 (여러 고리) 안에 점이 있는지 빠르게 검사하는 격자 인덱스입니다.
+
+    다각형을 덮는 격자의 각 칸에 그 칸을 지나는 변 목록과 칸 중심의 감김수(winding number)를 미리 계산해 둡니다.
+    - 변이 지나지 않는 칸: 칸 전체가 중심과 같은 안/밖이므로 배열 조회 한 번으로 결정
+    - 변이 지나는 칸: 칸 중심에서 점까지의 선분이 그 칸의 변들을 가로지르는 횟수 (방향 포함)로 감김수를 보정
+    감김수가 0 이 아니면 안쪽입니다 (nonzero 규칙). 경로가 스스로 겹치거나 교차해서 통로 외곽선이 겹쳐도
+    겹친 부분은 감김수가 2 가 될 뿐 안쪽으로 판정됩니다.
+    """
+
+    def __init__(self, rings, cell_size=1.0):
+        starts, ends = [], []
+        for ring in rings:
+            ring = np.asarray(ring, dtype=np.float64)
+            if len(ring) >= 3:
+                starts.append(ring)
+                ends.append(np.roll(ring, -1, axis=0))
+        if not starts:
+            raise ValueError("다각형에는 최소 세 개 이상의 꼭짓점이 있어야 합니다.")
+        self.a = np.vstack(starts)
+        self.b = np.vstack(ends)
+        self.rings = [np.asarray(ring, dtype=np.float64) for ring in rings]
+        self.cell_size = cell_size
+
+        low = np.minimum(self.a, self.b).min(axis=0)
+        high = np.maximum(self.a, self.b).max(axis=0)
+        self.origin = low - cell_size
+        self.shape = tuple((np.floor((high - self.origin) / cell_size).astype(np.int64) + 2)[::-1])  # (ny, nx)
+        self._build_winding()
+        self._build_edges()
+
+    def _build_winding(self):
+        # 행마다 칸 중심 높이의 수평선과 변의 교점을 구해 칸 중심의 감김수를 계산
+        # (점에서 +x 방향 반직선을 위로 지나는 변 +1, 아래로 지나는 변 -1)
+        ny, nx = self.shape
+        size = self.cell_size
+        a, b = self.a, self.b
+        y_low = np.minimum(a[:, 1], b[:, 1])
+        y_high = np.maximum(a[:, 1], b[:, 1])
+        first = np.ceil((y_low - self.origin[1]) / size - 0.5).astype(np.int64)
+        last = np.ceil((y_high - self.origin[1]) / size - 0.5).astype(np.int64)  # 반열림 [y_low, y_high)
+        count = np.maximum(last - first, 0)
+        edge = np.repeat(np.arange(len(a)), count)
+        row = np.repeat(first, count) + np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+
+        y = self.origin[1] + (row + 0.5) * size
+        ratio = (y - a[edge, 1]) / (b[edge, 1] - a[edge, 1])
+        x = a[edge, 0] + ratio * (b[edge, 0] - a[edge, 0])
+        sign = np.where(b[edge, 1] > a[edge, 1], 1, -1)
+        # 교점보다 왼쪽에 있는 칸 중심 개수 = 이 교점이 감김수에 더해지는 칸 수
+        column = np.clip(np.ceil((x - self.origin[0]) / size - 0.5).astype(np.int64), 0, nx)
+        steps = np.zeros((ny, nx + 1), dtype=np.int32)
+        np.add.at(steps, (row, column), sign)
+        # 칸 j 의 감김수 = 교점 칸 번호가 j 보다 큰 교점들의 부호 합
+        self.winding = (steps[:, ::-1].cumsum(axis=1)[:, ::-1][:, 1:]).reshape(-1)
+
+    def _build_edges(self):
+        # 변의 경계 상자가 걸치는 칸마다 변 번호를 등록 (칸 번호 순 CSR 배열)
+        ny, nx = self.shape
+        size = self.cell_size
+        low = np.floor((np.minimum(self.a, self.b) - self.origin) / size).astype(np.int64)
+        high = np.floor((np.maximum(self.a, self.b) - self.origin) / size).astype(np.int64)
+        span = high - low + 1
+        count = span[:, 0] * span[:, 1]
+        edge = np.repeat(np.arange(len(self.a)), count)
+        local = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        cx = low[edge, 0] + local % span[edge, 0]
+        cy = low[edge, 1] + local // span[edge, 0]
+        cell = cy * nx + cx
+        order = np.argsort(cell, kind='stable')
+        cell, edge = cell[order], edge[order]
+
+        self.slot = np.full(ny * nx, -1, dtype=np.int64)  # 칸 -> 변 목록 번호 (-1: 변이 지나지 않는 칸)
+        cells, first = np.unique(cell, return_index=True)
+        self.slot[cells] = np.arange(len(cells))
+        self.edge_offsets = np.append(first, len(cell))
+        self.edge_ids = edge
+        self.boundary_cells = len(cells)
+
+    def settle(self, inside, outside):
+        """
+        칸 전체가 안쪽 (inside) 또는 바깥쪽 (outside) 으로 알려진 칸 번호들을 표시해, 그 칸의 점은 변을 지나더라도
+        변 검사 없이 배열 조회로 결정합니다.
+        """
+        self.winding[inside] = 1
+        self.winding[outside] = 0
+        self.slot[inside] = -1
+        self.slot[outside] = -1
+        self.boundary_cells = int(np.count_nonzero(self.slot >= 0))
+
+    def contains(self, points):
+        """
+        점 배열 (N x 2, UTM) 이 다각형 안에 있는지 bool 배열로 반환합니다.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        inside = np.zeros(len(points), dtype=bool)
+        for first in range(0, len(points), CHUNK):
+            part = slice(first, first + CHUNK)
+            inside[part] = self._contains(points[part])
+        return inside
+
+    def _contains(self, points):
+        ny, nx = self.shape
+        size = self.cell_size
+        grid = np.floor((points - self.origin) / size).astype(np.int64)
+        in_grid = (grid[:, 0] >= 0) & (grid[:, 0] < nx) & (grid[:, 1] >= 0) & (grid[:, 1] < ny)
+        cell = np.where(in_grid, grid[:, 1] * nx + grid[:, 0], 0)
+        winding = np.where(in_grid, self.winding[cell], 0)
+
+        # 변이 지나는 칸의 점: 칸 중심 -> 점 선분과 교차하는 변의 방향으로 감김수 보정
+        todo = np.flatnonzero(in_grid & (self.slot[cell] >= 0))
+        if len(todo):
+            slot = self.slot[cell[todo]]
+            start = self.edge_offsets[slot]
+            count = self.edge_offsets[slot + 1] - start
+            owner = np.repeat(np.arange(len(todo)), count)
+            edge = self.edge_ids[np.repeat(start, count) + np.arange(count.sum())
+                                 - np.repeat(np.cumsum(count) - count, count)]
+
+            center = self.origin + (grid[todo] + 0.5) * size
+            p = center[owner]
+            r = points[todo][owner] - p  # 중심 -> 점
+            e = self.b[edge] - self.a[edge]
+            q = self.a[edge] - p
+            denominator = r[:, 0] * e[:, 1] - r[:, 1] * e[:, 0]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = (q[:, 0] * e[:, 1] - q[:, 1] * e[:, 0]) / denominator  # 선분 위치 (0~1)
+                u = (q[:, 0] * r[:, 1] - q[:, 1] * r[:, 0]) / denominator  # 변 위치 (0~1, 끝점은 다음 변이 셈)
+            cross = (denominator != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u < 1)
+            # 변을 오른쪽 -> 왼쪽 (변 기준)으로 넘어가면 +1
+            sign = np.where(denominator < 0, 1, -1) * cross
+            winding[todo] += np.bincount(owner, weights=sign, minlength=len(todo)).astype(winding.dtype)
+        return in_grid & (winding != 0)
+
+
+def corridor_rings(xy, width, closed=False, cap_points=8):
+    """
+    경로 (N x 2, UTM) 에서 width / 2 (m) 이내인 통로를 반시계 방향 고리 목록으로 만듭니다.
+
+    통로는 구간 캡슐의 합집합으로, 구간마다의 직사각형, 꺾이는 꼭짓점 바깥쪽의 부채꼴 (직사각형 사이의 틈),
+    양 끝점의 원으로 이루어집니다. 원과 부채꼴의 호는 반원을 cap_points 개로 나눈 간격 이하로 근사합니다.
+    평행선을 잇지 않으므로 주차 경로의 전/후진 전환점처럼 경로가 되돌아가는 곳에서도 외곽선이 꼬이지 않고,
+    모든 고리가 같은 방향이라 PolygonIndex 의 nonzero 규칙으로 겹친 부분도 안쪽이 됩니다.
+    순환 경로는 끝점과 시작점을 잇는 구간을 더하고 끝점 원 대신 시작점에도 부채꼴을 둡니다.
+    """
+    xy = route_points(xy, closed)
+    if len(xy) < 2:
+        raise ValueError("경로에는 서로 다른 점이 두 개 이상 있어야 합니다.")
+    half = width / 2.0
+    step = np.pi / cap_points
+
+    seg = np.diff(xy, axis=0)
+    length = np.hypot(seg[:, 0], seg[:, 1])
+    normal = np.column_stack([-seg[:, 1], seg[:, 0]]) * (half / length)[:, None]
+    a, b = xy[:-1], xy[1:]
+    rings = list(np.stack([a - normal, b - normal, b + normal, a + normal], axis=1))
+
+    def arc(center, first, sweep):
+        # first 각도에서 반시계 방향으로 sweep 만큼 돈 호 위의 점들
+        angle = first + np.linspace(0.0, sweep, max(int(np.ceil(sweep / step)), 1) + 1)
+        return center + half * np.column_stack([np.cos(angle), np.sin(angle)])
+
+    # 꼭짓점마다 꺾인 각 (왼쪽 양수). 왼쪽으로 꺾으면 오른쪽, 오른쪽으로 꺾으면 왼쪽에 틈이 생김
+    heading = np.arctan2(seg[:, 1], seg[:, 0])
+    incoming, outgoing, vertices = heading[:-1], heading[1:], xy[1:-1]
+    if closed:
+        incoming = np.append(incoming, heading[-1])
+        outgoing = np.append(outgoing, heading[0])
+        vertices = np.vstack([vertices, xy[:1]])
+    turn = (outgoing - incoming + np.pi) % (2 * np.pi) - np.pi
+    for center, before, after, delta in zip(vertices, incoming, outgoing, turn):
+        if delta > 0:
+            rings.append(np.vstack([center, arc(center, before - np.pi / 2, delta)]))
+        elif delta < 0:
+            rings.append(np.vstack([center, arc(center, after + np.pi / 2, -delta)]))
+    if not closed:
+        for center in (xy[0], xy[-1]):
+            rings.append(arc(center, 0.0, 2 * np.pi)[:-1])
+    return rings
+
+
+def route_points(xy, closed=False):
+    # 통로를 만든 기준 경로 (연속 중복점 제외, 순환 경로는 시작점으로 닫음)
+    xy = np.asarray(xy, dtype=np.float64)
+    xy = xy[distinct_mask(xy)]
+    if closed and len(xy) > 2 and np.hypot(*(xy[-1] - xy[0])) > 1e-3:
+        xy = np.vstack([xy, xy[:1]])
+    return xy
+
+
+def corridor_index(xy, width, closed=False, cell_size=None):
+    """
+    경로 통로의 PolygonIndex 를 만듭니다. cell_size 기본값은 통로 폭의 1/4 입니다.
+    캡슐이 겹치는 통로 안쪽 칸은 변이 많으므로, 변이 지나는 칸 중 칸 중심에서 경로까지 거리로
+    칸 전체가 통로 안 또는 밖인 칸은 PolygonIndex.settle 로 변 검사 없이 결정되게 합니다.
+    """
+    index = PolygonIndex(corridor_rings(xy, width, closed), cell_size or width / 4.0)
+    ny, nx = index.shape
+    cells = np.flatnonzero(index.slot >= 0)
+    centers = index.origin + (np.column_stack([cells % nx, cells // nx]) + 0.5) * index.cell_size
+    distance = SegmentIndex(route_points(xy, closed)).nearest(centers)['distance']
+    reach = index.cell_size * np.sqrt(0.5)  # 칸 중심에서 모서리까지
+    half = width / 2.0
+    index.settle(cells[distance + reach <= half], cells[distance - reach > half])
+    return index
+
+
+def ring_frame(rings, zone):
+    """
+    고리 목록을 lane map 형식 DataFrame 으로 만듭니다 (ring 컬럼: 고리 번호, 각 고리는 첫 점으로 닫음).
+    """
+    frames = []
+    for number, ring in enumerate(rings):
+        ring = np.vstack([ring, ring[:1]])
+        latitude, longitude = utm_to_latlon(ring[:, 0], ring[:, 1], zone)
+        frames.append(pd.DataFrame({
+            'latitude': latitude,
+            'longitude': longitude,
+            'utm_easting': ring[:, 0],
+            'utm_northing': ring[:, 1],
+            'utm_zone_number': zone,
+            'ring': number,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def benchmark(route_xy, width, index, count=1000000, seed=0, closed=False):
+    """
+    통로 주변의 임의의 점 count 개로 포함 검사 처리량을 재고, 경로까지의 거리로 구한 결과와 비교합니다.
+
+    Returns:
+    - 경로까지 거리로 구한 결과와 다른 점 개수 (원을 다각형으로 근사한 오차 범위의 점은 제외)
+    """
+    rng = np.random.default_rng(seed)
+    low = index.origin
+    high = index.origin + np.array(index.shape[::-1]) * index.cell_size
+    points = rng.uniform(low, high, size=(count, 2))
+
+    start = time.perf_counter()
+    inside = index.contains(points)
+    elapsed = time.perf_counter() - start
+
+    segments = SegmentIndex(route_points(route_xy, closed))
+    distance = np.concatenate([
+        segments.nearest(points[first:first + CHUNK])['distance'] for first in range(0, count, CHUNK)
+    ])
+    half = width / 2.0
+    # 원을 다각형으로 근사한 경계 근처 (폭의 2 %) 는 비교에서 제외
+    clear = np.abs(distance - half) > 0.02 * width
+    mismatch = int((inside[clear] != (distance[clear] <= half)).sum())
+
+    print(f"{index.shape[0] * index.shape[1]} cells ({index.boundary_cells} with edges), {len(index.a)} edges")
+    print(f"{count} points in {elapsed * 1000:.0f} ms ({count / elapsed:,.0f} points/s), "
+          f"{inside.mean() * 100:.1f}% inside, {mismatch} mismatches against route distance")
+    return mismatch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="경로 주변 통로 다각형 생성과 빠른 포함 검사")
+    parser.add_argument('route', help="기준 웨이포인트/차선 CSV 파일")
+    parser.add_argument('-w', '--width', type=float, default=3.5, help="통로 폭 (m)")
+    parser.add_argument('--closed', action='store_true', help="끝점과 시작점이 이어진 순환 경로")
+    parser.add_argument('-o', '--output', default=None, help="통로 다각형을 저장할 CSV 파일 (lane map 형식, ring 컬럼: 고리 번호)")
+    parser.add_argument('--cell-size', type=float, default=None, help="격자 칸 크기 (m, 기본: 폭의 1/4)")
+    parser.add_argument('--check', nargs='+', default=[], help="통로 이탈을 검사할 주행 기록 CSV 파일 또는 디렉토리")
+    parser.add_argument('--crop', nargs='+', default=[], help="통로 안의 점만 남길 lane map CSV 파일")
+    parser.add_argument('--benchmark', type=int, default=None, metavar='N', help="임의의 점 N 개로 처리량 측정")
+    args = parser.parse_args()
+
+    route = read_track(args.route)
+    xy = route.loc[valid_mask(route), ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+    start = time.perf_counter()
+    index = corridor_index(xy, args.width, args.closed, args.cell_size)
+    rings = index.rings
+    print(f"Corridor of {args.width} m around {args.route}: {len(rings)} rings, {sum(len(r) for r in rings)} vertices, "
+          f"built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if args.output:
+        write_track(ring_frame(rings, route['utm_zone_number'].iloc[0]), args.output, 'lane')
+        print(f"Polygon saved as {args.output}")
+
+    if args.benchmark and benchmark(xy, args.width, index, args.benchmark, closed=args.closed):
+        raise SystemExit("Corridor polygon disagrees with the route distance check")
+
+    paths = []
+    for path in args.check:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+    for path in paths:
+        df = read_track(path)
+        rows = np.flatnonzero(valid_mask(df))
+        inside = index.contains(df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows])
+        outside = rows[~inside]
+        # 통로 밖으로 나간 연속 구간 수
+        exits = int(np.count_nonzero(np.diff(np.concatenate([[1], inside.astype(np.int8)])) == -1))
+        print(f"{path}: {inside.sum()} / {len(rows)} points inside, {exits} exits"
+              + (f", first outside row {outside[0]}" if len(outside) else ""))
+
+    for path in args.crop:
+        df = read_track(path)
+        keep = np.zeros(len(df), dtype=bool)
+        rows = np.flatnonzero(valid_mask(df))
+        keep[rows] = index.contains(df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows])
+        cropped = df[keep].reset_index(drop=True)
+        cropped.attrs = df.attrs
+        output_path = os.path.join(os.path.dirname(path), f"cropped_{os.path.basename(path)}")
+        write_track(cropped, output_path)
+        print(f"{path}: kept {keep.sum()} of {len(df)} points, saved as {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import os
+import argparse
+import numpy as np
+
+from track_io import read_track, write_track, valid_mask, list_csv_files
+from route_query import RouteQuery
+from route_tracker import RouteTracker
+
+# 창 검색에서 한 번에 처리하는 점 개수 (점 x 후보 구간 배열의 메모리 제한)
+CHUNK = 50000
+
+
+class FrenetFrame:
+    """
+    기준 경로에 대한 Frenet 좌표 (s: 누적 거리, d: 왼쪽 양수 횡방향 거리) 변환기입니다.
+
+    - to_frenet(xy): XY -> (s, d). 기본은 전역 최근접 구간 (SegmentIndex).
+      s_hint 를 주면 그 근처 window(m) 안의 구간만 후보로 보는 창 검색을 배열 단위로 수행하고,
+      ordered=True 이면 시간 순서의 주행 기록으로 보고 RouteTracker 로 이어서 매칭합니다
+      (경로가 겹치거나 교차하는 곳에서 다른 쪽 경로로 튀지 않음).
+    - from_frenet(s, d): (s, d) -> XY. s 위치의 경로 점에서 그 구간의 왼쪽 법선 방향으로 d 만큼 이동
+    """
+
+    def __init__(self, route):
+        self.route = route
+        index = route.index
+        self.normal = np.column_stack([-index.d[:, 1], index.d[:, 0]]) / index.length[:, None]
+
+    @classmethod
+    def from_track(cls, df, closed=False):
+        return cls(RouteQuery.from_track(df, closed=closed))
+
+    def _window_span(self, window):
+        # 길이 window 안에 들어갈 수 있는 최대 구간 개수
+        arc = self.route.arc
+        return int((np.searchsorted(arc, arc + window, side='right') - np.arange(len(arc))).max()) + 1
+
+    def _windowed(self, xy, s_hint, window):
+        route = self.route
+        index = route.index
+        count = len(index)
+        span = self._window_span(window)
+        offsets = np.arange(-span, span + 1)
+        hint_segment = np.clip(np.searchsorted(route.arc, s_hint, side='right') - 1, 0, count - 1)
+        candidates = hint_segment[:, None] + offsets[None, :]
+        if route.closed:
+            # 펼친 구간 번호의 시작 누적 거리 (한 바퀴 넘어가면 전체 길이를 더함)
+            start = route.arc[candidates % count] + np.floor_divide(candidates, count) * route.total_length
+            candidates = candidates % count
+        else:
+            inside = (candidates >= 0) & (candidates < count)
+            candidates = np.clip(candidates, 0, count - 1)
+            start = route.arc[candidates]
+        end = start + index.length[candidates]
+        near = (end >= s_hint[:, None] - window) & (start <= s_hint[:, None] + window)
+        if not route.closed:
+            near &= inside
+
+        _, _, distance = index.project(xy[:, None, :].repeat(candidates.shape[1], axis=1), candidates)
+        distance = np.where(near, distance, np.inf)
+        best = candidates[np.arange(len(xy)), np.argmin(distance, axis=1)]
+        t, _, distance = index.project(xy, best)
+        rel = xy - index.a[best]
+        cross = index.d[best, 0] * rel[:, 1] - index.d[best, 1] * rel[:, 0]
+        s = route.arc[index.segment_start[best]] + t * index.length[best]
+        return s, np.where(cross >= 0, distance, -distance)
+
+    def to_frenet(self, xy, s_hint=None, window=5.0, ordered=False):
+        """
+        XY (N x 2, UTM) 를 Frenet 좌표로 변환합니다.
+
+        Parameters:
+        - s_hint: 점별 예상 누적 거리. 주면 s_hint ± window(m) 안의 구간에서만 찾음
+        - ordered: True 이면 시간 순서의 주행 기록으로 보고 RouteTracker 로 매칭 (s_hint 무시)
+
+        Returns:
+        - (s, d) 배열
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        if len(xy) == 0:
+            return np.empty(0), np.empty(0)
+        if ordered:
+            tracked = RouteTracker(self.route, ahead=window).track(xy[:, 0], xy[:, 1])
+            return tracked['s'], tracked['cross_track']
+        if s_hint is None:
+            match = self.route.index.nearest(xy)
+            return match['s'], match['side'] * match['distance']
+
+        s_hint = np.broadcast_to(np.asarray(s_hint, dtype=np.float64), (len(xy),))
+        s = np.empty(len(xy))
+        d = np.empty(len(xy))
+        for first in range(0, len(xy), CHUNK):
+            part = slice(first, first + CHUNK)
+            s[part], d[part] = self._windowed(xy[part], s_hint[part], window)
+        return s, d
+
+    def from_frenet(self, s, d):
+        """
+        Frenet 좌표 (s, d) 배열을 XY (N x 2, UTM) 로 변환합니다.
+        """
+        route = self.route
+        point, s = route.points_at(s)
+        segment = np.clip(np.searchsorted(route.arc, s, side='right') - 1, 0, len(route.index) - 1)
+        return point + self.normal[segment] * np.asarray(d, dtype=np.float64)[..., None]
+
+
+def tracking_summary(s, d):
+    """
+    횡방향 오차 d 의 요약 통계 (m) 를 dict 로 반환합니다.
+    """
+    error = np.abs(d)
+    return {
+        'points': len(d),
+        's_start': float(s[0]) if len(s) else 0.0,
+        's_end': float(s[-1]) if len(s) else 0.0,
+        'mean_d': float(np.mean(d)) if len(d) else 0.0,
+        'rms_d': float(np.sqrt(np.mean(d ** 2))) if len(d) else 0.0,
+        'p95_abs_d': float(np.percentile(error, 95)) if len(d) else 0.0,
+        'max_abs_d': float(error.max()) if len(d) else 0.0,
+    }
+
+
+def annotate_log(df, frame, window=5.0, ordered=True):
+    """
+    주행 기록 DataFrame 에 s, d 컬럼을 추가한 새 DataFrame 과 요약 통계를 반환합니다.
+    좌표가 없는 라벨 행은 NaN 입니다.
+    """
+    rows = np.flatnonzero(valid_mask(df))
+    s, d = frame.to_frenet(
+        df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows], window=window, ordered=ordered
+    )
+    df = df.copy()
+    df['s'] = np.nan
+    df['d'] = np.nan
+    df.iloc[rows, df.columns.get_loc('s')] = s
+    df.iloc[rows, df.columns.get_loc('d')] = d
+    return df, tracking_summary(s, d)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주행 기록을 기준 경로의 Frenet 좌표 (s, d) 로 변환")
+    parser.add_argument('inputs', nargs='+', help="주행 기록 CSV 파일 또는 디렉토리")
+    parser.add_argument('-r', '--route', required=True, help="기준 웨이포인트/차선 CSV 파일")
+    parser.add_argument('--closed', action='store_true', help="기준 경로가 끝점과 시작점이 이어진 순환 경로")
+    parser.add_argument('--window', type=float, default=5.0, help="창 검색 범위 (m)")
+    parser.add_argument('--unordered', action='store_true', help="시간 순서가 아닌 점 모음 (전역 최근접으로 변환)")
+    parser.add_argument('--output-dir', default=None, help="출력 디렉토리 (기본: 입력 파일 위치에 frenet_ 접두사)")
+    args = parser.parse_args()
+
+    frame = FrenetFrame.from_track(read_track(args.route), closed=args.closed)
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    if args.output_dir and not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    for path in paths:
+        df, summary = annotate_log(read_track(path), frame, args.window, not args.unordered)
+        if args.output_dir:
+            output_path = os.path.join(args.output_dir, os.path.basename(path))
+        else:
+            output_path = os.path.join(os.path.dirname(path), f"frenet_{os.path.basename(path)}")
+        write_track(df, output_path)
+        print(
+            f"{path}: {summary['points']} points, s {summary['s_start']:.1f} -> {summary['s_end']:.1f} m, "
+            f"d mean {summary['mean_d']:.3f} / rms {summary['rms_d']:.3f} / p95 {summary['p95_abs_d']:.3f} / "
+            f"max {summary['max_abs_d']:.3f} m, saved as {output_path}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from track_io import read_track, write_track, valid_mask, latlon_to_utm, list_csv_files
+
+# WGS84 타원체
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+# Vincenty 반복 계산의 수렴 기준 (rad, 약 0.06 mm)과 최대 반복 횟수
+TOLERANCE = 1e-12
+MAX_ITERATIONS = 200
+
+
+def _reduced_latitude(latitude):
+    # 보조 위도 U 의 (sin, cos)
+    phi = np.radians(latitude)
+    u = np.arctan2((1 - WGS84_F) * np.sin(phi), np.cos(phi))
+    return np.sin(u), np.cos(u)
+
+
+def _series(cos_sq_alpha):
+    # 타원체 보정 급수 계수 A, B
+    u_sq = cos_sq_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    return a, b
+
+
+def _delta_sigma(b, sin_sigma, cos_sigma, cos_2sigma_m):
+    return b * sin_sigma * (cos_2sigma_m + b / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+        - b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+    ))
+
+
+def inverse(lat1, lon1, lat2, lon2):
+    """
+    두 점 사이의 측지선 거리와 방위각을 Vincenty 역문제 공식으로 계산합니다.
+    입력은 스칼라 또는 같은 모양으로 브로드캐스트되는 NumPy 배열이며, 반복 계산은
+    아직 수렴하지 않은 원소에만 배열 단위로 적용합니다.
+
+    거의 정반대편 (antipodal) 에 있는 두 점은 수렴하지 않으므로 NaN 을 반환합니다.
+    (이 프로젝트에서 다루는 수 km 이내의 경로에는 해당하지 않음)
+
+    Returns:
+    - (거리 m, 시작점 방위각 도, 끝점 방위각 도). 방위각은 북쪽 0 / 시계 방향 양수
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (lat1, lon1, lat2, lon2)))
+    shape = lat1.shape
+    lat1, lon1, lat2, lon2 = (v.ravel() for v in (lat1, lon1, lat2, lon2))
+    sin_u1, cos_u1 = _reduced_latitude(lat1)
+    sin_u2, cos_u2 = _reduced_latitude(lat2)
+    big_l = np.radians(lon2 - lon1)
+    big_l = (big_l + np.pi) % (2 * np.pi) - np.pi
+
+    lam = big_l.copy()
+    sin_sigma = np.zeros_like(lam)
+    cos_sigma = np.ones_like(lam)
+    sigma = np.zeros_like(lam)
+    cos_sq_alpha = np.ones_like(lam)
+    cos_2sigma_m = np.zeros_like(lam)
+    active = np.ones(lam.shape, dtype=bool)
+
+    for _ in range(MAX_ITERATIONS):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        lam_i = lam[idx]
+        su1, cu1, su2, cu2 = sin_u1[idx], cos_u1[idx], sin_u2[idx], cos_u2[idx]
+        sin_lam, cos_lam = np.sin(lam_i), np.cos(lam_i)
+        s_sigma = np.hypot(cu2 * sin_lam, cu1 * su2 - su1 * cu2 * cos_lam)
+        c_sigma = su1 * su2 + cu1 * cu2 * cos_lam
+        sig = np.arctan2(s_sigma, c_sigma)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sin_alpha = np.where(s_sigma > 0, cu1 * cu2 * sin_lam / s_sigma, 0.0)
+            c_sq_alpha = 1 - sin_alpha ** 2
+            # 적도 위의 측지선 (cos^2 alpha = 0) 은 cos 2sigma_m = 0
+            c_2sigma_m = np.where(c_sq_alpha > 0, c_sigma - 2 * su1 * su2 / c_sq_alpha, 0.0)
+        c = WGS84_F / 16 * c_sq_alpha * (4 + WGS84_F * (4 - 3 * c_sq_alpha))
+        lam_next = big_l[idx] + (1 - c) * WGS84_F * sin_alpha * (
+            sig + c * s_sigma * (c_2sigma_m + c * c_sigma * (-1 + 2 * c_2sigma_m ** 2))
+        )
+
+        lam[idx] = lam_next
+        sin_sigma[idx], cos_sigma[idx], sigma[idx] = s_sigma, c_sigma, sig
+        cos_sq_alpha[idx], cos_2sigma_m[idx] = c_sq_alpha, c_2sigma_m
+        converged = np.abs(lam_next - lam_i) <= TOLERANCE
+        active[idx[converged]] = False
+
+    a, b = _series(cos_sq_alpha)
+    distance = WGS84_B * a * (sigma - _delta_sigma(b, sin_sigma, cos_sigma, cos_2sigma_m))
+    sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+    azimuth1 = np.degrees(np.arctan2(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam))
+    azimuth2 = np.degrees(np.arctan2(cos_u1 * sin_lam, -sin_u1 * cos_u2 + cos_u1 * sin_u2 * cos_lam))
+
+    distance = np.where(active, np.nan, distance).reshape(shape)
+    azimuth1 = np.where(active, np.nan, azimuth1).reshape(shape)
+    azimuth2 = np.where(active, np.nan, azimuth2).reshape(shape)
+    if distance.ndim == 0:
+        return float(distance), float(azimuth1), float(azimuth2)
+    return distance, azimuth1, azimuth2
+
+
+def direct(lat1, lon1, azimuth1, distance):
+    """
+    시작점, 방위각(도), 거리(m)로 도착점을 Vincenty 순문제 공식으로 계산합니다.
+    입력은 스칼라 또는 브로드캐스트되는 NumPy 배열입니다.
+
+    Returns:
+    - (위도, 경도, 도착점 방위각 도)
+    """
+    lat1, lon1, azimuth1, distance = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (lat1, lon1, azimuth1, distance))
+    )
+    sin_u1, cos_u1 = _reduced_latitude(lat1)
+    alpha1 = np.radians(azimuth1)
+    sin_alpha1, cos_alpha1 = np.sin(alpha1), np.cos(alpha1)
+
+    sigma1 = np.arctan2(sin_u1, cos_u1 * cos_alpha1)
+    sin_alpha = cos_u1 * sin_alpha1
+    cos_sq_alpha = 1 - sin_alpha ** 2
+    a, b = _series(cos_sq_alpha)
+
+    # sigma 의 고정점 반복. 순문제는 항상 수렴하며 mm 이하 정밀도까지 몇 번이면 충분
+    base = distance / (WGS84_B * a)
+    sigma = base.copy()
+    for _ in range(MAX_ITERATIONS):
+        cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+        sin_sigma, cos_sigma = np.sin(sigma), np.cos(sigma)
+        sigma_next = base + _delta_sigma(b, sin_sigma, cos_sigma, cos_2sigma_m)
+        done = np.all(np.abs(sigma_next - sigma) <= TOLERANCE)
+        sigma = sigma_next
+        if done:
+            break
+    cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+    sin_sigma, cos_sigma = np.sin(sigma), np.cos(sigma)
+
+    tmp = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_alpha1
+    latitude = np.degrees(np.arctan2(
+        sin_u1 * cos_sigma + cos_u1 * sin_sigma * cos_alpha1,
+        (1 - WGS84_F) * np.hypot(sin_alpha, tmp)
+    ))
+    lam = np.arctan2(sin_sigma * sin_alpha1, cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_alpha1)
+    c = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+    big_l = lam - (1 - c) * WGS84_F * sin_alpha * (
+        sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+    )
+    longitude = (lon1 + np.degrees(big_l) + 180.0) % 360.0 - 180.0
+    azimuth2 = np.degrees(np.arctan2(sin_alpha, -tmp))
+    if latitude.ndim == 0:
+        return float(latitude), float(longitude), float(azimuth2)
+    return latitude, longitude, azimuth2
+
+
+def intermediate(lat1, lon1, lat2, lon2, fractions):
+    """
+    두 점을 잇는 측지선 위에서 fractions (0 ~ 1, 배열) 비율 위치의 점들을 반환합니다.
+
+    Returns:
+    - (위도 배열, 경도 배열)
+    """
+    distance, azimuth1, _ = inverse(lat1, lon1, lat2, lon2)
+    fractions = np.asarray(fractions, dtype=np.float64)
+    latitude, longitude, _ = direct(lat1, lon1, azimuth1, distance * fractions)
+    return np.atleast_1d(latitude), np.atleast_1d(longitude)
+
+
+def path_length(latitude, longitude):
+    """
+    위도/경도 경로의 측지선 구간 길이 (N-1 개)와 누적 거리 (N 개, m)를 반환합니다.
+    """
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    if len(latitude) < 2:
+        return np.empty(0), np.zeros(len(latitude))
+    step, _, _ = inverse(latitude[:-1], longitude[:-1], latitude[1:], longitude[1:])
+    return step, np.concatenate([[0.0], np.cumsum(step)])
+
+
+def resample_latlon(latitude, longitude, spacing, return_source=False):
+    """
+    위도/경도 경로를 측지선 거리 기준 spacing(m) 간격으로 다시 나눕니다.
+    새 점은 속한 구간의 시작점에서 그 구간의 측지선을 따라 순문제로 계산합니다.
+    첫 점과 마지막 점은 항상 포함됩니다.
+
+    Returns:
+    - (위도 배열, 경도 배열), return_source 이면 새 점마다 속한 구간 시작점 (마지막 점은 끝점) 의
+      원래 점 번호 배열을 세 번째 값으로 함께 반환
+    """
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    step, s = path_length(latitude, longitude)
+    if len(latitude) < 2 or s[-1] == 0:
+        if return_source:
+            return latitude.copy(), longitude.copy(), np.arange(len(latitude))
+        return latitude.copy(), longitude.copy()
+    # 길이 0 인 구간 (중복점) 제거
+    keep = np.concatenate([[True], step > 0])
+    kept = np.flatnonzero(keep)
+    latitude, longitude, s = latitude[keep], longitude[keep], s[keep]
+    _, azimuth, _ = inverse(latitude[:-1], longitude[:-1], latitude[1:], longitude[1:])
+
+    count = max(int(np.ceil(s[-1] / spacing)), 1)
+    target = np.linspace(0.0, s[-1], count + 1)
+    segment = np.clip(np.searchsorted(s, target, side='right') - 1, 0, len(s) - 2)
+    new_lat, new_lon, _ = direct(latitude[segment], longitude[segment], azimuth[segment], target - s[segment])
+    new_lat[-1], new_lon[-1] = latitude[-1], longitude[-1]
+    if return_source:
+        source = kept[segment]
+        source[-1] = kept[-1]
+        return new_lat, new_lon, source
+    return new_lat, new_lon
+
+
+def resample_track(df, spacing):
+    """
+    표준 DataFrame 의 좌표 행을 측지선 기준 spacing(m) 간격으로 다시 나눈 새 DataFrame 을 반환합니다.
+    option 은 새 점이 속한 구간의 시작점 (앞쪽 원래 점) 값을 이어받습니다.
+    """
+    rows = np.flatnonzero(valid_mask(df))
+    latitude, longitude, source = resample_latlon(
+        df['latitude'].to_numpy(dtype=np.float64)[rows], df['longitude'].to_numpy(dtype=np.float64)[rows], spacing,
+        return_source=True
+    )
+    zone = df['utm_zone_number'].iloc[rows[0]] if len(rows) else None
+    easting, northing, zone = latlon_to_utm(latitude, longitude, zone)
+    out = pd.DataFrame({
+        'latitude': latitude,
+        'longitude': longitude,
+        'utm_easting': easting,
+        'utm_northing': northing,
+        'utm_zone_number': zone,
+    })
+    if 'seq' in df.columns:
+        out.insert(0, 'seq', np.arange(1, len(out) + 1))
+    if 'option' in df.columns:
+        out['option'] = df['option'].iloc[rows[source]].to_numpy()
+    out.attrs = dict(df.attrs)
+    return out
+
+
+def benchmark(count=100000, seed=0):
+    """
+    geopy (점 하나씩 호출) 대비 속도와, Karney 알고리즘 (geographiclib) 대비 정확도를 측정합니다.
+    geopy, geographiclib 은 이 비교에만 사용합니다.
+    """
+    from geopy.distance import geodesic as geopy_geodesic
+    from geographiclib.geodesic import Geodesic
+
+    rng = np.random.default_rng(seed)
+    # 대회장 주변 (수 m ~ 수 km) 과 전 세계 임의의 점 (정반대편 근처는 제외)
+    lat1 = np.concatenate([rng.uniform(35.0, 38.0, count // 2), rng.uniform(-80.0, 80.0, count - count // 2)])
+    lon1 = np.concatenate([rng.uniform(126.0, 129.0, count // 2), rng.uniform(-180.0, 180.0, count - count // 2)])
+    azimuth = rng.uniform(-180.0, 180.0, count)
+    distance = np.concatenate([10 ** rng.uniform(0, 4, count // 2), rng.uniform(1e3, 1.5e7, count - count // 2)])
+
+    reference = [Geodesic.WGS84.Direct(a, b, c, d) for a, b, c, d in zip(lat1, lon1, azimuth, distance)]
+    lat2 = np.array([r['lat2'] for r in reference])
+    lon2 = np.array([r['lon2'] for r in reference])
+
+    start = time.perf_counter()
+    ours, _, _ = inverse(lat1, lon1, lat2, lon2)
+    vectorized_time = time.perf_counter() - start
+
+    sample = min(count, 10000)
+    start = time.perf_counter()
+    for i in range(sample):
+        geopy_geodesic((lat1[i], lon1[i]), (lat2[i], lon2[i])).meters
+    geopy_time = (time.perf_counter() - start) * count / sample
+
+    inverse_error = np.abs(ours - distance)
+    new_lat, new_lon, _ = direct(lat1, lon1, azimuth, distance)
+    # 도착점 차이는 작으므로 국소 평면 근사로 m 단위 변환
+    east = np.radians((new_lon - lon2 + 180.0) % 360.0 - 180.0) * np.cos(np.radians(lat2)) * WGS84_A
+    north = np.radians(new_lat - lat2) * WGS84_A
+    direct_error = np.hypot(east, north)
+
+    print(f"{count} geodesic inverse problems")
+    print(f"  vectorized: {vectorized_time * 1000:.1f} ms ({count / vectorized_time:,.0f} /s)")
+    print(f"  geopy loop: {geopy_time * 1000:.1f} ms ({count / geopy_time:,.0f} /s, estimated from {sample})")
+    print(f"  speedup: {geopy_time / vectorized_time:.0f}x")
+    print(f"  inverse error vs Karney: max {np.nanmax(inverse_error) * 1000:.4f} mm, "
+          f"non-converged {int(np.isnan(ours).sum())}")
+    print(f"  direct error vs Karney: max {direct_error.max() * 1000:.4f} mm")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="측지선 기준 경로 길이 측정 / 재샘플링")
+    parser.add_argument('inputs', nargs='*', help="CSV 파일 또는 디렉토리")
+    parser.add_argument('--spacing', type=float, default=None, help="재샘플링 간격 (m). 지정하면 resampled_ 파일로 저장")
+    parser.add_argument('--output-dir', default=None, help="출력 디렉토리 (기본: 입력 파일 위치에 resampled_ 접두사)")
+    parser.add_argument('--benchmark', action='store_true', help="geopy 대비 속도, Karney 알고리즘 대비 정확도 측정")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    if args.output_dir and not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    for path in paths:
+        df = read_track(path)
+        rows = np.flatnonzero(valid_mask(df))
+        _, s = path_length(df['latitude'].to_numpy(dtype=np.float64)[rows], df['longitude'].to_numpy(dtype=np.float64)[rows])
+        total = s[-1] if len(s) else 0.0
+        print(f"{path}: {len(rows)} points, geodesic length {total:.3f} m")
+        if args.spacing:
+            out = resample_track(df, args.spacing)
+            if args.output_dir:
+                output_path = os.path.join(args.output_dir, os.path.basename(path))
+            else:
+                output_path = os.path.join(os.path.dirname(path), f"resampled_{os.path.basename(path)}")
+            write_track(out, output_path)
+            print(f"  resampled to {len(out)} points, saved as {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+import time
+import socket
+import struct
+import argparse
+import threading
+import numpy as np
+
+from track_io import read_track, valid_mask
+import geodesy
+
+# 버퍼에 저장하는 위치 정보 필드
+# time: 초 (NMEA 는 UTC 하루 기준 초, 재생 소스는 시작부터의 초), speed: m/s,
+# course: 진행 방향 (도, 북쪽 0 / 시계 방향, NMEA 기준), quality: GGA 측위 품질 (RTK 고정 4)
+FIX_FIELDS = ('time', 'latitude', 'longitude', 'speed', 'course', 'quality')
+
+# 간단한 이진 스트림 형식: 위 필드 순서의 little-endian double 6 개 (48 바이트)
+BINARY_FIX = struct.Struct('<6d')
+
+KNOTS_TO_MS = 1852.0 / 3600.0
+
+
+def nmea_checksum_ok(sentence):
+    """
+    '*hh' 체크섬이 있으면 검사합니다 (없으면 통과).
+    """
+    if '*' not in sentence:
+        return True
+    body, checksum = sentence[1:].split('*', 1)
+    value = 0
+    for char in body:
+        value ^= ord(char)
+    try:
+        return value == int(checksum[:2], 16)
+    except ValueError:
+        return False
+
+
+def _nmea_degrees(value, hemisphere):
+    # ddmm.mmmm / dddmm.mmmm -> 도
+    if not value:
+        return None
+    dot = value.index('.') if '.' in value else len(value)
+    degrees = float(value[:dot - 2]) + float(value[dot - 2:]) / 60.0
+    return -degrees if hemisphere in ('S', 'W') else degrees
+
+
+def _nmea_time(value):
+    # hhmmss.ss -> 하루 기준 초
+    if len(value) < 6:
+        return None
+    return int(value[0:2]) * 3600 + int(value[2:4]) * 60 + float(value[4:])
+
+
+class NmeaParser:
+    """
+    NMEA 문장 (GGA, RMC)을 위치 정보 dict 로 바꿉니다. 송신기 ID (GP, GN, GL ...)는 구분하지 않습니다.
+
+    GGA 가 들어오는 스트림은 GGA 마다 하나의 위치를 내고, RMC 의 속도/진행 방향은 다음 GGA 에 붙입니다.
+    RMC 만 들어오는 스트림은 RMC 마다 위치를 냅니다.
+    측위가 안 된 문장 (GGA 품질 0, RMC 상태 V)과 체크섬이 틀린 문장은 무시합니다.
+    """
+
+    def __init__(self):
+        self.has_gga = False
+        self.speed = np.nan
+        self.course = np.nan
+
+    def feed(self, line):
+        """
+        문장 하나를 처리하고 새 위치가 있으면 dict, 없으면 None 을 반환합니다.
+        """
+        line = line.strip()
+        if not line.startswith('$') or not nmea_checksum_ok(line):
+            return None
+        fields = line.split('*', 1)[0].split(',')
+        kind = fields[0][3:]
+        try:
+            if kind == 'GGA' and len(fields) >= 7:
+                self.has_gga = True
+                quality = int(fields[6] or 0)
+                latitude = _nmea_degrees(fields[2], fields[3])
+                longitude = _nmea_degrees(fields[4], fields[5])
+                if quality == 0 or latitude is None or longitude is None:
+                    return None
+                return {
+                    'time': _nmea_time(fields[1]), 'latitude': latitude, 'longitude': longitude,
+                    'speed': self.speed, 'course': self.course, 'quality': quality,
+                }
+            if kind == 'RMC' and len(fields) >= 9:
+                if fields[2] != 'A':
+                    return None
+                self.speed = float(fields[7]) * KNOTS_TO_MS if fields[7] else np.nan
+                self.course = float(fields[8]) if fields[8] else np.nan
+                if self.has_gga:
+                    return None
+                latitude = _nmea_degrees(fields[3], fields[4])
+                longitude = _nmea_degrees(fields[5], fields[6])
+                if latitude is None or longitude is None:
+                    return None
+                return {
+                    'time': _nmea_time(fields[1]), 'latitude': latitude, 'longitude': longitude,
+                    'speed': self.speed, 'course': self.course, 'quality': 1,
+                }
+        except ValueError:
+            return None
+        return None
+
+
+def to_nmea_gga(fix):
+    """
+    위치 정보 dict 를 GGA 문장으로 만듭니다 (재생 스트림을 UDP 로 내보낼 때 사용).
+    """
+    def dm(value, width):
+        value = abs(value)
+        degrees = int(value)
+        return f"{degrees:0{width}d}{(value - degrees) * 60.0:010.7f}"
+
+    seconds = fix['time'] % 86400.0
+    stamp = f"{int(seconds // 3600):02d}{int(seconds % 3600 // 60):02d}{seconds % 60:05.2f}"
+    body = (
+        f"GPGGA,{stamp},{dm(fix['latitude'], 2)},{'N' if fix['latitude'] >= 0 else 'S'},"
+        f"{dm(fix['longitude'], 3)},{'E' if fix['longitude'] >= 0 else 'W'},{int(fix['quality'])},12,0.8,0.0,M,0.0,M,,"
+    )
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}"
+
+
+class FixBuffer:
+    """
+    최근 capacity 개의 위치만 보관하는 고정 크기 링 버퍼입니다 (메모리가 늘지 않음).
+    수신 스레드의 append 와 화면 갱신의 snapshot 이 동시에 불려도 되도록 잠금을 사용합니다.
+    """
+
+    def __init__(self, capacity=5000):
+        self.capacity = capacity
+        self.data = np.full((capacity, len(FIX_FIELDS)), np.nan)
+        self.count = 0  # 지금까지 받은 전체 개수 (화면 갱신 여부 판단에 사용)
+        self.lock = threading.Lock()
+
+    def append(self, fix):
+        row = [fix[field] for field in FIX_FIELDS]
+        with self.lock:
+            self.data[self.count % self.capacity] = row
+            self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def snapshot(self):
+        """
+        보관 중인 위치를 오래된 순서로 담은 (N x 필드) 배열 복사본을 반환합니다.
+        """
+        with self.lock:
+            if self.count <= self.capacity:
+                return self.data[:self.count].copy()
+            start = self.count % self.capacity
+            return np.concatenate([self.data[start:], self.data[:start]])
+
+    def latest(self):
+        """
+        가장 최근 위치 dict (없으면 None).
+        """
+        with self.lock:
+            if self.count == 0:
+                return None
+            row = self.data[(self.count - 1) % self.capacity]
+        return dict(zip(FIX_FIELDS, row.tolist()))
+
+
+class UdpSource:
+    """
+    UDP 로 들어오는 NMEA 문장 (한 데이터그램에 여러 줄 가능) 또는 BINARY_FIX 레코드를 읽습니다.
+    """
+
+    def __init__(self, port, host='0.0.0.0', binary=False, timeout=0.2):
+        self.port = port
+        self.host = host
+        self.binary = binary
+        self.timeout = timeout
+        self.closed = False
+
+    def read(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.settimeout(self.timeout)
+        parser = NmeaParser()
+        try:
+            while not self.closed:
+                try:
+                    packet, _ = sock.recvfrom(65535)
+                except socket.timeout:
+                    continue
+                if self.binary:
+                    usable = len(packet) - len(packet) % BINARY_FIX.size
+                    for values in BINARY_FIX.iter_unpack(packet[:usable]):
+                        yield dict(zip(FIX_FIELDS, values))
+                else:
+                    for line in packet.decode('ascii', errors='ignore').splitlines():
+                        fix = parser.feed(line)
+                        if fix is not None:
+                            yield fix
+        finally:
+            sock.close()
+
+    def close(self):
+        self.closed = True
+
+
+class NmeaFileSource:
+    """
+    기록된 NMEA 파일을 실시간처럼 재생합니다 (테스트용 대체 소스).
+    rate(Hz)를 주면 그 주기로, 없으면 문장의 시각 차이대로 speedup 배속으로 재생합니다.
+    """
+
+    def __init__(self, path, rate=None, speedup=1.0, loop=False):
+        self.path = path
+        self.rate = rate
+        self.speedup = speedup
+        self.loop = loop
+        self.closed = False
+
+    def read(self):
+        while not self.closed:
+            parser = NmeaParser()
+            previous = None
+            with open(self.path, encoding='ascii', errors='ignore') as file:
+                for line in file:
+                    if self.closed:
+                        return
+                    fix = parser.feed(line)
+                    if fix is None:
+                        continue
+                    if self.rate:
+                        time.sleep(1.0 / self.rate)
+                    elif previous is not None and fix['time'] is not None and previous['time'] is not None:
+                        time.sleep(max(fix['time'] - previous['time'], 0.0) / self.speedup)
+                    previous = fix
+                    yield fix
+            if not self.loop:
+                return
+
+    def close(self):
+        self.closed = True
+
+
+class TrackReplaySource:
+    """
+    웨이포인트/차선 CSV 를 rate(Hz) 주기의 위치 스트림으로 재생합니다 (테스트용 대체 소스).
+    속도와 진행 방향은 연속한 두 점의 측지선 거리/방위각으로 계산합니다.
+    """
+
+    def __init__(self, path, rate=10.0, loop=False):
+        df = read_track(path)
+        rows = np.flatnonzero(valid_mask(df))
+        self.latitude = df['latitude'].to_numpy(dtype=np.float64)[rows]
+        self.longitude = df['longitude'].to_numpy(dtype=np.float64)[rows]
+        step = np.zeros(len(rows))
+        course = np.zeros(len(rows))
+        if len(rows) > 1:
+            step[1:], course[1:], _ = geodesy.inverse(
+                self.latitude[:-1], self.longitude[:-1], self.latitude[1:], self.longitude[1:]
+            )
+            course[0] = course[1]
+        self.speed = step * rate
+        self.course = course % 360.0
+        self.rate = rate
+        self.loop = loop
+        self.closed = False
+
+    def read(self):
+        start = time.monotonic()
+        sent = 0
+        while not self.closed:
+            for i in range(len(self.latitude)):
+                if self.closed:
+                    return
+                # 누적 오차 없이 일정 주기를 유지하도록 시작 시각 기준으로 대기
+                delay = start + sent / self.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                yield {
+                    'time': sent / self.rate, 'latitude': self.latitude[i], 'longitude': self.longitude[i],
+                    'speed': self.speed[i], 'course': self.course[i], 'quality': 4,
+                }
+                sent += 1
+            if not self.loop:
+                return
+
+    def close(self):
+        self.closed = True
+
+
+class StreamReader(threading.Thread):
+    """
+    백그라운드 스레드에서 소스의 위치를 읽어 FixBuffer 에 넣습니다.
+    callbacks 의 함수들은 위치마다 (수신 스레드에서) 호출됩니다 (기록 모드 등).
+    소스는 read() 제너레이터와 close() 만 있으면 되므로 UDP, 파일 재생 등으로 바꿔 끼울 수 있습니다.
+    """
+
+    def __init__(self, source, buffer, callbacks=()):
+        super().__init__(daemon=True)
+        self.source = source
+        self.buffer = buffer
+        self.callbacks = list(callbacks)
+        self.error = None
+
+    def run(self):
+        try:
+            for fix in self.source.read():
+                self.buffer.append(fix)
+                for callback in self.callbacks:
+                    callback(fix)
+        except Exception as e:
+            self.error = e
+
+    def stop(self, timeout=1.0):
+        self.source.close()
+        self.join(timeout)
+
+
+def open_source(spec, rate=None, binary=False, loop=False):
+    """
+    'udp:PORT', NMEA 파일 (.nmea / .txt / .log) 또는 CSV 경로로 소스를 만듭니다.
+    """
+    if spec.startswith('udp:'):
+        return UdpSource(int(spec[4:]), binary=binary)
+    if spec.lower().endswith('.csv'):
+        return TrackReplaySource(spec, rate or 10.0, loop)
+    return NmeaFileSource(spec, rate, loop=loop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GPS 위치 스트림 수신 확인 (UDP / NMEA 파일 / CSV 재생)")
+    parser.add_argument('source', help="udp:PORT, NMEA 파일 또는 재생할 웨이포인트 CSV")
+    parser.add_argument('--binary', action='store_true', help="UDP 이진 레코드 형식")
+    parser.add_argument('--rate', type=float, default=None, help="파일 재생 주기 (Hz)")
+    parser.add_argument('--loop', action='store_true', help="파일 재생 반복")
+    parser.add_argument('--forward', default=None, metavar='HOST:PORT',
+                        help="받은 위치를 GGA 문장으로 UDP 전송 (편집기 실시간 표시 테스트용)")
+    parser.add_argument('--duration', type=float, default=None, help="실행 시간 (s)")
+    args = parser.parse_args()
+
+    buffer = FixBuffer()
+    callbacks = []
+    if args.forward:
+        host, port = args.forward.rsplit(':', 1)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        callbacks.append(lambda fix: sender.sendto(to_nmea_gga(fix).encode('ascii') + b'\r\n', (host, int(port))))
+
+    reader = StreamReader(open_source(args.source, args.rate, args.binary, args.loop), buffer, callbacks)
+    reader.start()
+    start = time.monotonic()
+    last_count = 0
+    try:
+        while reader.is_alive() and (args.duration is None or time.monotonic() - start < args.duration):
+            time.sleep(1.0)
+            fix = buffer.latest()
+            if fix is not None:
+                print(
+                    f"{buffer.count - last_count} fixes/s, total {buffer.count}: "
+                    f"{fix['latitude']:.7f}, {fix['longitude']:.7f} (quality {fix['quality']:.0f})"
+                )
+            last_count = buffer.count
+    except KeyboardInterrupt:
+        pass
+    reader.stop()
+    if reader.error:
+        print(f"Stream error: {reader.error}")
+    print(f"Received {buffer.count} fixes")
+
+
+if __name__ == "__main__":
+    main()
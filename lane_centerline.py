@@ -0,0 +1,76 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+from track_io import read_track, write_track, utm_to_latlon, valid_mask
+from track_geometry import resample_polyline
+from spatial_index import SegmentIndex
+
+
+def extract_centerline(left_df, right_df, spacing=0.5, max_width=8.0):
+    """
+    왼쪽/오른쪽 차선 경계로부터 주행 중심선을 계산합니다.
+    두 경계의 점 개수나 간격이 달라도 되도록, 왼쪽 경계를 균일 간격으로 다시 나눈 뒤
+    오른쪽 경계의 구간 인덱스에서 가장 가까운 구간에 사영하여 짝을 짓고 중점을 구합니다.
+
+    Parameters:
+    - left_df, right_df: 표준 컬럼을 가진 경계 DataFrame
+    - spacing: 출력 웨이포인트 간격 (m)
+    - max_width: 이 거리보다 먼 짝은 차선 폭을 벗어난 것으로 보고 버림 (m)
+
+    Returns:
+    - 표준 컬럼을 가진 중심선 DataFrame (진행 방향은 왼쪽 경계를 따름)
+    """
+    left = left_df.loc[valid_mask(left_df), ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+    right = right_df.loc[valid_mask(right_df), ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+    if len(left) < 2 or len(right) < 2:
+        raise ValueError("경계에는 최소 두 개 이상의 포인트가 있어야 합니다.")
+
+    samples = resample_polyline(left, spacing)
+    match = SegmentIndex(right).nearest(samples, max_distance=max_width)
+
+    # 오른쪽 경계의 양 끝점에 사영된 짝은 경계가 겹치지 않는 구간이므로 제외
+    paired = match['segment'] >= 0
+    last = len(right) - 2
+    at_start = (match['index'] == 0) & (match['t'] <= 0.0)
+    at_end = (match['index'] == last) & (match['t'] >= 1.0)
+    paired &= ~(at_start | at_end)
+    if paired.sum() < 2:
+        raise ValueError("두 경계가 겹치는 구간을 찾을 수 없습니다.")
+
+    midpoints = (samples[paired] + match['proj'][paired]) / 2.0
+    centerline = resample_polyline(midpoints, spacing)
+
+    zone = left_df['utm_zone_number'].iloc[0]
+    latitude, longitude = utm_to_latlon(centerline[:, 0], centerline[:, 1], zone)
+    return pd.DataFrame({
+        'latitude': latitude,
+        'longitude': longitude,
+        'utm_easting': centerline[:, 0],
+        'utm_northing': centerline[:, 1],
+        'utm_zone_number': zone,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="좌/우 차선 경계로부터 중심선 웨이포인트 생성")
+    parser.add_argument('left', help="왼쪽 경계 CSV (lane_L)")
+    parser.add_argument('right', help="오른쪽 경계 CSV (lane_R)")
+    parser.add_argument('-o', '--output', default=None, help="출력 파일 (기본: centerline_<left>.csv)")
+    parser.add_argument('--spacing', type=float, default=0.5, help="웨이포인트 간격 (m)")
+    parser.add_argument('--max-width', type=float, default=8.0, help="최대 차선 폭 (m)")
+    args = parser.parse_args()
+
+    centerline = extract_centerline(read_track(args.left), read_track(args.right), args.spacing, args.max_width)
+
+    output_path = args.output or os.path.join(
+        os.path.dirname(args.left), f"centerline_{os.path.basename(args.left)}"
+    )
+    # lane_to_waypoint.py 와 같은 형식 (seq 1 부터, option 0)
+    write_track(centerline, output_path, 'waypoint')
+    print(f"Saved {len(centerline)} waypoints to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
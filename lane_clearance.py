@@ -0,0 +1,127 @@
+import os
+import time
+import argparse
+import numpy as np
+
+from track_io import read_track, write_track, valid_mask, list_csv_files
+from spatial_index import SegmentIndex, split_chains
+
+DEFAULT_BOUNDARIES = ['utm/dcu/d2_T_parking_lane.csv', 'utm/dcu/d2_parallel_parking_lane_v1.csv']
+
+
+class BoundarySet:
+    """
+    여러 차선/주차 구획 경계 파일을 하나로 묶은 구간 인덱스입니다.
+    경계 파일은 여러 선이 이어 붙어 있으므로 파일 경계와 간격이 max_gap(m) 보다 큰 곳에서 선을 나눕니다.
+    """
+
+    def __init__(self, frames, names=None, max_gap=1.0):
+        parts, latlon, breaks, sources = [], [], [], []
+        for number, df in enumerate(frames):
+            valid = valid_mask(df)
+            xy = df.loc[valid, ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+            parts.append(xy)
+            latlon.append(df.loc[valid, ['latitude', 'longitude']].to_numpy(dtype=np.float64))
+            breaks.append(split_chains(xy, max_gap))
+            sources.append(np.full(len(xy), number))
+        if not parts or sum(len(p) for p in parts) < 2:
+            raise ValueError("경계에는 최소 두 개 이상의 포인트가 있어야 합니다.")
+        self.names = list(names) if names is not None else [str(i) for i in range(len(parts))]
+        self.xy = np.vstack(parts)
+        self.latlon = np.vstack(latlon)  # 화면 표시용 (위도, 경도)
+        self.source = np.concatenate(sources)  # 점별 경계 파일 번호
+        self.index = SegmentIndex(self.xy, np.concatenate(breaks))
+        self.lines = int(self.index.breaks.sum())
+
+    @classmethod
+    def from_files(cls, paths, max_gap=1.0):
+        return cls([read_track(path) for path in paths], [os.path.basename(path) for path in paths], max_gap)
+
+    def clearance(self, xy):
+        """
+        점 배열 (N x 2, UTM) 에서 가장 가까운 경계까지의 거리를 계산합니다.
+
+        Returns:
+        - dict: distance (m), proj (가장 가까운 경계 위의 점, N x 2), source (경계 파일 번호)
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        if len(xy) == 0:
+            return {'distance': np.empty(0), 'proj': np.empty((0, 2)), 'source': np.empty(0, dtype=np.int64)}
+        match = self.index.nearest(xy)
+        return {'distance': match['distance'], 'proj': match['proj'], 'source': self.source[match['index']]}
+
+
+def check_clearance(df, boundaries, half_width=0.95):
+    """
+    경로의 모든 점에서 경계까지의 여유 거리를 계산하고 half_width(m) 보다 가까운 점을 위반으로 표시합니다.
+
+    Returns:
+    - clearance: 행별 여유 거리 배열 (좌표가 없는 라벨 행은 NaN)
+    - 요약 dict: points, min_clearance, min_index, violations (위반 행 번호 배열),
+      runs (연속 위반 구간 [(첫 행, 마지막 행, 최소 여유 거리, 경계 파일 이름), ...])
+    """
+    rows = np.flatnonzero(valid_mask(df))
+    clearance = np.full(len(df), np.nan)
+    result = boundaries.clearance(df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows])
+    distance = result['distance']
+    clearance[rows] = distance
+
+    # 위반이 연속된 구간 (유효한 점 순서 기준)마다 가장 가까운 지점을 요약
+    over = np.concatenate([[False], distance < half_width, [False]])
+    edges = np.flatnonzero(np.diff(over.astype(np.int8)))
+    runs = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        worst = start + int(np.argmin(distance[start:end]))
+        runs.append((int(rows[start]), int(rows[end - 1]), float(distance[worst]),
+                     boundaries.names[result['source'][worst]]))
+
+    worst = int(np.argmin(distance)) if len(distance) else None
+    return clearance, {
+        'points': len(rows),
+        'min_clearance': float(distance[worst]) if worst is not None else float('nan'),
+        'min_index': int(rows[worst]) if worst is not None else None,
+        'violations': rows[distance < half_width],
+        'runs': runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="웨이포인트 경로와 차선/주차 구획 경계 사이 여유 거리 검사")
+    parser.add_argument('inputs', nargs='+', help="웨이포인트 CSV 파일 또는 디렉토리 (P/, T/ 등)")
+    parser.add_argument('-b', '--boundaries', nargs='+', default=DEFAULT_BOUNDARIES, help="경계 CSV 파일들")
+    parser.add_argument('--half-width', type=float, default=0.95, help="차량 반폭 (m). 이보다 가까우면 위반")
+    parser.add_argument('--max-gap', type=float, default=1.0, help="경계 선을 나누는 점 간격 (m)")
+    parser.add_argument('--output-dir', default=None, help="clearance 컬럼을 추가한 파일을 저장할 디렉토리")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    boundaries = BoundarySet.from_files(args.boundaries, args.max_gap)
+    print(f"{len(boundaries.xy)} boundary points, {boundaries.lines} lines from {len(args.boundaries)} files")
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    if args.output_dir and not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    failed = 0
+    for path in paths:
+        df = read_track(path)
+        clearance, summary = check_clearance(df, boundaries, args.half_width)
+        failed += bool(summary['runs'])
+        print(
+            f"{path}: {'OK' if not summary['runs'] else 'VIOLATION'}, {summary['points']} points, "
+            f"min clearance {summary['min_clearance']:.3f} m at row {summary['min_index']}, "
+            f"{len(summary['violations'])} points below {args.half_width} m"
+        )
+        for first, last, distance, name in summary['runs']:
+            print(f"  rows {first}-{last}: min {distance:.3f} m to {name}")
+        if args.output_dir:
+            df['clearance'] = clearance
+            write_track(df, os.path.join(args.output_dir, os.path.basename(path)))
+    print(f"{len(paths)} files, {failed} with violations, checked in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra, connected_components
+from scipy.spatial import cKDTree
+
+from track_io import read_track, write_track, utm_to_latlon, latlon_to_utm, valid_mask
+from track_geometry import resample_polyline, distinct_mask, arc_length
+from spatial_index import SegmentIndex, split_chains
+
+DEFAULT_LANE_MAP = 'mando_contest/lane_map/last_mando_lane_map_v1.csv'
+
+# 그래프 캐시 형식 버전 (저장 내용이 바뀌면 올려서 이전 캐시를 무효화)
+CACHE_VERSION = 2
+# 질의 점을 가장 가까운 차선보다 이 거리 (m) 이내로 더 먼 차선에도 사영해 경로 후보로 사용
+SNAP_SLACK = 2.0
+
+
+def cache_path(path):
+    return os.path.splitext(path)[0] + '.graph.npz'
+
+
+def _angle_difference(a, b):
+    # 두 방향 (라디안) 의 차이를 [-pi, pi) 로
+    return (np.asarray(a) - b + np.pi) % (2 * np.pi) - np.pi
+
+
+class LaneGraph:
+    """
+    lane map 점 목록으로 만든 방향 그래프입니다.
+
+    - 차선: 간격이 max_gap(m) 보다 큰 곳에서 나눈 점 사슬 (점 하나짜리 사슬은 제외).
+      기록된 순서가 진행 방향이고, bidirectional 이면 (기록 방향이 섞인 차선 선 지도용) 차선마다
+      역방향 사본을 두어 어느 쪽으로든 달릴 수 있지만 한 번 정한 방향은 경로 중간에 뒤집히지 않습니다.
+    - 노드: 진행 방향별로, 차선의 양 끝점과 다른 차선의 끝점이 연결되는 점 (합류/분기 지점)
+    - 간선: 같은 차선 위 이웃한 노드 사이의 차선 조각 (길이 = 누적 거리 차이) 과
+      차선 끝점 -> 다른 차선 점 / 다른 차선 점 -> 차선 시작점의 연결 간선 (길이 = 두 점 사이 거리).
+      연결할 점은 join_distance(m) 안의 다른 차선마다 하나씩, 진행 방향 차이가 join_angle(도) 이하이고
+      더 갈 수 있는 (빠져나가는 쪽이면 그 차선의 끝이 아닌, 들어오는 쪽이면 시작이 아닌) 점 중 가장 가까운 점입니다
+      (끊겨 기록된 같은 차선 선, 합류/분기 지점, 같은 차로의 반대쪽 차선 선).
+    노드 번호는 정방향이 cuts (lane map 의 점 번호, 오름차순) 순서, 역방향이 그 뒤에 같은 순서로 이어지며
+    node_points 가 노드별 점 번호이므로 간선의 모양은 점 번호 범위로 복원됩니다.
+
+    최단 경로는 출발 노드별 Dijkstra 결과 (거리, 이전 노드)를 메모리에 캐시하므로
+    같은 출발 구간에서의 반복 질의는 경로 복원만 합니다.
+
+    기본은 bidirectional 입니다. 기본 lane map 은 기록 방향이 섞인 차선 선이라 기록 방향만 따르면
+    가장 큰 강연결 요소가 노드의 5% 에 그쳐 임의의 두 점이 거의 이어지지 않습니다.
+    양방향이어도 정지선/횡단보도 같은 표시와 끊긴 점선 때문에 가장 큰 강연결 요소는 노드의 28% 정도이고
+    임의의 두 점 중 40% 정도만 경로가 나오므로, 주행 경로를 따라 가까운 두 점 사이를 잇는 용도로 쓰세요
+    (--benchmark N --along 경로 로 확인).
+    """
+
+    def __init__(self, xy, max_gap=5.0, join_distance=3.0, join_angle=45.0, bidirectional=True):
+        self.xy = np.asarray(xy, dtype=np.float64)
+        if len(self.xy) < 2:
+            raise ValueError("lane map 에는 최소 두 개 이상의 포인트가 있어야 합니다.")
+        self.max_gap, self.join_distance, self.join_angle = max_gap, join_distance, join_angle
+        self.bidirectional = bool(bidirectional)
+        self._set_index(split_chains(self.xy, max_gap))
+
+        starts = np.flatnonzero(self.index.breaks)
+        ends = np.append(starts[1:] - 1, len(self.xy) - 1)
+        lanes = ends > starts
+        starts, ends = starts[lanes], ends[lanes]
+        first, last = np.zeros(len(self.xy), dtype=np.int64), np.zeros(len(self.xy), dtype=np.int64)
+        for begin, end in zip(starts, ends):
+            first[begin:end + 1], last[begin:end + 1] = begin, end
+        heading = self._headings(starts, ends)
+        directions = (False, True) if self.bidirectional else (False,)
+        limit = np.radians(join_angle)
+
+        # 진행 방향마다 차선을 빠져나가는 끝점 -> 다른 차선 점, 다른 차선 점 -> 차선으로 들어오는 끝점 연결
+        on_lane = np.concatenate([np.arange(begin, end + 1) for begin, end in zip(starts, ends)])
+        tree = cKDTree(self.xy[on_lane])
+        cuts = set(starts.tolist()) | set(ends.tolist())
+        links = []  # (출발 점, 출발 역방향 여부, 도착 점, 도착 역방향 여부)
+        for reverse in directions:
+            for points, outgoing in (((starts if reverse else ends), True), ((ends if reverse else starts), False)):
+                for point, near in zip(points, tree.query_ball_point(self.xy[points], join_distance)):
+                    near = on_lane[np.asarray(near, dtype=np.int64)]
+                    near = near[self.chain[near] != self.chain[point]]
+                    if len(near) == 0:
+                        continue
+                    direction = heading[point] + np.pi * reverse
+                    distance = np.hypot(*(self.xy[near] - self.xy[point]).T)
+                    for other_reverse in directions:
+                        # 빠져나가는 쪽은 상대 차선의 (그 방향) 끝, 들어오는 쪽은 시작에는 붙이지 않음
+                        blocked = (first if other_reverse == outgoing else last)[near]
+                        turn = _angle_difference(heading[near] + np.pi * other_reverse, direction)
+                        ok = (near != blocked) & (np.abs(turn) <= limit)
+                        if not ok.any():
+                            continue
+                        candidates, order = near[ok], np.lexsort((distance[ok], self.chain[near[ok]]))
+                        closest = order[np.concatenate([[True], np.diff(self.chain[candidates[order]]) != 0])]
+                        for other in candidates[closest].tolist():
+                            cuts.add(other)
+                            link = (int(point), reverse, other, other_reverse)
+                            links.append(link if outgoing else link[2:] + link[:2])
+        self.links = len(links)
+
+        # 같은 차선 위 이웃한 노드 사이의 차선 조각 (역방향 사본은 반대로)
+        self.cuts = np.array(sorted(cuts), dtype=np.int64)
+        count = len(self.cuts)
+        pieces = np.flatnonzero(self.chain[self.cuts[:-1]] == self.chain[self.cuts[1:]])
+        source, target = [pieces], [pieces + 1]
+        if self.bidirectional:
+            source.append(pieces + 1 + count)
+            target.append(pieces + count)
+        if links:
+            points, reverse, other, other_reverse = np.array(links, dtype=np.int64).T
+            source.append(np.searchsorted(self.cuts, points) + count * reverse)
+            target.append(np.searchsorted(self.cuts, other) + count * other_reverse)
+        self._set_edges(np.concatenate(source), np.concatenate(target))
+
+    def _set_index(self, breaks):
+        self.index = SegmentIndex(self.xy, breaks)
+        self.chain = np.cumsum(self.index.breaks) - 1  # 점별 차선 번호
+
+    def _headings(self, starts, ends, reach=1.0):
+        # 점별 차선 진행 방향 (라디안, 기록 순서 기준). 촘촘한 점의 흔들림을 줄이려고 앞뒤 reach(m) 의 점으로 계산
+        arc = self.index.arc_length
+        heading = np.zeros(len(self.xy))
+        for begin, end in zip(starts, ends):
+            s, xy = arc[begin:end + 1], self.xy[begin:end + 1]
+            ahead, behind = np.minimum(s + reach, s[-1]), np.maximum(s - reach, s[0])
+            dx = np.interp(ahead, s, xy[:, 0]) - np.interp(behind, s, xy[:, 0])
+            dy = np.interp(ahead, s, xy[:, 1]) - np.interp(behind, s, xy[:, 1])
+            heading[begin:end + 1] = np.arctan2(dy, dx)
+        return heading
+
+    def _set_edges(self, u, v):
+        # 같은 두 노드 사이의 간선은 하나만 남기고 CSR 그래프를 만듦 (csgraph 는 중복 간선을 더해 버림)
+        self.node_points = np.concatenate([self.cuts, self.cuts]) if self.bidirectional else self.cuts
+        source, target = self.node_points[u], self.node_points[v]
+        arc = self.index.arc_length
+        length = np.where(self.chain[source] == self.chain[target], np.abs(arc[target] - arc[source]),
+                          np.hypot(*(self.xy[target] - self.xy[source]).T))
+        order = np.lexsort((length, v, u))
+        u, v, length = u[order], v[order], length[order]
+        keep = np.concatenate([[True], (np.diff(u) != 0) | (np.diff(v) != 0)])
+        self.edge_u, self.edge_v, self.edge_length = u[keep], v[keep], length[keep]
+        # 길이 0 간선은 희소 행렬에서 사라지므로 아주 작은 값으로 둠
+        nodes = len(self.node_points)
+        self.graph = csr_matrix((np.maximum(self.edge_length, 1e-9), (self.edge_u, self.edge_v)), shape=(nodes, nodes))
+        self._trees = {}
+
+    @classmethod
+    def from_track(cls, df, **params):
+        xy = df.loc[valid_mask(df), ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+        graph = cls(xy, **params)
+        graph.zone = str(df['utm_zone_number'].iloc[0])
+        return graph
+
+    @classmethod
+    def from_file(cls, path, cache=True, max_gap=5.0, join_distance=3.0, join_angle=45.0, bidirectional=True):
+        """
+        lane map CSV 로 그래프를 만듭니다. cache 이면 <파일명>.graph.npz 에 저장해 두고,
+        원본 파일 (크기, 수정 시각)과 파라미터가 같으면 다음부터 CSV 대신 그 캐시를 읽습니다.
+        """
+        stat = os.stat(path)
+        key = np.array([CACHE_VERSION, stat.st_size, stat.st_mtime_ns, max_gap, join_distance, join_angle,
+                        bidirectional], dtype=np.float64)
+        if cache and os.path.exists(cache_path(path)):
+            with np.load(cache_path(path), allow_pickle=False) as data:
+                if np.array_equal(data['key'], key):
+                    return cls._from_cache(data)
+
+        graph = cls.from_track(read_track(path), max_gap=max_gap, join_distance=join_distance,
+                               join_angle=join_angle, bidirectional=bidirectional)
+        if cache:
+            with open(cache_path(path), 'wb') as f:
+                np.savez(f, key=key, xy=graph.xy, breaks=graph.index.breaks, zone=graph.zone,
+                         cuts=graph.cuts, edge_u=graph.edge_u, edge_v=graph.edge_v, links=graph.links)
+        return graph
+
+    @classmethod
+    def _from_cache(cls, data):
+        graph = cls.__new__(cls)
+        graph.xy = data['xy']
+        _, _, _, graph.max_gap, graph.join_distance, graph.join_angle, bidirectional = data['key']
+        graph.bidirectional = bool(bidirectional)
+        graph.zone = str(data['zone'])
+        graph.links = int(data['links'])
+        graph._set_index(data['breaks'])
+        graph.cuts = data['cuts']
+        graph._set_edges(data['edge_u'], data['edge_v'])
+        return graph
+
+    def clear_cache(self):
+        self._trees = {}
+
+    def node_path(self, start, goal):
+        """
+        노드 번호 start -> goal 의 최단 경로 (노드 번호 목록)와 길이를 반환합니다. 갈 수 없으면 (None, inf).
+        """
+        if start not in self._trees:
+            self._trees[start] = dijkstra(self.graph, indices=start, return_predecessors=True)
+        distance, previous = self._trees[start]
+        if not np.isfinite(distance[goal]):
+            return None, np.inf
+        path = [goal]
+        while path[-1] != start:
+            path.append(int(previous[path[-1]]))
+        return path[::-1], float(distance[goal])
+
+    def _points(self, p, q):
+        # 점 번호 p -> q 의 모양. 같은 차선이면 차선 점 (역방향이면 뒤집음), 아니면 두 점
+        if self.chain[p] != self.chain[q]:
+            return self.xy[[p, q]]
+        return self.xy[p:q + 1] if p <= q else self.xy[q:p + 1][::-1]
+
+    def _locate(self, point):
+        # 점을 가장 가까운 차선 구간과, 그보다 SNAP_SLACK(m) 이내로 더 먼 다른 차선 구간에 사영하고
+        # (차선 선 지도에서는 차로 가운데의 점이 양쪽 차선 선에 비슷한 거리로 붙음)
+        # 차선별로 사영점이 있는 차선 조각의 앞/뒤 노드 (정방향 번호) 를 찾음
+        point = np.asarray(point, dtype=np.float64).reshape(2)
+        nearest = self.index.nearest(point[None, :])
+        radius = float(nearest['distance'][0]) + SNAP_SLACK
+        pieces = self.index.tree.query_ball_point(point, radius + self.index.piece_half)
+        segments = np.unique(self.index.piece_owner[np.asarray(pieces, dtype=np.int64)])
+        segments = np.union1d(segments, nearest['segment'])
+        t, proj, distance = self.index.project(point[None, :], segments)
+        index = self.index.segment_start[segments]
+        order = np.lexsort((distance, self.chain[index]))
+        closest = order[np.concatenate([[True], np.diff(self.chain[index[order]]) != 0])]
+        located = []
+        for i in closest[distance[closest] <= radius]:
+            k = int(index[i])
+            after = int(np.searchsorted(self.cuts, k + 1))
+            located.append({'k': k, 'proj': proj[i], 'offset': float(distance[i]), 'before': after - 1,
+                            'after': after, 's': float(self.index.arc_length[k] + t[i] * self.index.length[segments[i]])})
+        return located
+
+    def route(self, start_xy, goal_xy):
+        """
+        두 점 (UTM) 사이의 최단 주행 경로를 구합니다. 두 점은 주변 차선 위로 사영되고,
+        사영 거리를 더한 길이가 가장 짧은 출발/도착 차선 조합을 고릅니다.
+
+        Returns:
+        - (경로 점 배열 (N x 2), 길이 (m, 사영점 사이 차선 경로 길이)). 이어지는 경로가 없으면 ValueError
+        """
+        arc = self.index.arc_length
+        count = len(self.cuts)
+        best_cost, best = np.inf, None
+        for a in self._locate(start_xy):
+            # 출발 조각을 빠져나가는 노드 (역방향 사본은 bidirectional 일 때만)
+            p, q = self.cuts[a['after']], self.cuts[a['before']]
+            exits = [(a['after'], arc[p] - a['s'], self.xy[a['k'] + 1:p + 1])]
+            if self.bidirectional:
+                exits.append((a['before'] + count, a['s'] - arc[q], self.xy[q:a['k'] + 1][::-1]))
+            for b in self._locate(goal_xy):
+                offset = a['offset'] + b['offset']
+                # 같은 차선 위에서 그대로 가는 경우
+                if self.chain[a['k']] == self.chain[b['k']]:
+                    if b['s'] >= a['s']:
+                        length, parts = b['s'] - a['s'], [self.xy[a['k'] + 1:b['k'] + 1]]
+                    else:
+                        length, parts = a['s'] - b['s'], [self.xy[b['k'] + 1:a['k'] + 1][::-1]]
+                    if (b['s'] >= a['s'] or self.bidirectional) and length + offset < best_cost:
+                        best_cost, best = length + offset, (length, a, b, parts)
+
+                # 도착 조각으로 들어가는 노드
+                p, q = self.cuts[b['before']], self.cuts[b['after']]
+                entries = [(b['before'], b['s'] - arc[p], self.xy[p:b['k'] + 1])]
+                if self.bidirectional:
+                    entries.append((b['after'] + count, arc[q] - b['s'], self.xy[b['k'] + 1:q + 1][::-1]))
+                for exit_node, exit_length, exit_points in exits:
+                    for entry_node, entry_length, entry_points in entries:
+                        path, length = self.node_path(exit_node, entry_node)
+                        length += exit_length + entry_length
+                        if path is None or length + offset >= best_cost:
+                            continue
+                        points = self.node_points[path]
+                        parts = [exit_points] + [self._points(u, v) for u, v in zip(points[:-1], points[1:])]
+                        best_cost, best = length + offset, (length, a, b, parts + [entry_points])
+
+        if best is None:
+            raise ValueError("두 점 사이에 이어지는 차선 경로가 없습니다.")
+        length, a, b, parts = best
+        xy = np.vstack([a['proj'][None, :]] + parts + [b['proj'][None, :]])
+        return xy[distinct_mask(xy)], float(length)
+
+
+def route_frame(xy, zone):
+    """
+    경로 점 배열 (UTM) 을 waypoint 형식으로 저장할 수 있는 DataFrame 으로 만듭니다.
+    """
+    latitude, longitude = utm_to_latlon(xy[:, 0], xy[:, 1], zone)
+    df = pd.DataFrame({
+        'seq': np.arange(1, len(xy) + 1),
+        'latitude': latitude,
+        'longitude': longitude,
+        'utm_easting': xy[:, 0],
+        'utm_northing': xy[:, 1],
+        'utm_zone_number': zone,
+        'option': 0,
+    })
+    df.attrs['dialect'] = 'waypoint'
+    return df
+
+
+def build_route(graph, start_xy, goal_xy, spacing=None):
+    """
+    두 점 사이 경로를 구해 (waypoint DataFrame, 길이 (m)) 를 반환합니다. spacing(m) 이 주어지면 등간격으로 다시 샘플링합니다.
+    """
+    xy, length = graph.route(start_xy, goal_xy)
+    if spacing:
+        xy = resample_polyline(xy, spacing)
+    return route_frame(xy, graph.zone), length
+
+
+def benchmark(path, count=1000, seed=0, along=None, hop=30.0, **params):
+    """
+    그래프 생성 (CSV 에서, 캐시 쓰기 포함) / 캐시 읽기 시간과 임의의 두 차선 점 사이 경로 질의 시간을 측정합니다.
+    질의는 Dijkstra 캐시가 빈 상태 (cold) 와 같은 질의를 다시 한 경우 (cached) 를 따로 잽니다.
+    연결성으로 강한 연결 요소 (서로 오갈 수 있는 노드 묶음) 수와 가장 큰 요소의 크기를 출력하고,
+    along (waypoint CSV) 이 주어지면 그 경로를 따라 hop(m) 마다 찍은 점 사이가 이어지는지 확인합니다.
+    """
+    if os.path.exists(cache_path(path)):
+        os.remove(cache_path(path))
+    start = time.perf_counter()
+    LaneGraph.from_file(path, **params)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    graph = LaneGraph.from_file(path, **params)
+    loaded = time.perf_counter() - start
+    print(
+        f"{len(graph.xy)} points, {len(np.unique(graph.chain[graph.index.segment_start]))} lanes, "
+        f"{len(graph.node_points)} nodes, {len(graph.edge_u)} edges ({graph.links} junction links)"
+    )
+    print(f"build from CSV {built * 1000:.1f} ms, load from cache {loaded * 1000:.1f} ms")
+    components, labels = connected_components(graph.graph, directed=True, connection='strong')
+    largest = np.bincount(labels).max()
+    print(f"{components} strongly connected components, largest {largest} of {len(labels)} nodes "
+          f"({largest / len(labels) * 100:.1f}%)")
+
+    rng = np.random.default_rng(seed)
+    segments = graph.index.segment_start
+    pairs = graph.xy[segments[rng.integers(0, len(segments), size=(count, 2))]]
+    for label in ('cold', 'cached'):
+        times, lengths = [], []
+        for start_xy, goal_xy in pairs:
+            start = time.perf_counter()
+            try:
+                lengths.append(graph.route(start_xy, goal_xy)[1])
+            except ValueError:
+                pass
+            times.append(time.perf_counter() - start)
+        times = np.array(times) * 1000
+        print(
+            f"{label}: {count} queries, {len(lengths)} routed (mean length {np.mean(lengths) if lengths else 0:.1f} m), "
+            f"mean {times.mean():.3f} ms, p95 {np.percentile(times, 95):.3f} ms, max {times.max():.3f} ms"
+        )
+
+    if along:
+        df = read_track(along)
+        xy = df.loc[valid_mask(df), ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+        s = arc_length(xy)
+        points = xy[np.searchsorted(s, np.arange(0.0, s[-1], hop))]
+        routed, detours = 0, 0
+        for start_xy, goal_xy in zip(points[:-1], points[1:]):
+            try:
+                length = graph.route(start_xy, goal_xy)[1]
+            except ValueError:
+                continue
+            routed += 1
+            detours += length > 2 * hop
+        print(f"along {along}: {routed}/{len(points) - 1} hops of {hop:.0f} m routed ({detours} longer than {2 * hop:.0f} m)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="lane map 차선 그래프로 두 점 사이 최단 경로를 waypoint 파일로 생성")
+    parser.add_argument('-m', '--map', default=DEFAULT_LANE_MAP, help="lane map CSV")
+    parser.add_argument('--start', nargs=2, type=float, metavar=('X', 'Y'), help="출발점 (UTM easting northing)")
+    parser.add_argument('--goal', nargs=2, type=float, metavar=('X', 'Y'), help="도착점 (UTM easting northing)")
+    parser.add_argument('--latlon', action='store_true', help="--start/--goal 을 위도 경도로 해석")
+    parser.add_argument('-o', '--output', default='lane_route.csv', help="출력 waypoint CSV")
+    parser.add_argument('--spacing', type=float, default=None, help="출력 점 간격 (m, 기본: lane map 점 그대로)")
+    parser.add_argument('--max-gap', type=float, default=5.0, help="차선을 나누는 점 간격 (m)")
+    parser.add_argument('--join-distance', type=float, default=3.0, help="차선 끝이 다른 차선에 붙는 거리 (m)")
+    parser.add_argument('--join-angle', type=float, default=45.0, help="차선 끝과 붙는 점의 진행 방향 차이 허용 (도)")
+    parser.add_argument('--directed', dest='bidirectional', action='store_false',
+                        help="차선을 기록된 방향으로만 주행 (기본: 양방향)")
+    parser.add_argument('--no-cache', action='store_true', help="그래프 캐시 파일을 쓰지 않음")
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N', help="그래프 생성/질의 시간 측정 (임의 질의 N 개)")
+    parser.add_argument('--along', default=None, help="--benchmark 에서 이 waypoint 경로를 따라 연결되는지 확인")
+    args = parser.parse_args()
+
+    params = {'max_gap': args.max_gap, 'join_distance': args.join_distance, 'join_angle': args.join_angle,
+              'bidirectional': args.bidirectional}
+    if args.benchmark:
+        benchmark(args.map, args.benchmark, along=args.along, **params)
+        return
+    if args.start is None or args.goal is None:
+        parser.error("--start 와 --goal 이 필요합니다.")
+
+    graph = LaneGraph.from_file(args.map, cache=not args.no_cache, **params)
+    start_xy, goal_xy = np.array(args.start), np.array(args.goal)
+    if args.latlon:
+        e, n, _ = latlon_to_utm(np.array([args.start[0], args.goal[0]]), np.array([args.start[1], args.goal[1]]),
+                                graph.zone)
+        start_xy, goal_xy = np.array([e[0], n[0]]), np.array([e[1], n[1]])
+
+    start = time.perf_counter()
+    df, length = build_route(graph, start_xy, goal_xy, args.spacing)
+    elapsed = time.perf_counter() - start
+    write_track(df, args.output, 'waypoint')
+    print(f"Route {length:.1f} m, {len(df)} points in {elapsed * 1000:.1f} ms, saved as {args.output}")
+
+
+if __name__ == "__main__":
+    main()
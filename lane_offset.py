@@ -0,0 +1,161 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from track_io import read_track, write_track, utm_to_latlon, valid_mask
+from track_geometry import distinct_mask, densify
+
+# 미터(miter) 보정의 최대 배율 (뾰족한 꺾임에서 점이 너무 멀리 튀지 않도록 제한)
+MAX_MITER = 4.0
+
+
+def vertex_normals(xy):
+    """
+    각 꼭짓점의 왼쪽 법선 벡터와 미터 보정 배율을 계산합니다.
+    양옆 구간의 단위 접선을 평균한 방향의 법선을 사용합니다.
+    """
+    seg = np.diff(xy, axis=0)
+    seg /= np.hypot(seg[:, 0], seg[:, 1])[:, None]
+
+    tangent = np.empty_like(xy)
+    tangent[0] = seg[0]
+    tangent[-1] = seg[-1]
+    tangent[1:-1] = seg[:-1] + seg[1:]
+    length = np.hypot(tangent[:, 0], tangent[:, 1])
+    # 180도 되돌아가는 꼭짓점은 앞 구간의 방향을 사용
+    flat = length < 1e-9
+    tangent[1:-1][flat[1:-1]] = seg[:-1][flat[1:-1]]
+    length[flat] = 1.0
+    tangent /= length[:, None]
+
+    normal = np.column_stack([-tangent[:, 1], tangent[:, 0]])
+    seg_normal = np.column_stack([-seg[:, 1], seg[:, 0]])
+    cos_half = np.ones(len(xy))
+    cos_half[1:-1] = np.einsum('ij,ij->i', normal[1:-1], seg_normal[1:])
+    miter = 1.0 / np.clip(cos_half, 1.0 / MAX_MITER, 1.0)
+    return normal, miter
+
+
+def offset_polyline(xy, offset):
+    """
+    중심선 xy (N x 2, UTM) 를 왼쪽으로 offset(m) 만큼 평행 이동한 선을 반환합니다.
+    offset 이 음수이면 오른쪽, 배열이면 점마다 다른 폭을 사용합니다.
+
+    곡률 반경보다 offset 이 큰 급커브 안쪽에서는 평행선이 접히면서 커스프(cusp)나 자기 교차가 생깁니다.
+    이런 점은 중심선까지의 거리가 |offset| 보다 가까워지므로, 중심선 KDTree 로 거리를 검사해 제거합니다.
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    offset = np.broadcast_to(np.asarray(offset, dtype=np.float64), (len(xy),))
+    keep = distinct_mask(xy)
+    xy, offset = xy[keep], offset[keep]
+    if len(xy) < 2:
+        return xy.copy()
+
+    normal, miter = vertex_normals(xy)
+    shifted = xy + normal * (offset * miter)[:, None]
+
+    # 중심선을 촘촘하게 나눈 점들로 KDTree 를 만들어 접힌 점을 찾음
+    # 경로가 자기 자신 옆을 다시 지나가는 경우 (왕복 차로 등)는 접힘이 아니므로
+    # 호 길이 기준으로 가까운 구간 (window) 안의 중심선만 검사함
+    width = np.abs(offset)
+    spacing = max(float(width.min()) * 0.05, 0.02)
+    dense, dense_s = densify(xy, spacing)
+    vertex_s = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(xy, axis=0).T))])
+    window = 4.0 * width
+
+    neighbours = cKDTree(dense).query_ball_point(shifted, r=np.maximum(width - 2 * spacing, 0.0))
+    counts = np.fromiter((len(n) for n in neighbours), dtype=np.int64, count=len(neighbours))
+    folded = np.zeros(len(xy), dtype=bool)
+    if counts.sum():
+        owner = np.repeat(np.arange(len(xy)), counts)
+        hits = np.concatenate([np.asarray(n, dtype=np.int64) for n in neighbours if n])
+        local = np.abs(dense_s[hits] - vertex_s[owner]) < window[owner]
+        folded[np.unique(owner[local])] = True
+    folded[[0, -1]] = False
+    return shifted[~folded]
+
+
+def boundary_frame(xy, zone):
+    """
+    UTM 좌표 배열을 lane map 형식의 DataFrame 으로 만듭니다.
+    """
+    latitude, longitude = utm_to_latlon(xy[:, 0], xy[:, 1], zone)
+    return pd.DataFrame({
+        'latitude': latitude,
+        'longitude': longitude,
+        'utm_easting': xy[:, 0],
+        'utm_northing': xy[:, 1],
+        'utm_zone_number': zone,
+    })
+
+
+def generate_lane_boundaries(df, left_width, right_width=None):
+    """
+    중심선 DataFrame 으로부터 왼쪽/오른쪽 차선 경계를 생성합니다.
+
+    Parameters:
+    - df: 표준 컬럼을 가진 중심선 DataFrame
+    - left_width: 중심선에서 왼쪽 경계까지의 거리 (m, 스칼라 또는 점별 배열)
+    - right_width: 오른쪽 경계까지의 거리 (m). None 이면 left_width 와 동일
+
+    Returns:
+    - (left_df, right_df) lane map 형식의 DataFrame
+    """
+    if right_width is None:
+        right_width = left_width
+    valid = valid_mask(df)
+    xy = df.loc[valid, ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+    left_width = np.asarray(left_width, dtype=np.float64)
+    right_width = np.asarray(right_width, dtype=np.float64)
+    if left_width.ndim:
+        left_width = left_width[valid]
+    if right_width.ndim:
+        right_width = right_width[valid]
+
+    zone = df['utm_zone_number'].iloc[0]
+    left = offset_polyline(xy, left_width)
+    right = offset_polyline(xy, -right_width)
+    return boundary_frame(left, zone), boundary_frame(right, zone)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="중심선 웨이포인트로부터 좌/우 차선 경계 생성")
+    parser.add_argument('input', help="중심선 CSV 파일")
+    parser.add_argument('--width', type=float, default=3.5, help="차선 전체 폭 (m)")
+    parser.add_argument('--left', type=float, default=None, help="왼쪽 경계까지 거리 (m)")
+    parser.add_argument('--right', type=float, default=None, help="오른쪽 경계까지 거리 (m)")
+    parser.add_argument('--width-column', default=None, help="점별 전체 폭이 들어있는 컬럼 이름")
+    parser.add_argument('--output-dir', default=None, help="출력 디렉토리 (기본: 입력 파일 위치)")
+    parser.add_argument('--combined', action='store_true', help="좌/우 경계를 하나의 파일(lane_LR)로도 저장")
+    args = parser.parse_args()
+
+    df = read_track(args.input)
+    if args.width_column:
+        half = df[args.width_column].to_numpy(dtype=np.float64) / 2.0
+        left_width = right_width = half
+    else:
+        left_width = args.left if args.left is not None else args.width / 2.0
+        right_width = args.right if args.right is not None else args.width / 2.0
+
+    left_df, right_df = generate_lane_boundaries(df, left_width, right_width)
+
+    output_dir = args.output_dir or os.path.dirname(args.input)
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    name = os.path.splitext(os.path.basename(args.input))[0]
+    outputs = {
+        f'lane_L_{name}.csv': left_df,
+        f'lane_R_{name}.csv': right_df,
+    }
+    if args.combined:
+        outputs[f'lane_LR_{name}.csv'] = pd.concat([left_df, right_df], ignore_index=True)
+    for filename, out in outputs.items():
+        output_path = os.path.join(output_dir, filename)
+        write_track(out, output_path, 'lane')
+        print(f"Saved {len(out)} points to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
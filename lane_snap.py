@@ -0,0 +1,95 @@
+import os
+import argparse
+import numpy as np
+
+from track_io import read_track, write_track, utm_to_latlon, valid_mask, list_csv_files
+from spatial_index import SegmentIndex, split_chains
+from track_compact import CompactTrack
+
+DEFAULT_LANE_MAP = 'mando_contest/lane_map/last_mando_lane_map_v1.csv'
+
+
+def lane_index(df, max_gap=5.0, compact=False):
+    """
+    lane map DataFrame 의 구간 인덱스를 만듭니다. 간격이 max_gap(m) 보다 큰 곳에서 차선을 나눕니다.
+    compact 이면 원점 기준 float32 좌표로 인덱스를 만들어 구간 배열 메모리를 절반으로 줄입니다 (track_compact).
+    """
+    if valid_mask(df).sum() < 2:
+        raise ValueError("lane map 에는 최소 두 개 이상의 포인트가 있어야 합니다.")
+    if compact:
+        return CompactTrack.from_frame(df, exact=False).index(max_gap)
+    xy = df.loc[valid_mask(df), ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+    return SegmentIndex(xy, split_chains(xy, max_gap))
+
+
+def snap_to_lane(df, index, max_distance=0.5, indices=None):
+    """
+    점들을 가장 가까운 lane map 구간 위로 옮깁니다 (사영점). max_distance(m) 보다 먼 점은 그대로 둡니다.
+    indices 가 주어지면 해당 행만 대상으로 하며, 위도/경도도 옮긴 행만 다시 계산합니다.
+    원본은 변경하지 않고 새 DataFrame 을 반환합니다.
+
+    Returns:
+    - (새 DataFrame, 행별 이동 거리 배열 (m, 옮기지 않은 행은 NaN))
+    """
+    df = df.copy()
+    moved = np.full(len(df), np.nan)
+    rows = np.flatnonzero(valid_mask(df))
+    if indices is not None:
+        rows = np.intersect1d(rows, np.asarray(list(indices), dtype=np.int64))
+    if rows.size == 0:
+        return df, moved
+
+    xy = df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows]
+    match = index.nearest(xy, max_distance)
+    near = match['segment'] >= 0
+    rows, points = rows[near], match['proj'][near]
+    if rows.size == 0:
+        return df, moved
+
+    zone = df['utm_zone_number'].iloc[rows[0]]
+    latitude, longitude = utm_to_latlon(points[:, 0], points[:, 1], zone)
+
+    col = df.columns.get_loc
+    df.iloc[rows, col('utm_easting')] = points[:, 0]
+    df.iloc[rows, col('utm_northing')] = points[:, 1]
+    df.iloc[rows, col('latitude')] = latitude
+    df.iloc[rows, col('longitude')] = longitude
+    moved[rows] = match['distance'][near]
+    return df, moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="웨이포인트를 가장 가까운 lane map 구간 위로 옮김")
+    parser.add_argument('inputs', nargs='+', help="웨이포인트 CSV 파일 또는 디렉토리")
+    parser.add_argument('-m', '--map', default=DEFAULT_LANE_MAP, help="lane map CSV")
+    parser.add_argument('--max-distance', type=float, default=0.5, help="이보다 먼 점은 옮기지 않음 (m)")
+    parser.add_argument('--output-dir', default=None, help="출력 디렉토리 (기본: 입력 파일 위치에 snapped_ 접두사)")
+    args = parser.parse_args()
+
+    index = lane_index(read_track(args.map))
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    if args.output_dir and not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    for path in paths:
+        source = read_track(path)
+        df, moved = snap_to_lane(source, index, args.max_distance)
+        if args.output_dir:
+            output_path = os.path.join(args.output_dir, os.path.basename(path))
+        else:
+            output_path = os.path.join(os.path.dirname(path), f"snapped_{os.path.basename(path)}")
+        write_track(df, output_path)
+        snapped = moved[~np.isnan(moved)]
+        print(
+            f"{path}: snapped {len(snapped)} of {int(valid_mask(source).sum())} points"
+            + (f", moved mean {snapped.mean() * 100:.1f} / max {snapped.max() * 100:.1f} cm" if len(snapped) else "")
+            + f", saved as {output_path}"
+        )
+
+
+if __name__ == "__main__":
+    main()
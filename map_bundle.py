@@ -0,0 +1,288 @@
+import os
+import json
+import math
+import mmap
+import time
+import struct
+import argparse
+import numpy as np
+import pandas as pd
+import scipy
+
+from track_io import read_track, write_track, valid_mask, list_csv_files
+from track_geometry import GEOMETRY_COLUMNS, add_geometry_columns
+from spatial_index import SegmentIndex, split_chains
+from lane_snap import DEFAULT_LANE_MAP
+
+# 번들 파일 구조
+# - 헤더 (24 바이트): magic, 형식 버전, 목차 위치, 목차 길이
+# - 배열 블록: 각 배열은 ALIGN 바이트 경계에서 시작하는 연속 메모리 (리틀 엔디언)
+# - 목차 (JSON): 트랙 목록과 트랙별 컬럼 정보, 배열 이름별 (dtype, shape, 위치), 인덱스 스칼라 값
+MAGIC = b'WPBUNDLE'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIQI')
+ALIGN = 64
+
+
+def _column_arrays(df):
+    """
+    DataFrame 컬럼을 저장용 배열로 바꿉니다. 숫자 컬럼은 dtype 그대로, 문자열 컬럼은 UTF-8 고정 길이
+    바이트 배열과 빈 값 마스크로 저장합니다.
+
+    Returns:
+    - (컬럼 정보 목록, 배열 dict)
+    """
+    specs, arrays = [], {}
+    for number, name in enumerate(df.columns):
+        values = df[name]
+        key = f'columns/{number}'
+        if values.dtype.kind in 'biuf':
+            specs.append({'name': name, 'kind': 'number'})
+            arrays[key] = values.to_numpy()
+        else:
+            missing = values.isna().to_numpy()
+            text = [str(v).encode('utf-8') if not m else b'' for v, m in zip(values, missing)]
+            specs.append({'name': name, 'kind': 'text'})
+            arrays[key] = np.array(text, dtype=bytes) if text else np.empty(0, dtype='S1')
+            arrays[key + '/missing'] = missing
+    return specs, arrays
+
+
+def _track_entry(path, max_gap):
+    # 트랙 하나의 컬럼, 기하 정보 컬럼, 구간 인덱스를 배열로 준비
+    df = read_track(path)
+    specs, arrays = _column_arrays(df)
+    geometry = add_geometry_columns(df)
+    for name in GEOMETRY_COLUMNS:
+        arrays[f'geometry/{name}'] = geometry[name].to_numpy(dtype=np.float64)
+    rows = np.flatnonzero(valid_mask(df))
+    xy = df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows]
+    arrays['rows'] = rows
+    state, scalars = SegmentIndex(xy, split_chains(xy, max_gap)).state()
+    arrays.update({f'index/{name}': value for name, value in state.items()})
+    entry = {
+        'name': os.path.relpath(path),
+        'dialect': df.attrs.get('dialect', 'lane'),
+        'length': len(df),
+        'points': len(rows),
+        'columns': specs,
+        'index': scalars,
+    }
+    return entry, arrays
+
+
+def compile_bundle(lane_map_path, route_paths, output_path, max_gap=5.0):
+    """
+    lane map 과 웨이포인트 경로 파일들을 하나의 번들 파일로 묶습니다.
+    트랙마다 원본 컬럼, 기하 정보 컬럼 (heading 등), 좌표 행 번호, 구간 인덱스 (KDTree 포함) 를 저장합니다.
+    임시 파일에 모두 쓴 뒤 바꿔 넣으므로 중간에 실패해도 기존 번들 (다른 프로세스가 mmap 중일 수 있음) 은 그대로입니다.
+
+    Returns:
+    - 목차 dict
+    """
+    tracks = [(True, lane_map_path)] + [(False, path) for path in route_paths]
+    directory = {'version': FORMAT_VERSION, 'scipy': scipy.__version__, 'max_gap': max_gap,
+                 'lane_map': None, 'routes': []}
+
+    temp = output_path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(b'\0' * ALIGN)
+        for is_lane_map, path in tracks:
+            entry, arrays = _track_entry(path, max_gap)
+            entry['arrays'] = {}
+            if is_lane_map:
+                directory['lane_map'] = entry
+            else:
+                directory['routes'].append(entry)
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                if array.dtype.byteorder == '>':
+                    array = array.astype(array.dtype.newbyteorder('<'))
+                offset = f.tell()
+                f.write(array.tobytes())
+                f.write(b'\0' * (-f.tell() % ALIGN))
+                entry['arrays'][name] = [array.dtype.str, list(array.shape), offset]
+
+        encoded = json.dumps(directory, ensure_ascii=False).encode('utf-8')
+        offset = f.tell()
+        f.write(encoded)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, offset, len(encoded)))
+    os.replace(temp, output_path)
+    return directory
+
+
+class MapBundle:
+    """
+    번들 파일을 mmap 으로 열어 배열을 복사 없이 사용합니다. 목차 (JSON) 만 읽고,
+    각 배열은 처음 요청할 때 파일 위의 읽기 전용 numpy 뷰로 만들어집니다.
+
+    - index(name): 구간 인덱스 (SegmentIndex, KDTree 를 다시 만들지 않음). name 이 None 이면 lane map.
+      번들을 만든 scipy 버전이 지금과 다르면 KDTree 만 저장된 조각 중점으로 다시 만듭니다.
+    - geometry(name): 기하 정보 컬럼 dict, rows(name): 인덱스 점에 해당하는 원래 행 번호
+    - frame(name): 원래 컬럼을 갖춘 표준 DataFrame (write_track 으로 원래 CSV 형식 저장)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, offset, length = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} 는 번들 파일이 아닙니다.")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"지원하지 않는 번들 형식 버전입니다: {version} (지원: {FORMAT_VERSION})")
+            self.directory = json.loads(self._mmap[offset:offset + length].decode('utf-8'))
+        except Exception:
+            self._file.close()
+            raise
+        self.tracks = {entry['name']: entry for entry in self.directory['routes']}
+        self.lane_map = self.directory['lane_map']
+        self.routes = list(self.tracks)
+        self._indexes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._indexes = {}
+        self._mmap = None
+        self._file.close()
+
+    def _entry(self, name):
+        if name is None:
+            return self.lane_map
+        if name not in self.tracks:
+            raise KeyError(f"번들에 '{name}' 경로가 없습니다.")
+        return self.tracks[name]
+
+    def array(self, name, key):
+        """
+        트랙 name 의 배열 key (예: 'geometry/heading') 를 파일 위의 읽기 전용 뷰로 반환합니다.
+        """
+        dtype, shape, offset = self._entry(name)['arrays'][key]
+        return np.frombuffer(self._mmap, dtype=dtype, count=math.prod(shape), offset=offset).reshape(shape)
+
+    def _arrays(self, name, group):
+        prefix = group + '/'
+        return {key[len(prefix):]: self.array(name, key)
+                for key in self._entry(name)['arrays'] if key.startswith(prefix)}
+
+    def index(self, name=None):
+        if name not in self._indexes:
+            self._indexes[name] = SegmentIndex.from_state(
+                self._arrays(name, 'index'), self._entry(name)['index'],
+                rebuild_tree=self.directory['scipy'] != scipy.__version__,
+            )
+        return self._indexes[name]
+
+    def rows(self, name=None):
+        return self.array(name, 'rows')
+
+    def geometry(self, name=None):
+        return self._arrays(name, 'geometry')
+
+    def frame(self, name=None, geometry=False):
+        entry = self._entry(name)
+        data = {}
+        for number, spec in enumerate(entry['columns']):
+            values = self.array(name, f'columns/{number}')
+            if spec['kind'] == 'text':
+                missing = self.array(name, f'columns/{number}/missing')
+                values = np.char.decode(values, 'utf-8').astype(object)
+                values[missing] = np.nan
+            data[spec['name']] = values
+        df = pd.DataFrame(data, columns=[spec['name'] for spec in entry['columns']])
+        if geometry:
+            for key, values in self.geometry(name).items():
+                df[key] = values
+        df.attrs['dialect'] = entry['dialect']
+        return df
+
+
+def extract_bundle(bundle, output_dir):
+    """
+    번들의 모든 트랙을 원래 CSV 형식으로 output_dir 아래 원래 상대 경로에 저장합니다.
+    """
+    paths = []
+    for name, entry in [(None, bundle.lane_map)] + list(bundle.tracks.items()):
+        relative = entry['name']
+        if os.path.isabs(relative) or relative.startswith('..'):
+            relative = os.path.basename(relative)
+        path = os.path.join(output_dir, relative)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        write_track(bundle.frame(name), path, entry['dialect'])
+        paths.append(path)
+    return paths
+
+
+def startup_csv(lane_map_path, route_paths, max_gap=5.0):
+    # 지금 차량에서 하는 시작 과정: CSV 파싱, 기하 정보 계산, 구간 인덱스 생성
+    tracks = []
+    for path in [lane_map_path] + list(route_paths):
+        df = add_geometry_columns(read_track(path))
+        xy = df.loc[valid_mask(df), ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+        tracks.append((df, SegmentIndex(xy, split_chains(xy, max_gap))))
+    return tracks
+
+
+def startup_bundle(path):
+    # 번들 시작 과정: mmap 으로 열고 모든 인덱스와 기하 정보 뷰 준비
+    bundle = MapBundle(path)
+    tracks = [(bundle.geometry(name), bundle.index(name)) for name in [None] + bundle.routes]
+    return bundle, tracks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="lane map 과 웨이포인트 경로를 미리 만든 인덱스와 함께 하나의 번들 파일로 묶음")
+    parser.add_argument('command', choices=['compile', 'info', 'extract', 'benchmark'],
+                        help="compile: 번들 생성, info: 내용 출력, extract: CSV 로 되돌림, benchmark: 시작 시간 비교")
+    parser.add_argument('bundle', help="번들 파일 경로")
+    parser.add_argument('routes', nargs='*', help="웨이포인트 CSV 파일 또는 디렉토리 (compile, benchmark)")
+    parser.add_argument('-m', '--map', default=DEFAULT_LANE_MAP, help="lane map CSV (compile, benchmark)")
+    parser.add_argument('--max-gap', type=float, default=5.0, help="폴리라인을 나누는 점 간격 (m)")
+    parser.add_argument('-o', '--output-dir', default='bundle_extract', help="extract 출력 디렉토리")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.routes:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    if args.command == 'compile':
+        start = time.perf_counter()
+        directory = compile_bundle(args.map, paths, args.bundle, args.max_gap)
+        points = directory['lane_map']['points'] + sum(entry['points'] for entry in directory['routes'])
+        print(
+            f"Compiled lane map + {len(paths)} routes ({points} points) "
+            f"into {args.bundle} ({os.path.getsize(args.bundle) / 1024:.0f} KiB) in {time.perf_counter() - start:.2f} s"
+        )
+    elif args.command == 'info':
+        with MapBundle(args.bundle) as bundle:
+            print(f"{args.bundle}: format {bundle.directory['version']}, built with scipy {bundle.directory['scipy']}")
+            for entry in [bundle.lane_map] + list(bundle.tracks.values()):
+                print(f"  {entry['name']}: {entry['dialect']}, {entry['length']} rows, {entry['points']} points")
+    elif args.command == 'extract':
+        with MapBundle(args.bundle) as bundle:
+            written = extract_bundle(bundle, args.output_dir)
+        print(f"Extracted {len(written)} CSV files into {args.output_dir}")
+    else:
+        start = time.perf_counter()
+        startup_csv(args.map, paths, args.max_gap)
+        csv_time = time.perf_counter() - start
+        compile_bundle(args.map, paths, args.bundle, args.max_gap)
+        times = []
+        for _ in range(5):
+            start = time.perf_counter()
+            bundle, _ = startup_bundle(args.bundle)
+            times.append(time.perf_counter() - start)
+            bundle.close()
+        print(f"Startup for lane map + {len(paths)} routes: CSV {csv_time * 1000:.1f} ms, "
+              f"bundle {min(times) * 1000:.2f} ms (best of 5)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import os
+import argparse
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from track_io import read_track, normalize_track, to_dialect, valid_mask, list_csv_files
+from spatial_index import SegmentIndex, split_chains
+
+# 주행 기록 파일을 읽는 단위 (행 수)
+CHUNK_ROWS = 2000
+# 후보를 한 번에 구하는 위치 개수 (KDTree 검색 결과 목록의 메모리 제한)
+BLOCK = 256
+
+MATCH_COLUMNS = ['matched_index', 'matched_lane', 'matched_s', 'offset']
+
+
+class MapMatcher:
+    """
+    주행 기록을 lane map 에 맞추는 HMM (Viterbi) 맵 매칭기입니다.
+
+    - 상태: 각 위치에서 radius(m) 안에 있는 lane map 구간 (가까운 순 최대 max_candidates 개)
+    - 관측 확률: 사영 거리 d 에 대한 정규 분포, log p = -0.5 (d / sigma)^2
+    - 전이 확률: 두 위치 사이 직선 거리와 두 후보 사이 경로 거리의 차이에 대한 지수 분포,
+      log p = -|직선 거리 - 경로 거리| / beta
+      같은 차선 (폴리라인) 안에서는 경로 거리 = 진행 방향 누적 거리 차이 (backtrack(m) 보다 많이 뒤로 가면 불가),
+      다른 차선으로 넘어가면 사영점 사이 거리 + lane_change_penalty(m)
+
+    feed() 로 위치를 조금씩 넣으면 모든 후보 경로가 하나로 합쳐진 (결정된) 위치까지만 결과를 내보내고
+    그 이전 이력은 버리므로, 긴 기록도 메모리가 max_lag 개 위치 분량을 넘지 않습니다.
+    max_lag 동안 합쳐지지 않으면 현재 가장 좋은 경로로 앞쪽 절반을 확정합니다.
+    """
+
+    def __init__(self, map_xy, breaks=None, sigma=1.0, beta=2.0, radius=5.0, max_candidates=8,
+                 lane_change_penalty=2.0, backtrack=1.0, max_lag=200):
+        self.index = SegmentIndex(map_xy, breaks)
+        self.chain = np.cumsum(self.index.breaks) - 1  # 점별 차선 (폴리라인) 번호
+        self.sigma = sigma
+        self.beta = beta
+        self.radius = radius
+        self.max_candidates = max_candidates
+        self.lane_change_penalty = lane_change_penalty
+        self.backtrack = backtrack
+        self.max_lag = max_lag
+        self.rows = np.arange(len(self.index.xy))  # 점 번호 -> 결과에 쓸 행 번호
+        self.reset()
+
+    @classmethod
+    def from_track(cls, df, max_gap=5.0, **params):
+        """
+        lane map DataFrame 으로 매칭기를 만듭니다. 간격이 max_gap(m) 보다 큰 곳에서 차선을 나눕니다.
+        결과의 matched_index 는 DataFrame 의 행 번호입니다.
+        """
+        rows = np.flatnonzero(valid_mask(df))
+        xy = df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows]
+        matcher = cls(xy, split_chains(xy, max_gap), **params)
+        matcher.rows = rows
+        return matcher
+
+    def reset(self):
+        self.history = []  # 결정되지 않은 위치별 (후보 정보, 이전 위치 후보로의 역추적 번호)
+        self.score = None
+        self.previous_xy = None
+
+    def candidates(self, xy):
+        """
+        위치 배열의 후보 구간을 한 번에 구합니다.
+
+        Returns:
+        - 위치별 dict 목록: segment, t, distance, side, s, chain, proj (가까운 순)
+        """
+        index = self.index
+        pieces = index.tree.query_ball_point(xy, self.radius + index.piece_half)
+        counts = np.array([len(p) for p in pieces])
+        if counts.sum() == 0:
+            return [None] * len(xy)
+        fix = np.repeat(np.arange(len(xy)), counts)
+        segment = index.piece_owner[np.concatenate(pieces).astype(np.int64)]
+        pair = np.unique(fix * len(index) + segment)
+        fix, segment = pair // len(index), pair % len(index)
+        t, proj, distance = index.project(xy[fix], segment)
+        near = distance <= self.radius
+        fix, segment, t, proj, distance = fix[near], segment[near], t[near], proj[near], distance[near]
+
+        order = np.lexsort((distance, fix))
+        fix, segment, t, proj, distance = fix[order], segment[order], t[order], proj[order], distance[order]
+        rel = xy[fix] - index.a[segment]
+        cross = index.d[segment, 0] * rel[:, 1] - index.d[segment, 1] * rel[:, 0]
+        start = index.segment_start[segment]
+        s = index.arc_length[start] + t * index.length[segment]
+
+        result = [None] * len(xy)
+        bounds = np.searchsorted(fix, np.arange(len(xy) + 1))
+        for i in range(len(xy)):
+            first, last = bounds[i], min(bounds[i + 1], bounds[i] + self.max_candidates)
+            if first == last:
+                continue
+            part = slice(first, last)
+            result[i] = {
+                'segment': segment[part], 't': t[part], 'distance': distance[part],
+                'side': np.where(cross[part] >= 0, 1.0, -1.0), 's': s[part],
+                'chain': self.chain[start[part]], 'proj': proj[part],
+            }
+        return result
+
+    def _transition(self, previous, current, step):
+        # log 전이 확률 행렬 (이전 후보 x 현재 후보)
+        same = previous['chain'][:, None] == current['chain'][None, :]
+        along = current['s'][None, :] - previous['s'][:, None]
+        across = np.hypot(
+            current['proj'][None, :, 0] - previous['proj'][:, None, 0],
+            current['proj'][None, :, 1] - previous['proj'][:, None, 1],
+        ) + self.lane_change_penalty
+        route = np.where(same, np.abs(along), across)
+        route = np.where(same & (along < -self.backtrack), np.inf, route)
+        return -np.abs(step - route) / self.beta
+
+    def _backtrack(self, k, state):
+        # 이력 위치 k 의 후보 state 에서 이력 맨 앞까지 역추적한 위치별 후보 번호
+        states = [state]
+        for j in range(k, 0, -1):
+            state = self.history[j][1][state]
+            states.append(state)
+        return states[::-1]
+
+    def _emit(self, states):
+        # 이력 앞쪽 len(states) 개 위치를 주어진 후보로 확정하고 이력에서 제거
+        decided = []
+        for (candidate, _), j in zip(self.history, states):
+            decided.append((
+                int(self.rows[self.index.segment_start[candidate['segment'][j]] + (candidate['t'][j] > 0.5)]),
+                int(candidate['chain'][j]), float(candidate['s'][j]),
+                float(candidate['side'][j] * candidate['distance'][j]),
+            ))
+        del self.history[:len(states)]
+        if self.history:
+            # 남은 첫 위치의 이전 후보는 확정되었으므로 역추적은 여기서 끝남
+            self.history[0] = (self.history[0][0], None)
+        return decided
+
+    def _converged(self):
+        # 현재 모든 후보의 역추적 경로가 하나로 합쳐지는 가장 늦은 이력 위치와 그 후보
+        states = set(range(len(self.score)))
+        for k in range(len(self.history) - 1, 0, -1):
+            back = self.history[k][1]
+            states = {back[j] for j in states}
+            if len(states) == 1:
+                return k - 1, states.pop()
+        return None
+
+    def _flush_all(self):
+        if not self.history:
+            return []
+        decided = self._emit(self._backtrack(len(self.history) - 1, int(np.argmax(self.score))))
+        self.score = None
+        return decided
+
+    def feed(self, xy):
+        """
+        위치 배열 (N x 2, UTM, 시간 순서)을 넣고 결정된 위치들의 결과를 순서대로 반환합니다.
+        후보가 없는 위치는 (-1, -1, nan, nan) 이며 그 앞뒤는 따로 매칭합니다.
+
+        Returns:
+        - [(matched_index, matched_lane, matched_s, offset), ...]
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        decided = []
+        for first in range(0, len(xy), BLOCK):
+            block = xy[first:first + BLOCK]
+            for point, candidate in zip(block, self.candidates(block)):
+                decided.extend(self._step(point, candidate))
+        return decided
+
+    def _step(self, point, candidate):
+        # 위치 하나를 Viterbi 로 진행하고 새로 확정된 결과를 반환
+        decided = []
+        if candidate is None:
+            decided.extend(self._flush_all())
+            decided.append((-1, -1, np.nan, np.nan))
+            self.previous_xy = None
+            return decided
+
+        emission = -0.5 * (candidate['distance'] / self.sigma) ** 2
+        if self.score is None:
+            self.score = emission
+            self.history.append((candidate, None))
+        else:
+            step = float(np.hypot(*(point - self.previous_xy)))
+            total = self.score[:, None] + self._transition(self.history[-1][0], candidate, step)
+            back = np.argmax(total, axis=0)
+            best = total[back, np.arange(len(back))]
+            if not np.isfinite(best).any():
+                # 이어질 수 있는 후보가 없으면 (차선 밖으로 점프 등) 여기서 끊고 새로 시작
+                decided.extend(self._flush_all())
+                self.score = emission
+                self.history.append((candidate, None))
+            else:
+                self.score = best + emission
+                self.score -= self.score.max()  # 긴 기록에서 값이 계속 작아지지 않도록 정규화
+                self.history.append((candidate, back.tolist()))
+        self.previous_xy = point
+
+        converged = self._converged() if len(self.history) > 1 else None
+        if converged is not None:
+            # 합쳐진 위치까지는 어떤 후보로 끝나든 같은 경로이므로 확정
+            decided.extend(self._emit(self._backtrack(*converged)))
+        elif len(self.history) > self.max_lag:
+            states = self._backtrack(len(self.history) - 1, int(np.argmax(self.score)))
+            decided.extend(self._emit(states[:len(states) // 2]))
+        return decided
+
+    def finish(self):
+        """
+        남은 위치를 현재 가장 좋은 경로로 확정하고 상태를 초기화합니다.
+        """
+        decided = self._flush_all()
+        self.reset()
+        return decided
+
+
+def match_file(path, matcher, output_path, chunk_rows=CHUNK_ROWS):
+    """
+    주행 기록 파일을 chunk_rows 행씩 읽어 매칭하고, 결정된 행부터 출력 파일에 이어 씁니다.
+    좌표가 없는 행은 매칭하지 않고 (-1) 그대로 씁니다.
+
+    Returns:
+    - 요약 dict: fixes, matched, mean_abs_offset, lanes (사용한 차선 번호 목록)
+    """
+    pending = deque()  # 결과를 기다리는 입력 행 (결정이 늦어지는 max_lag 분량까지만 쌓임)
+    results = deque()
+    written = False
+    summary = {'fixes': 0, 'matched': 0, 'offset_sum': 0.0, 'lanes': set()}
+
+    def write_ready():
+        nonlocal written
+        # 입력 행 순서대로, 결과가 나온 만큼만 씀
+        ready = []
+        while pending and (results or not pending[0][1]):
+            row, has_xy = pending.popleft()
+            match = results.popleft() if has_xy else (-1, -1, np.nan, np.nan)
+            ready.append(list(row) + list(match))
+            if match[0] >= 0:
+                summary['matched'] += 1
+                summary['offset_sum'] += abs(match[3])
+                summary['lanes'].add(match[1])
+        if ready:
+            frame = pd.DataFrame(ready, columns=list(columns) + MATCH_COLUMNS)
+            frame.to_csv(output_path, mode='a' if written else 'w', header=not written, index=False)
+            written = True
+
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        chunk = normalize_track(chunk)
+        dialect = chunk.attrs['dialect']
+        out = to_dialect(chunk, 'waypoint' if dialect == 'waypoint' else 'lane')
+        columns = out.columns
+        valid = valid_mask(chunk)
+        summary['fixes'] += int(valid.sum())
+        pending.extend(zip(out.itertuples(index=False, name=None), valid.tolist()))
+        results.extend(matcher.feed(chunk.loc[valid, ['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)))
+        write_ready()
+    results.extend(matcher.finish())
+    write_ready()
+
+    return {
+        'fixes': summary['fixes'],
+        'matched': summary['matched'],
+        'mean_abs_offset': summary['offset_sum'] / summary['matched'] if summary['matched'] else 0.0,
+        'lanes': sorted(summary['lanes']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주행 기록을 lane map 에 HMM 맵 매칭")
+    parser.add_argument('inputs', nargs='+', help="주행 기록 CSV 파일 또는 디렉토리")
+    parser.add_argument('-m', '--map', default='mando_contest/lane_map/last_mando_lane_map_v1.csv', help="lane map CSV")
+    parser.add_argument('--sigma', type=float, default=1.0, help="GPS 위치 오차 표준편차 (m)")
+    parser.add_argument('--beta', type=float, default=2.0, help="전이 거리 차이 척도 (m)")
+    parser.add_argument('--radius', type=float, default=5.0, help="후보 검색 반경 (m)")
+    parser.add_argument('--lane-change-penalty', type=float, default=2.0, help="차선 변경 추가 거리 (m)")
+    parser.add_argument('--output-dir', default=None, help="출력 디렉토리 (기본: 입력 파일 위치에 matched_ 접두사)")
+    args = parser.parse_args()
+
+    matcher = MapMatcher.from_track(
+        read_track(args.map), sigma=args.sigma, beta=args.beta, radius=args.radius,
+        lane_change_penalty=args.lane_change_penalty
+    )
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    if args.output_dir and not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    for path in paths:
+        if args.output_dir:
+            output_path = os.path.join(args.output_dir, os.path.basename(path))
+        else:
+            output_path = os.path.join(os.path.dirname(path), f"matched_{os.path.basename(path)}")
+        summary = match_file(path, matcher, output_path)
+        print(
+            f"{path}: {summary['matched']} / {summary['fixes']} fixes matched, "
+            f"mean |offset| {summary['mean_abs_offset']:.2f} m, lanes {summary['lanes']}, saved as {output_path}"
+        )
+
+
+if __name__ == "__main__":
+    main()
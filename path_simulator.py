@@ -0,0 +1,252 @@
+import os
+import math
+import time
+import argparse
+from bisect import bisect_right
+from multiprocessing import Pool
+import numpy as np
+
+from track_io import read_track, valid_mask, list_csv_files
+from track_geometry import distinct_mask
+from route_query import RouteQuery
+from route_tracker import RouteTracker
+from speed_profile import speed_profile, CUSP_TURN_DEG
+
+# 차량 / 제어기 기본값
+DEFAULT_PARAMS = {
+    'wheelbase': 2.7,         # 축간 거리 (m)
+    'max_steer': 30.0,        # 최대 조향각 (deg)
+    'max_speed': 2.0,         # 최대 속도 (m/s)
+    'min_speed': 0.3,         # 최저 속도 (m/s). 목표 속도가 0 인 끝점/전환점에서도 멈추지 않고 도달하도록
+    'min_lookahead': 1.5,     # 최소 전방 주시 거리 (m)
+    'lookahead_gain': 0.5,    # 전방 주시 거리 = min_lookahead + lookahead_gain * 속도
+    'dt': 0.02,               # 시뮬레이션 주기 (s)
+    'max_error': 0.3,         # 이보다 큰 횡방향 오차를 실패 지점으로 기록 (m)
+    'lost_distance': 3.0,     # 이보다 멀어지면 경로 이탈로 보고 그 구간 주행을 중단 (m)
+    'goal_tolerance': 0.2,    # 구간 끝에서 이 거리 안에 오면 도달 (m)
+}
+
+
+def split_directions(xy):
+    """
+    주차 경로를 전/후진 전환점 (CUSP_TURN_DEG 이상 꺾이는 점)에서 나눕니다.
+    첫 구간은 전진, 이후 전환점마다 방향이 바뀐다고 봅니다.
+
+    Returns:
+    - [(점 배열, 전진 여부), ...] (전환점은 앞뒤 구간에 모두 포함)
+    """
+    xy = np.asarray(xy, dtype=np.float64)[distinct_mask(xy)]
+    if len(xy) < 3:
+        return [(xy, True)] if len(xy) == 2 else []
+    seg = np.diff(xy, axis=0)
+    heading = np.arctan2(seg[:, 1], seg[:, 0])
+    turn = np.degrees(np.abs((np.diff(heading) + np.pi) % (2 * np.pi) - np.pi))
+    cusps = np.flatnonzero(turn >= CUSP_TURN_DEG) + 1
+    bounds = [0] + cusps.tolist() + [len(xy) - 1]
+    return [
+        (xy[first:last + 1], k % 2 == 0)
+        for k, (first, last) in enumerate(zip(bounds[:-1], bounds[1:]))
+        if last > first
+    ]
+
+
+def simulate_leg(route, forward, pose, speed, params):
+    """
+    한 방향 구간을 기구학 자전거 모델 + pure pursuit 로 끝까지 주행합니다.
+    후진은 차량 방향을 180 도 돌린 가상 차량의 pure pursuit 로 계산하고 조향 부호를 바꿉니다.
+
+    Parameters:
+    - pose: 시작 자세 (x, y, yaw(rad)), 뒷바퀴 축 중심
+    - speed: 구간 누적 거리별 목표 속도 배열 (route.arc 의 각 점)
+
+    Returns:
+    - (마지막 자세, 기록 dict (s, x, y, cross_track, steer 요구값(deg), saturated 목록),
+      종료 사유 ('reached', 'lost', 'timeout'), 주행 시간(s))
+    """
+    wheelbase = params['wheelbase']
+    max_steer = math.radians(params['max_steer'])
+    dt = params['dt']
+    tracker = RouteTracker(route, ahead=params['min_lookahead'] + 2.0, max_distance=params['lost_distance'])
+    tracker.reset(0.0)
+    arc = route.arc.tolist()
+    speed = speed.tolist()
+    end_direction = route.index.d[-1] / route.index.length[-1]
+    x, y, yaw = pose
+    log = {'s': [], 'x': [], 'y': [], 'cross_track': [], 'steer': [], 'saturated': []}
+
+    # 구간 길이를 최저 속도로 세 번 달릴 시간이 지나도 도달하지 못하면 실패
+    time_limit = 3.0 * route.total_length / params['min_speed'] + 10.0
+    elapsed = 0.0
+    reason = 'timeout'
+    while elapsed < time_limit:
+        v = max(speed[min(bisect_right(arc, tracker.s), len(speed)) - 1], params['min_speed'])
+        lookahead = params['min_lookahead'] + params['lookahead_gain'] * v
+        heading = yaw if forward else yaw + math.pi
+        result = tracker.update(x, y, None, lookahead)
+        if result['distance'] > params['lost_distance']:
+            reason = 'lost'
+            break
+
+        lx, ly = result['lookahead']
+        beyond = result['s'] + lookahead - route.total_length
+        if beyond > 0.0:
+            # 끝점 근처에서는 주시점이 끝점에 붙어 조향이 커지므로 마지막 구간 방향으로 연장
+            lx += end_direction[0] * beyond
+            ly += end_direction[1] * beyond
+        chord = max(math.hypot(lx - x, ly - y), 1e-6)
+        alpha = math.atan2(ly - y, lx - x) - heading
+        demand = math.atan(2.0 * wheelbase * math.sin(alpha) / chord)
+        if not forward:
+            demand = -demand
+        steer = min(max(demand, -max_steer), max_steer)
+
+        log['s'].append(result['s'])
+        log['x'].append(x)
+        log['y'].append(y)
+        log['cross_track'].append(result['cross_track'])
+        log['steer'].append(math.degrees(demand))
+        log['saturated'].append(abs(demand) > max_steer)
+
+        if result['s'] >= route.total_length - params['goal_tolerance']:
+            reason = 'reached'
+            break
+
+        signed = v if forward else -v
+        x += signed * math.cos(yaw) * dt
+        y += signed * math.sin(yaw) * dt
+        yaw += signed / wheelbase * math.tan(steer) * dt
+        elapsed += dt
+    return (x, y, yaw), log, reason, elapsed
+
+
+def simulate_path(xy, **params):
+    """
+    웨이포인트 경로 (N x 2, UTM)를 처음부터 끝까지 모의 주행합니다.
+    차량은 첫 점에서 경로 방향으로 출발하며, 전/후진 구간 사이에서는 앞 구간의 마지막 자세를 이어받습니다.
+
+    Returns:
+    - 요약 dict: legs, length, sim_time, max_cross_track, rms_cross_track, saturation (조향 포화 비율),
+      max_steer_demand (deg), failures (실패 지점 목록), ok
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    legs = split_directions(xy)
+    if not legs:
+        raise ValueError("경로에는 서로 다른 점이 두 개 이상 있어야 합니다.")
+
+    first, forward = legs[0]
+    heading = math.atan2(first[1, 1] - first[0, 1], first[1, 0] - first[0, 0])
+    pose = (first[0, 0], first[0, 1], heading if forward else heading + math.pi)
+
+    cross_track, steer, saturated, failures = [], [], [], []
+    length = 0.0
+    sim_time = 0.0
+    ok = True
+    for number, (points, forward) in enumerate(legs):
+        route = RouteQuery(points)
+        speed = speed_profile(route.xy, max_speed=params['max_speed'])
+        pose, log, reason, elapsed = simulate_leg(route, forward, pose, speed, params)
+        sim_time += elapsed
+        cross_track.extend(log['cross_track'])
+        steer.extend(log['steer'])
+        saturated.extend(log['saturated'])
+
+        # 횡방향 오차가 max_error 를 넘는 연속 구간마다 가장 큰 지점 하나를 실패 지점으로 기록
+        error = np.abs(np.asarray(log['cross_track']))
+        over = np.concatenate([[False], error > params['max_error'], [False]])
+        edges = np.flatnonzero(np.diff(over.astype(np.int8)))
+        for start, end in zip(edges[::2], edges[1::2]):
+            peak = start + int(np.argmax(error[start:end]))
+            failures.append({
+                'leg': number, 'forward': forward, 'reason': 'cross_track', 's': length + log['s'][peak],
+                'x': log['x'][peak], 'y': log['y'][peak], 'cross_track': log['cross_track'][peak],
+            })
+        if reason != 'reached':
+            failures.append({
+                'leg': number, 'forward': forward, 'reason': reason,
+                's': length + (log['s'][-1] if log['s'] else 0.0), 'x': pose[0], 'y': pose[1],
+                'cross_track': log['cross_track'][-1] if log['cross_track'] else float('nan'),
+            })
+            ok = False
+            break
+        length += route.total_length
+
+    cross_track = np.abs(np.asarray(cross_track))
+    return {
+        'legs': len(legs),
+        'length': length,
+        'sim_time': sim_time,
+        'max_cross_track': float(cross_track.max()) if len(cross_track) else 0.0,
+        'rms_cross_track': float(np.sqrt(np.mean(cross_track ** 2))) if len(cross_track) else 0.0,
+        'saturation': float(np.mean(saturated)) if saturated else 0.0,
+        'max_steer_demand': float(np.abs(steer).max()) if steer else 0.0,
+        'failures': failures,
+        'ok': ok and not failures,
+    }
+
+
+def simulate_file(job):
+    """
+    Pool 작업 함수: (파일 경로, 파라미터 dict) 를 받아 (경로, 요약 또는 오류 메시지) 를 반환합니다.
+    """
+    path, params = job
+    try:
+        df = read_track(path)
+        xy = df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[valid_mask(df)]
+        return path, simulate_path(xy, **params)
+    except Exception as e:
+        return path, str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="웨이포인트 파일 모의 주행 (기구학 자전거 모델 + pure pursuit)")
+    parser.add_argument('inputs', nargs='+', help="웨이포인트 CSV 파일 또는 디렉토리 (P/, T/ 등)")
+    parser.add_argument('--wheelbase', type=float, default=DEFAULT_PARAMS['wheelbase'], help="축간 거리 (m)")
+    parser.add_argument('--max-steer', type=float, default=DEFAULT_PARAMS['max_steer'], help="최대 조향각 (deg)")
+    parser.add_argument('--max-speed', type=float, default=DEFAULT_PARAMS['max_speed'], help="최대 속도 (m/s)")
+    parser.add_argument('--min-lookahead', type=float, default=DEFAULT_PARAMS['min_lookahead'], help="최소 전방 주시 거리 (m)")
+    parser.add_argument('--lookahead-gain', type=float, default=DEFAULT_PARAMS['lookahead_gain'], help="속도 비례 전방 주시 계수 (s)")
+    parser.add_argument('--dt', type=float, default=DEFAULT_PARAMS['dt'], help="시뮬레이션 주기 (s)")
+    parser.add_argument('--max-error', type=float, default=DEFAULT_PARAMS['max_error'], help="허용 횡방향 오차 (m)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="동시에 실행할 프로세스 수 (기본: CPU 코어 수)")
+    args = parser.parse_args()
+
+    params = {
+        'wheelbase': args.wheelbase, 'max_steer': args.max_steer, 'max_speed': args.max_speed,
+        'min_lookahead': args.min_lookahead, 'lookahead_gain': args.lookahead_gain,
+        'dt': args.dt, 'max_error': args.max_error,
+    }
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    start = time.perf_counter()
+    sim_time = 0.0
+    failed = 0
+    with Pool(args.jobs) as pool:
+        for path, summary in pool.imap(simulate_file, [(path, params) for path in paths]):
+            if isinstance(summary, str):
+                print(f"{path}: error - {summary}")
+                failed += 1
+                continue
+            sim_time += summary['sim_time']
+            failed += not summary['ok']
+            print(
+                f"{path}: {'OK' if summary['ok'] else 'FAIL'}, {summary['legs']} legs, {summary['length']:.1f} m, "
+                f"max cross-track {summary['max_cross_track']:.3f} m (rms {summary['rms_cross_track']:.3f}), "
+                f"steer saturated {summary['saturation'] * 100:.1f}% (max demand {summary['max_steer_demand']:.1f} deg)"
+            )
+            for failure in summary['failures']:
+                print(
+                    f"  leg {failure['leg']} ({'forward' if failure['forward'] else 'reverse'}) {failure['reason']} "
+                    f"at s {failure['s']:.1f} m ({failure['x']:.2f}, {failure['y']:.2f}), "
+                    f"cross-track {failure['cross_track']:.3f} m"
+                )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(paths)} files, {failed} failed, {sim_time:.0f} s simulated in {elapsed:.1f} s "
+        f"({sim_time / elapsed:.0f}x real time)"
+    )
+
+
+if __name__ == "__main__":
+    main()
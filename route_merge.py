@@ -0,0 +1,237 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from track_io import read_track, write_track, utm_to_latlon, valid_mask, list_csv_files
+from track_geometry import arc_length, segment_lengths
+from spatial_index import SegmentIndex
+
+# 이음매 검사에 사용하는 앞/뒤 구간 길이 (m)
+SEAM_WINDOW = 20.0
+
+ROUTE_COLUMNS = ['latitude', 'longitude', 'utm_easting', 'utm_northing', 'utm_zone_number', 'option']
+
+
+def load_segments(paths):
+    """
+    구간 파일들을 읽어 좌표가 있는 행만 남긴 표준 DataFrame 목록을 반환합니다.
+    """
+    segments = []
+    for path in paths:
+        df = read_track(path)
+        df = df.loc[valid_mask(df)].reset_index(drop=True)
+        if 'option' not in df.columns:
+            df['option'] = 0
+        if len(df):
+            df = df[ROUTE_COLUMNS]
+            df.attrs['source'] = path
+            segments.append(df)
+    return segments
+
+
+def order_segments(segments, first=None):
+    """
+    구간 끝점들의 KDTree 로 가장 가까운 끝점을 따라가며 구간 순서와 방향을 정합니다.
+
+    Parameters:
+    - segments: 표준 DataFrame 목록
+    - first: 시작 구간 번호. None 이면 다른 구간과 가장 멀리 떨어진 끝점(열린 끝)에서 시작
+
+    Returns:
+    - [(구간 번호, 뒤집기 여부), ...]
+    """
+    xy = [seg[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64) for seg in segments]
+    # 끝점 번호 e: 구간 e // 2, e % 2 == 0 이면 시작점 / 1 이면 끝점
+    endpoints = np.array([p for seg in xy for p in (seg[0], seg[-1])])
+    owner = np.arange(len(endpoints)) // 2
+    tree = cKDTree(endpoints)
+    count = len(segments)
+
+    if count == 1:
+        return [(0, False)]
+
+    if first is None:
+        # 자기 구간을 제외한 가장 가까운 끝점까지의 거리가 가장 먼 끝점에서 시작
+        k = min(3, len(endpoints))
+        distance, neighbour = tree.query(endpoints, k=k)
+        distance = np.where(owner[neighbour] == owner[:, None], np.inf, distance).min(axis=1)
+        start = int(np.argmax(distance))
+        first, reverse = owner[start], bool(start % 2)
+    else:
+        reverse = False
+
+    order = [(int(first), reverse)]
+    used = np.zeros(count, dtype=bool)
+    used[first] = True
+    tail = xy[first][0] if reverse else xy[first][-1]
+
+    while len(order) < count:
+        k = 4
+        while True:
+            k = min(k, len(endpoints))
+            _, neighbour = tree.query(tail, k=k)
+            neighbour = np.atleast_1d(neighbour)
+            free = neighbour[~used[owner[neighbour]]]
+            if len(free) or k == len(endpoints):
+                break
+            k *= 2
+        nearest = int(free[0])
+        segment = int(owner[nearest])
+        # 가장 가까운 끝점이 구간의 끝점이면 뒤집어서 이어 붙임
+        reverse = bool(nearest % 2)
+        order.append((segment, reverse))
+        used[segment] = True
+        tail = xy[segment][0] if reverse else xy[segment][-1]
+    return order
+
+
+def heal_seam(prev_xy, next_xy, overlap_tol=0.3):
+    """
+    두 구간의 이음매에서 겹치는 부분을 잘라냅니다.
+
+    - 다음 구간의 앞부분이 이전 구간 위를 다시 지나가면 (overlap_tol 이내) 그 점들을 제거
+    - 이전 구간이 다음 구간의 시작점을 지나쳐 더 나아가 있으면 이전 구간의 꼬리를 제거
+
+    Returns:
+    - (이전 구간에서 남길 점 개수, 다음 구간에서 건너뛸 점 개수)
+    """
+    prev_s = arc_length(prev_xy)
+    tail_from = int(np.searchsorted(prev_s, prev_s[-1] - SEAM_WINDOW))
+    tail = prev_xy[tail_from:]
+    keep_prev = len(prev_xy)
+    skip_next = 0
+
+    if len(tail) >= 2:
+        next_s = arc_length(next_xy)
+        head = next_xy[:int(np.searchsorted(next_s, SEAM_WINDOW)) + 1]
+        index = SegmentIndex(tail)
+        match = index.nearest(head)
+        # 같은 방향으로 겹칠 때만 중복으로 봄 (주차 경로처럼 왔던 길을 후진으로 되돌아가는 경우 제외)
+        head_dir = np.diff(next_xy[:len(head) + 1], axis=0)
+        if len(head_dir) < len(head):
+            head_dir = np.vstack([head_dir, head_dir[-1:]]) if len(head_dir) else np.ones((len(head), 2))
+        same_way = np.einsum('ij,ij->i', head_dir, index.d[match['segment']]) >= 0
+        # 꼬리 끝점보다 앞으로 나간 점은 겹침이 아니라 이어지는 점 (끝점과 같은 점은 중복)
+        beyond = (match['segment'] == len(index) - 1) & (match['t'] >= 1.0) & (match['distance'] > 1e-6)
+        on_prev = ((match['distance'] <= overlap_tol) & same_way & ~beyond) | (match['distance'] <= 1e-6)
+        # 앞에서부터 연속으로 이전 구간 위에 있는 점들만 제거
+        skip_next = int(np.argmin(on_prev)) if not on_prev.all() else len(head)
+        skip_next = min(skip_next, len(next_xy) - 1)
+
+        # 남은 첫 점이 이전 구간 꼬리의 중간 위에 같은 방향으로 놓이면 그 뒤 꼬리는 지나친 부분
+        tail_s = arc_length(tail)
+        first = {key: value[skip_next:skip_next + 1] for key, value in match.items()} \
+            if skip_next < len(head) else index.nearest(next_xy[skip_next:skip_next + 1])
+        first_dir = head_dir[min(skip_next, len(head_dir) - 1)]
+        overshoot = (
+            first['distance'][0] <= overlap_tol
+            and first['s'][0] < tail_s[-1] - overlap_tol
+            and float(np.dot(first_dir, index.d[first['segment'][0]])) > 0
+        )
+        if overshoot:
+            keep_prev = tail_from + int(np.searchsorted(tail_s, first['s'][0], side='right'))
+            keep_prev = max(keep_prev, 1)
+    return keep_prev, skip_next
+
+
+def fill_gap(start, end, spacing):
+    """
+    두 점 사이를 spacing(m) 간격의 직선 보간점으로 채웁니다 (양 끝점 제외).
+    """
+    gap = float(np.hypot(*(end - start)))
+    count = int(round(gap / spacing)) - 1
+    if count <= 0:
+        return np.empty((0, 2))
+    ratio = np.arange(1, count + 1) / (count + 1)
+    return start + (end - start) * ratio[:, None]
+
+
+def assemble_route(segments, first=None, overlap_tol=0.3, spacing=None, order=None):
+    """
+    구간 DataFrame 들을 순서/방향을 맞추어 하나의 연속된 경로로 합칩니다.
+
+    Parameters:
+    - segments: load_segments 로 읽은 DataFrame 목록
+    - first: 시작 구간 번호 (None 이면 자동)
+    - overlap_tol: 겹침으로 판단하는 거리 (m)
+    - spacing: 이음매 빈틈을 채울 간격 (m). None 이면 전체 구간의 중앙값 간격
+    - order: order_segments 결과를 이미 계산했다면 전달 (None 이면 계산)
+
+    Returns:
+    - 표준 컬럼 + option 을 가진 DataFrame (seq 는 write 시 1 부터 다시 매김)
+    """
+    if order is None:
+        order = order_segments(segments, first)
+    if spacing is None:
+        steps = np.concatenate([
+            segment_lengths(seg[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64))
+            for seg in segments
+        ])
+        steps = steps[steps > 0]
+        spacing = float(np.median(steps)) if len(steps) else 0.5
+
+    pieces = []
+    prev = None
+    for index, reverse in order:
+        seg = segments[index].iloc[::-1] if reverse else segments[index]
+        seg = seg.reset_index(drop=True)
+        if prev is not None:
+            prev_xy = prev[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+            next_xy = seg[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+            keep_prev, skip_next = heal_seam(prev_xy, next_xy, overlap_tol)
+            prev = prev.iloc[:keep_prev]
+            seg = seg.iloc[skip_next:].reset_index(drop=True)
+            pieces.append(prev)
+
+            fill = fill_gap(prev_xy[keep_prev - 1], next_xy[skip_next], spacing)
+            if len(fill):
+                zone = seg['utm_zone_number'].iloc[0]
+                latitude, longitude = utm_to_latlon(fill[:, 0], fill[:, 1], zone)
+                pieces.append(pd.DataFrame({
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'utm_easting': fill[:, 0],
+                    'utm_northing': fill[:, 1],
+                    'utm_zone_number': zone,
+                    'option': prev['option'].iloc[-1],
+                }))
+        prev = seg
+    pieces.append(prev)
+
+    route = pd.concat(pieces, ignore_index=True)
+    route['seq'] = np.arange(1, len(route) + 1)
+    return route
+
+
+def main():
+    parser = argparse.ArgumentParser(description="여러 구간 웨이포인트 파일을 하나의 연속 경로로 합치기")
+    parser.add_argument('inputs', nargs='+', help="구간 CSV 파일 또는 디렉토리")
+    parser.add_argument('-o', '--output', required=True, help="출력 웨이포인트 파일")
+    parser.add_argument('--first', default=None, help="시작 구간 파일 (기본: 자동)")
+    parser.add_argument('--overlap', type=float, default=0.3, help="겹침 판단 거리 (m)")
+    parser.add_argument('--spacing', type=float, default=None, help="빈틈 채우기 간격 (m)")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    segments = load_segments(paths)
+    first = None
+    if args.first:
+        sources = [seg.attrs['source'] for seg in segments]
+        first = [os.path.abspath(p) for p in sources].index(os.path.abspath(args.first))
+
+    order = order_segments(segments, first)
+    for index, reverse in order:
+        print(f"{segments[index].attrs['source']}{' (reversed)' if reverse else ''}")
+
+    route = assemble_route(segments, first, args.overlap, args.spacing, order)
+    write_track(route, args.output, 'waypoint')
+    print(f"Saved {len(route)} waypoints from {len(segments)} segments to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
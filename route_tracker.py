@@ -0,0 +1,142 @@
+import math
+import time
+import argparse
+import numpy as np
+
+from track_io import read_track
+from route_query import RouteQuery
+
+
+class RouteTracker:
+    """
+    경로 위 진행 위치 (누적 거리 s)를 기억하며 자세를 연속으로 매칭하는 추적기입니다.
+
+    매 갱신마다 직전 s 기준 [s - behind, s + ahead] 구간에 걸친 구간(segment) 중에서만 찾으므로
+    갱신 비용은 경로 길이와 창 길이에 무관합니다. 검사는 RouteQuery.nearest_in 이 맡아 자세가 든 격자 칸의
+    후보 중 창에 걸친 구간만 사영하므로 전역 질의 (RouteQuery.query) 와 같은 수준의 비용입니다.
+    전체 최근접 검색과 달리 경로가 겹치거나 교차하는 곳 (주차 경로가 본선을 가로지르는 곳 등)에서도
+    지금 달리는 쪽의 경로에 계속 매칭됩니다.
+
+    창 안의 최근접 거리가 max_distance 보다 멀면 (경로 이탈, 위치 점프) 전역 검색 (RouteQuery.query)으로
+    다시 찾고 그 위치에서 추적을 이어갑니다. 결과는 RouteQuery.query 와 같은 키에 'fallback' (전역 검색 여부)이
+    추가된 dict 입니다.
+    """
+
+    def __init__(self, route, ahead=5.0, behind=2.0, max_distance=3.0):
+        self.route = route
+        self.ahead = ahead
+        self.behind = behind
+        self.max_distance = max_distance
+        self.s = None
+        self.fallbacks = 0
+
+    def reset(self, s=None):
+        """
+        추적 상태를 초기화합니다. s 를 주면 그 위치부터 추적합니다 (None 이면 다음 갱신은 전역 검색).
+        """
+        self.s = s
+
+    def update(self, x, y, yaw=None, lookahead=None):
+        """
+        새 자세로 진행 위치를 갱신하고 질의 결과를 반환합니다.
+        """
+        route = self.route
+        if self.s is not None:
+            segment, t, distance = route.nearest_in(x, y, self.s - self.behind, self.s + self.ahead)
+            if distance <= self.max_distance:
+                result = route.result(x, y, segment, t, distance, yaw, lookahead)
+                self.s = result['s']
+                result['fallback'] = False
+                return result
+
+        result = route.query(x, y, yaw, lookahead)
+        self.s = result['s']
+        self.fallbacks += 1
+        result['fallback'] = True
+        return result
+
+    def track(self, x, y, yaw=None, lookahead=None):
+        """
+        기록된 자세 배열을 순서대로 추적합니다.
+
+        Returns:
+        - dict: query_batch 와 같은 키의 배열 + fallback (bool 배열)
+        """
+        x = np.asarray(x, dtype=np.float64).tolist()
+        y = np.asarray(y, dtype=np.float64).tolist()
+        yaw = [None] * len(x) if yaw is None else np.asarray(yaw, dtype=np.float64).tolist()
+        results = [self.update(x[i], y[i], yaw[i], lookahead) for i in range(len(x))]
+        keys = results[0].keys() if results else []
+        return {
+            key: None if results[0][key] is None else np.array([r[key] for r in results])
+            for key in keys
+        }
+
+
+def simulate_drive(route, speed=5.0, dt=0.1, noise=0.3, seed=0):
+    """
+    경로를 따라 speed(m/s)로 달리며 dt(s)마다 기록한 것 같은 자세 배열 (x, y, yaw, 실제 s)을 만듭니다.
+    """
+    rng = np.random.default_rng(seed)
+    target = np.arange(0.0, route.total_length, speed * dt)
+    xy, truth = route.points_at(target)
+    heading = np.degrees(np.arctan2(*np.gradient(xy, axis=0)[:, ::-1].T))
+    xy = xy + rng.normal(scale=noise, size=xy.shape)
+    return xy[:, 0], xy[:, 1], heading, truth
+
+
+def benchmark(route, speed=5.0, dt=0.1, noise=0.3, lookahead=5.0, rounds=5, **params):
+    """
+    경로를 따라 주행한 자세로 추적기와 전역 검색을 비교합니다.
+    진행 위치 오차가 5 m 를 넘으면 다른 쪽 경로 (겹치는 구간)에 잘못 매칭된 것으로 셉니다.
+    처리량은 CPU 시간 (process_time) 으로 rounds 번 재서 가장 빠른 값을 씁니다.
+    """
+    x, y, yaw, truth = simulate_drive(route, speed, dt, noise)
+    count = len(x)
+    xs, ys, yaws = x.tolist(), y.tolist(), yaw.tolist()
+
+    tracker_time = global_time = math.inf
+    for _ in range(max(rounds, 1)):
+        tracker = RouteTracker(route, **params)
+        start = time.process_time()
+        tracked = [tracker.update(xs[i], ys[i], yaws[i], lookahead)['s'] for i in range(count)]
+        tracker_time = min(tracker_time, time.process_time() - start)
+
+        start = time.process_time()
+        matched = [route.query(xs[i], ys[i], yaws[i], lookahead)['s'] for i in range(count)]
+        global_time = min(global_time, time.process_time() - start)
+
+    def wrong(s):
+        error = np.abs(np.asarray(s) - truth)
+        if route.closed:
+            error = np.minimum(error, route.total_length - error)
+        return int((error > 5.0).sum())
+
+    print(f"{count} poses along {route.total_length:.1f} m (speed {speed} m/s, dt {dt} s, noise {noise} m)")
+    print(f"  tracker: {tracker_time * 1000:.0f} ms ({count / tracker_time:,.0f} updates/s, best of {max(rounds, 1)}), "
+          f"wrong matches {wrong(tracked)}, fallbacks {tracker.fallbacks}")
+    print(f"  global:  {global_time * 1000:.0f} ms ({count / global_time:,.0f} queries/s), "
+          f"wrong matches {wrong(matched)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="경로 진행 위치 추적 (창 검색) 벤치마크")
+    parser.add_argument('input', help="경로 CSV 파일")
+    parser.add_argument('--closed', action='store_true', help="끝점과 시작점이 이어진 순환 경로")
+    parser.add_argument('--ahead', type=float, default=5.0, help="앞쪽 검색 창 (m)")
+    parser.add_argument('--behind', type=float, default=2.0, help="뒤쪽 검색 창 (m)")
+    parser.add_argument('--max-distance', type=float, default=3.0, help="전역 검색으로 넘어가는 거리 (m)")
+    parser.add_argument('--speed', type=float, default=5.0, help="모의 주행 속도 (m/s)")
+    parser.add_argument('--dt', type=float, default=0.1, help="모의 주행 기록 주기 (s)")
+    parser.add_argument('--noise', type=float, default=0.3, help="모의 주행 위치 잡음 (m)")
+    args = parser.parse_args()
+
+    route = RouteQuery.from_track(read_track(args.input), closed=args.closed)
+    benchmark(
+        route, args.speed, args.dt, args.noise,
+        ahead=args.ahead, behind=args.behind, max_distance=args.max_distance
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def split_chains(xy, max_gap=5.0):
+    """
+    점 배열에서 간격이 max_gap(m) 보다 큰 곳을 끊어 새 폴리라인이 시작되는 위치를 표시합니다.
+    lane map 처럼 여러 차선이 한 파일에 이어 붙어 있는 경우에 사용합니다.
+
+    Returns:
+    - breaks: 길이 N 의 bool 배열 (True 인 점에서 새 폴리라인 시작)
+    """
+    xy = np.asarray(xy)
+    breaks = np.zeros(len(xy), dtype=bool)
+    if len(xy):
+        breaks[0] = True
+        breaks[1:] = np.hypot(*np.diff(xy, axis=0).T) > max_gap
+    return breaks
+
+
+class SegmentIndex:
+    """
+    폴리라인 구간(segment)에 대한 최근접 검색 인덱스입니다.
+    긴 구간은 max_piece(m) 이하 조각으로 나누어 조각 중점으로 KDTree 를 만들고,
+    후보 구간에 점을 사영(projection)하여 정확한 최근접 구간을 찾습니다.
+
+    origin 을 주면 xy 는 그 원점 기준 좌표 (float32 가능, track_compact) 로 보고 그 dtype 그대로 구간 배열을 만듭니다.
+    이때도 nearest() 의 질의 점과 사영점 (proj) 은 절대 좌표입니다.
+    """
+
+    def __init__(self, xy, breaks=None, max_piece=2.0, k=16, origin=None):
+        self.origin = None if origin is None else np.asarray(origin, dtype=np.float64)
+        self.xy = np.asarray(xy, dtype=None if origin is not None else np.float64)
+        if breaks is None:
+            breaks = np.zeros(len(self.xy), dtype=bool)
+        self.breaks = np.asarray(breaks, dtype=bool)
+
+        # 구간 i 는 점 i -> i+1 (다음 점이 새 폴리라인의 시작이면 구간 없음)
+        starts = np.flatnonzero(~self.breaks[1:]) if len(self.xy) > 1 else np.empty(0, dtype=np.int64)
+        self.segment_start = starts
+        self.a = self.xy[starts]
+        self.b = self.xy[starts + 1]
+        self.d = self.b - self.a
+        self.length = np.hypot(self.d[:, 0], self.d[:, 1])
+        self.length_sq = np.maximum(self.length ** 2, 1e-12)
+
+        # 점 번호 기준 누적 거리 (폴리라인이 바뀌어도 이어서 증가)
+        step = np.zeros(len(self.xy))
+        step[starts + 1] = self.length
+        self.arc_length = np.cumsum(step)
+
+        # 구간을 조각으로 나누어 조각 중점을 인덱싱
+        self.max_piece = max_piece
+        pieces = np.maximum(np.ceil(self.length / max_piece).astype(np.int64), 1)
+        owner = np.repeat(np.arange(len(starts)), pieces)
+        offset = np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        ratio = (offset + 0.5) / np.repeat(pieces, pieces)
+        self.piece_owner = owner
+        self.piece_half = float((self.length / pieces).max() / 2.0) if len(starts) else 0.0
+        self.tree = cKDTree(self.a[owner] + self.d[owner] * ratio[:, None]) if len(owner) else None
+        self.k = k
+
+    # 저장/복원하는 배열 (나머지 구간 배열은 xy 와 segment_start 로 바로 계산)
+    STATE_ARRAYS = ('xy', 'breaks', 'segment_start', 'arc_length', 'piece_owner')
+
+    def state(self):
+        """
+        인덱스를 다시 만들지 않고 복원할 수 있도록 배열 dict 와 스칼라 dict 로 반환합니다.
+        KDTree 는 scipy 의 pickle 상태 (트리 버퍼, 점, 정렬 순서) 를 그대로 배열로 저장합니다.
+        """
+        arrays = {name: getattr(self, name) for name in self.STATE_ARRAYS}
+        scalars = {'max_piece': self.max_piece, 'piece_half': self.piece_half, 'k': self.k, 'tree': None,
+                   'origin': None if self.origin is None else self.origin.tolist()}
+        if self.tree is not None:
+            buffer, data, n, m, leafsize, maxes, mins, indices = self.tree.__getstate__()[:8]
+            arrays.update(tree_buffer=buffer.view(np.uint8), tree_data=data, tree_maxes=maxes,
+                          tree_mins=mins, tree_indices=indices)
+            scalars['tree'] = [int(n), int(m), int(leafsize)]
+        return arrays, scalars
+
+    @classmethod
+    def from_state(cls, arrays, scalars, rebuild_tree=False):
+        """
+        state() 결과로 인덱스를 복원합니다. 배열은 복사하지 않고 그대로 사용하므로 memmap 도 넘길 수 있습니다.
+        rebuild_tree 이거나 KDTree 상태를 읽을 수 없으면 저장된 조각 중점으로 KDTree 를 다시 만듭니다
+        (다른 scipy 버전에서 저장한 상태는 읽히더라도 내부 구조가 다를 수 있으므로 rebuild_tree 로 호출).
+        """
+        index = cls.__new__(cls)
+        for name in cls.STATE_ARRAYS:
+            setattr(index, name, arrays[name])
+        starts = index.segment_start
+        index.a = index.xy[starts]
+        index.b = index.xy[starts + 1]
+        index.d = index.b - index.a
+        index.length = np.hypot(index.d[:, 0], index.d[:, 1])
+        index.length_sq = np.maximum(index.length ** 2, 1e-12)
+        index.max_piece = scalars['max_piece']
+        index.piece_half = scalars['piece_half']
+        index.k = scalars['k']
+        index.origin = None if scalars.get('origin') is None else np.asarray(scalars['origin'])
+        index.tree = None
+        if scalars['tree'] is not None and rebuild_tree:
+            index.tree = cKDTree(arrays['tree_data'])
+        elif scalars['tree'] is not None:
+            n, m, leafsize = scalars['tree']
+            try:
+                index.tree = cKDTree.__new__(cKDTree)
+                index.tree.__setstate__((
+                    arrays['tree_buffer'].view('S1'), arrays['tree_data'], n, m, leafsize,
+                    arrays['tree_maxes'], arrays['tree_mins'], arrays['tree_indices'], None, None,
+                ))
+            except Exception:
+                index.tree = cKDTree(arrays['tree_data'])
+        return index
+
+    def __len__(self):
+        return len(self.segment_start)
+
+    def project(self, points, segments):
+        """
+        점들을 지정한 구간에 사영합니다. origin 이 있어도 points 와 proj 는 nearest() 처럼 절대 좌표입니다.
+
+        Returns:
+        - t: 구간 위의 비율 (0~1), proj: 사영점, distance: 사영점까지 거리
+        """
+        if self.origin is None:
+            return self._project(points, segments)
+        t, proj, distance = self._project(np.asarray(points, dtype=np.float64) - self.origin, segments)
+        return t, proj + self.origin, distance
+
+    def _project(self, points, segments):
+        # 인덱스 좌표 (origin 기준) 의 점들을 구간에 사영
+        rel = points - self.a[segments]
+        t = np.clip(np.einsum('...j,...j->...', rel, self.d[segments]) / self.length_sq[segments], 0.0, 1.0)
+        proj = self.a[segments] + self.d[segments] * t[..., None]
+        diff = points - proj
+        distance = np.hypot(diff[..., 0], diff[..., 1])
+        return t, proj, distance
+
+    def nearest(self, points, max_distance=np.inf):
+        """
+        각 점에서 가장 가까운 구간을 찾습니다.
+
+        Parameters:
+        - points: (N x 2) UTM 좌표 (origin 이 있어도 절대 좌표)
+        - max_distance: 이 거리보다 먼 점은 구간 번호 -1 로 반환
+
+        Returns:
+        - dict: segment (구간 번호), index (구간 시작 점 번호), t, proj (사영점),
+          distance, side (진행 방향 기준 왼쪽 +1 / 오른쪽 -1), s (사영점의 누적 거리)
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        if self.origin is not None:
+            points = points - self.origin
+        n = len(points)
+        if self.tree is None or n == 0:
+            raise ValueError("인덱스에 구간이 없습니다.")
+
+        segment = np.zeros(n, dtype=np.int64)
+        best_t = np.zeros(n)
+        best_proj = np.zeros((n, 2))
+        best_distance = np.full(n, np.inf)
+
+        # k 개 후보 조각으로 찾은 뒤, k 번째 조각보다 더 가까운 구간이 있을 수 있는 점만
+        # k 를 두 배로 늘려 다시 검색 (대부분의 점은 첫 검색에서 확정됨)
+        todo = np.arange(n)
+        k = self.k
+        while len(todo):
+            k = min(k, self.tree.n)
+            piece_distance, piece = self.tree.query(points[todo], k=k)
+            piece_distance = piece_distance.reshape(len(todo), k)
+            candidates = self.piece_owner[piece.reshape(len(todo), k)]
+
+            t, proj, distance = self._project(points[todo, None, :].repeat(k, axis=1), candidates)
+            best = np.argmin(distance, axis=1)
+            rows = np.arange(len(todo))
+            segment[todo] = candidates[rows, best]
+            best_t[todo] = t[rows, best]
+            best_proj[todo] = proj[rows, best]
+            best_distance[todo] = distance[rows, best]
+
+            if k >= self.tree.n:
+                break
+            unsure = piece_distance[:, -1] <= best_distance[todo] + self.piece_half
+            unsure &= best_distance[todo] <= max_distance
+            todo = todo[unsure]
+            k *= 2
+
+        rel = points - self.a[segment]
+        cross = self.d[segment, 0] * rel[:, 1] - self.d[segment, 1] * rel[:, 0]
+        index = self.segment_start[segment]
+        result = {
+            'segment': segment,
+            'index': index,
+            't': best_t,
+            'proj': best_proj if self.origin is None else best_proj + self.origin,
+            'distance': best_distance,
+            'side': np.where(cross >= 0, 1, -1),
+            's': self.arc_length[index] + best_t * self.length[segment],
+        }
+        far = best_distance > max_distance
+        if far.any():
+            result['segment'] = np.where(far, -1, segment)
+            result['index'] = np.where(far, -1, index)
+        return result
@@ -0,0 +1,103 @@
+import os
+import argparse
+import numpy as np
+
+from track_io import read_track, write_track, valid_mask, list_csv_files
+from track_geometry import compute_geometry, distinct_mask
+
+# 주차 경로의 전/후진 전환점 (이 각도 이상 꺾이면 정지 후 방향 전환으로 봄)
+CUSP_TURN_DEG = 120.0
+
+
+def speed_profile(xy, max_speed=5.0, max_lat_accel=1.5, max_accel=1.0, max_decel=1.5,
+                  start_speed=0.0, end_speed=0.0):
+    """
+    곡률과 가속도 제한으로 점별 목표 속도 (m/s)를 계산합니다.
+
+    1. 곡률 제한: v <= sqrt(max_lat_accel / |curvature|), v <= max_speed
+    2. 전진 패스 (가속 제한): v_i^2 <= v_j^2 + 2 * max_accel * (s_i - s_j), j <= i
+    3. 후진 패스 (감속 제한): v_i^2 <= v_j^2 + 2 * max_decel * (s_j - s_i), j >= i
+
+    2, 3 의 점화식은 v^2 - 2as 의 누적 최소값(np.minimum.accumulate)으로 바꾸어 반복문 없이 계산합니다.
+    주차 경로의 전/후진 전환점과 양 끝점에서는 지정한 속도(기본 0)로 멈춥니다.
+    연속 중복점은 방향이 없어 가짜 전환점이 되므로 빼고 계산한 뒤, 앞의 점과 같은 속도를 줍니다.
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    n = len(xy)
+    if n == 0:
+        return np.zeros(0)
+    keep = distinct_mask(xy)
+    if not keep.all():
+        speed = speed_profile(xy[keep], max_speed, max_lat_accel, max_accel, max_decel, start_speed, end_speed)
+        return speed[np.cumsum(keep) - 1]
+    geometry = compute_geometry(xy)
+    s = geometry['cumulative_distance']
+
+    with np.errstate(divide='ignore'):
+        limit = np.sqrt(max_lat_accel / np.abs(geometry['curvature']))
+    limit = np.minimum(limit, max_speed) ** 2
+
+    # 전/후진 전환점: 들어오는 구간과 나가는 구간의 방향이 반대
+    if n >= 3:
+        seg = np.diff(xy, axis=0)
+        heading = np.arctan2(seg[:, 1], seg[:, 0])
+        turn = np.degrees(np.abs((np.diff(heading) + np.pi) % (2 * np.pi) - np.pi))
+        limit[1:-1][turn >= CUSP_TURN_DEG] = 0.0
+    limit[0] = min(limit[0], start_speed ** 2)
+    limit[-1] = min(limit[-1], end_speed ** 2)
+
+    forward = 2 * max_accel * s + np.minimum.accumulate(limit - 2 * max_accel * s)
+    backward = -2 * max_decel * s + np.minimum.accumulate((limit + 2 * max_decel * s)[::-1])[::-1]
+    return np.sqrt(np.maximum(np.minimum(forward, backward), 0.0))
+
+
+def add_speed_column(df, column='speed', **params):
+    """
+    표준 DataFrame 에 목표 속도 컬럼 (m/s)을 추가한 새 DataFrame 을 반환합니다.
+    좌표가 없는 라벨 행은 NaN 입니다.
+    """
+    df = df.copy()
+    rows = np.flatnonzero(valid_mask(df))
+    values = np.full(len(df), np.nan)
+    values[rows] = speed_profile(df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows], **params)
+    df[column] = values
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="곡률 기반 목표 속도 프로파일 생성")
+    parser.add_argument('inputs', nargs='+', help="웨이포인트 CSV 파일 또는 디렉토리 (P/, T/ 등)")
+    parser.add_argument('--max-speed', type=float, default=5.0, help="최대 속도 (m/s)")
+    parser.add_argument('--lat-accel', type=float, default=1.5, help="최대 횡가속도 (m/s^2)")
+    parser.add_argument('--accel', type=float, default=1.0, help="최대 가속도 (m/s^2)")
+    parser.add_argument('--decel', type=float, default=1.5, help="최대 감속도 (m/s^2)")
+    parser.add_argument('--start-speed', type=float, default=0.0, help="시작 속도 (m/s)")
+    parser.add_argument('--end-speed', type=float, default=0.0, help="끝 속도 (m/s)")
+    parser.add_argument('--output-dir', default=None, help="출력 디렉토리 (기본: 입력 파일 위치에 speed_ 접두사)")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    if args.output_dir and not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    for path in paths:
+        df = add_speed_column(
+            read_track(path), max_speed=args.max_speed, max_lat_accel=args.lat_accel,
+            max_accel=args.accel, max_decel=args.decel,
+            start_speed=args.start_speed, end_speed=args.end_speed,
+        )
+        if args.output_dir:
+            output_path = os.path.join(args.output_dir, os.path.basename(path))
+        else:
+            output_path = os.path.join(os.path.dirname(path), f"speed_{os.path.basename(path)}")
+        # option 옆에 speed 컬럼이 오도록 waypoint 형식으로 저장
+        write_track(df, output_path, 'waypoint')
+        speed = df['speed'].dropna()
+        print(f"{path}: mean {speed.mean():.2f} m/s, max {speed.max():.2f} m/s, saved as {output_path}")
+
+
+if __name__ == "__main__":
+    main()
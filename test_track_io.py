@@ -0,0 +1,21 @@
+import pandas as pd
+
+from track_io import merge_labels, read_track, split_labels
+
+MERGE_WAYPOINT = 'mando_contest/waypoint/all/merge_waypoint_no_parking_v1.csv'
+
+
+def test_labels_return_to_place_after_edit():
+    # 라벨 행 앞뒤 점을 지우고 끝에 점을 추가해도 라벨 행은 원래 자리 (앞 구간 끝과 뒤 구간 시작 사이) 에 들어감
+    df = read_track(MERGE_WAYPOINT)
+    points, labels = split_labels(df)
+    assert len(points) + len(labels) == len(df) and points['latitude'].notna().all()
+    assert merge_labels(points, labels).equals(df)
+
+    edited = points[~points['seq'].isin([3568, 4214])].reset_index(drop=True)
+    new = pd.DataFrame({'latitude': [37.2887], 'longitude': [127.1075], 'utm_easting': [332240.0],
+                        'utm_northing': [4128580.0], 'utm_zone_number': ['52S']})
+    merged = merge_labels(pd.concat([edited, new], ignore_index=True), labels)
+    start = merged.index[merged['Unnamed: 6'] == '06_start'][0]
+    assert merged['seq'].iloc[start - 1] == 3566 and merged['seq'].iloc[start + 2] == 4216
+    assert merged['latitude'].iloc[-1] == 37.2887 and len(merged) == len(df) - 1
@@ -0,0 +1,15 @@
+import pandas as pd
+
+from track_tiles import build_tiles, export_tiles
+
+MERGE_WAYPOINT = 'mando_contest/waypoint/all/merge_waypoint_no_parking_v1.csv'
+
+
+def test_rebuild_replaces_existing_store(tmp_path):
+    # 같은 디렉토리에 다시 만들어도 점이 중복되지 않고 라벨 행까지 원래 파일로 되돌아옴
+    store = tmp_path / 'store'
+    build_tiles(MERGE_WAYPOINT, str(store), tile_size=50.0)
+    store = build_tiles(MERGE_WAYPOINT, str(store), tile_size=50.0)
+    output = tmp_path / 'out.csv'
+    assert export_tiles(store, str(output)) == len(pd.read_csv(MERGE_WAYPOINT))
+    pd.testing.assert_frame_equal(pd.read_csv(output), pd.read_csv(MERGE_WAYPOINT))
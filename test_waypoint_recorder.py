@@ -0,0 +1,25 @@
+import shutil
+
+import pytest
+
+from waypoint_recorder import WaypointRecorder
+
+
+def test_foreign_header_is_left_untouched(tmp_path):
+    # lane 형식 파일에 waypoint 형식으로 이어 쓰려 하면 거부하고 파일은 그대로 둠
+    path = tmp_path / 'lane.csv'
+    shutil.copy('test/lane_L_v1.csv', path)
+    before = path.read_bytes()
+    with pytest.raises(ValueError):
+        WaypointRecorder(str(path))
+    assert path.read_bytes() == before
+
+
+def test_same_header_is_continued(tmp_path):
+    path = tmp_path / 'waypoint.csv'
+    path.write_text('seq,latitude,longitude,latitude_utm,longitude_utm,option\n'
+                    '7,37.2889456,127.1076411,332256.4247,4128605.405,0\n')
+    recorder = WaypointRecorder(str(path))
+    recorder.close()
+    assert recorder.seq == 8
+    assert path.read_text().count('\n') == 2
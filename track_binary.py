@@ -0,0 +1,360 @@
+import os
+import json
+import time
+import struct
+import argparse
+import numpy as np
+import pandas as pd
+
+from track_io import read_track, to_dialect, utm_to_latlon, list_csv_files, CANONICAL_COLUMNS
+from track_compact import COMPACT_FIELDS, RESIDUAL_SUFFIX, compact_origin, split_values, join_values
+
+# 파일 구조
+# - 고정 머리 (40 바이트): magic, 형식 버전, 머리 전체 길이, 레코드 개수, 원점 (easting, northing)
+# - 스키마 (JSON): 존, 원래 형식, 필드 목록 [(이름, dtype), ...], 필드별 원점 (compact 형식).
+#   머리 전체 길이가 ALIGN 의 배수가 되도록 공백으로 채움
+# - 레코드: 필드를 빈틈없이 이어 붙인 고정 길이 레코드 (리틀 엔디언)
+# compact 형식은 위도/경도/UTM 좌표를 필드별 float64 원점 기준 float32 로 저장하고, 정확한 복원용
+# int32 잔차 필드 (<이름>_residual, track_compact.split_values) 를 함께 둡니다.
+# 레코드 개수는 레코드를 쓰고 fsync 한 뒤에 갱신하므로, 기록 중 비정상 종료해도 개수까지의 레코드는 온전합니다.
+MAGIC = b'WPTRKBIN'
+FORMAT_VERSION = 1
+PREFIX = struct.Struct('<8sIIQdd')
+COUNT_OFFSET = 16
+ALIGN = 64
+SUFFIX = '.wpb'
+
+# utm 좌표 필드 (원점 기준 값으로 저장)
+UTM_FIELDS = ('utm_easting', 'utm_northing')
+
+
+def schema_for(df, float32=(), compact=False):
+    """
+    표준 DataFrame 의 컬럼으로 레코드 필드 목록을 정합니다. 숫자 컬럼은 float64 / int64 (float32 에 든 컬럼은 float32),
+    문자열 컬럼은 가장 긴 값 길이의 고정 길이 바이트입니다. utm_zone_number 가 모두 같으면 필드 대신 머리에 저장합니다.
+    compact 이면 좌표 컬럼을 원점 기준 float32 + int32 잔차로 저장합니다 (정확히 되돌릴 수 없는 컬럼은 float64 그대로).
+
+    Returns:
+    - (필드 목록 [(이름, dtype 문자열), ...], 존 문자열 또는 None, 필드별 원점 dict)
+    """
+    zone = None
+    fields = []
+    origins = {}
+    for name in df.columns:
+        values = df[name]
+        if name == 'utm_zone_number' and values.nunique(dropna=False) <= 1:
+            zone = str(values.iloc[0]) if len(values) and not pd.isna(values.iloc[0]) else None
+            continue
+        kind = values.dtype.kind
+        if compact and kind == 'f' and name in COMPACT_FIELDS:
+            origin = compact_origin(values)
+            try:
+                split_values(values, origin)
+            except ValueError:
+                fields.append((name, '<f8'))
+                continue
+            origins[name] = origin
+            fields.extend([(name, '<f4'), (name + RESIDUAL_SUFFIX, '<i4')])
+        elif kind == 'f':
+            fields.append((name, '<f4' if name in float32 else '<f8'))
+        elif kind in 'iu':
+            fields.append((name, '<i8'))
+        elif kind == 'b':
+            fields.append((name, '|b1'))
+        else:
+            width = max([len(str(v).encode('utf-8')) for v in values.dropna()] + [1])
+            fields.append((name, f'|S{width}'))
+    return fields, zone, origins
+
+
+class BinaryTrackWriter:
+    """
+    고정 길이 레코드 트랙 파일에 행을 이어 씁니다 (기록용).
+    같은 스키마의 파일이 이미 있으면 그 뒤에 이어 쓰고, 개수 뒤에 남은 잘린 레코드는 버립니다.
+    origins 의 필드는 원점 기준 값으로 저장합니다 (잔차 필드가 있으면 정확한 복원용 잔차도 씀).
+    """
+
+    def __init__(self, path, fields, zone=None, dialect='lane', origins=None):
+        self.path = path
+        self.dtype = np.dtype([(name, dtype) for name, dtype in fields])
+        self.fields = [(name, self.dtype[name].str) for name in self.dtype.names]
+        self.zone = zone
+        self.dialect = dialect
+        self.origins = {name: float(value) for name, value in (origins or {}).items()}
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            header = read_header(path)
+            if header['fields'] != self.fields:
+                raise ValueError(f"{path} 의 필드가 다릅니다: {header['fields']}")
+            self.origins, self.zone = header['origins'], header['zone']
+            self.header_size, self.count = header['header_size'], header['count']
+            self.file = open(path, 'r+b')
+            self.file.truncate(self.header_size + self.count * self.dtype.itemsize)
+            self.file.seek(0, os.SEEK_END)
+        else:
+            schema = json.dumps({'zone': zone, 'dialect': dialect, 'fields': self.fields,
+                                 'origins': self.origins}).encode('utf-8')
+            self.header_size = -(-(PREFIX.size + len(schema)) // ALIGN) * ALIGN
+            self.count = 0
+            self.file = open(path, 'w+b')
+            origin = [self.origins.get(name, 0.0) for name in UTM_FIELDS]
+            self.file.write(PREFIX.pack(MAGIC, FORMAT_VERSION, self.header_size, 0, *origin))
+            self.file.write(schema.ljust(self.header_size - PREFIX.size, b' '))
+            self.file.flush()
+
+    def to_records(self, df):
+        # DataFrame 을 레코드 배열로 변환 (origins 의 필드는 원점 기준, 문자열은 UTF-8, 빈 값은 b'')
+        records = np.zeros(len(df), dtype=self.dtype)
+        for number, name in enumerate(self.dtype.names):
+            if name not in df.columns and name.endswith(RESIDUAL_SUFFIX):
+                continue
+            values = df[name]
+            if self.dtype[number].kind == 'S':
+                records[name] = [str(v).encode('utf-8') if not pd.isna(v) else b'' for v in values]
+            elif name in self.origins:
+                records[name], residual = split_values(values, self.origins[name], self.dtype[number])
+                if name + RESIDUAL_SUFFIX in self.dtype.names:
+                    records[name + RESIDUAL_SUFFIX] = residual
+            else:
+                records[name] = values.to_numpy()
+        return records
+
+    def append(self, rows):
+        """
+        DataFrame 또는 레코드 배열을 파일 끝에 씁니다. 개수는 flush() 에서 갱신됩니다.
+        """
+        records = rows if isinstance(rows, np.ndarray) else self.to_records(rows)
+        self.file.write(np.ascontiguousarray(records, dtype=self.dtype).tobytes())
+        self.count += len(records)
+
+    def flush(self):
+        # 레코드를 디스크에 쓴 뒤 개수를 갱신
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        position = self.file.tell()
+        self.file.seek(COUNT_OFFSET)
+        self.file.write(struct.pack('<Q', self.count))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.seek(position)
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        prefix = f.read(PREFIX.size)
+        if len(prefix) < PREFIX.size:
+            raise ValueError(f"{path} 는 이진 트랙 파일이 아닙니다.")
+        magic, version, header_size, count, origin_e, origin_n = PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"{path} 는 이진 트랙 파일이 아닙니다.")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 이진 트랙 형식 버전입니다: {version} (지원: {FORMAT_VERSION})")
+        schema = json.loads(f.read(header_size - PREFIX.size).decode('utf-8'))
+    fields = [(name, dtype) for name, dtype in schema['fields']]
+    origins = {name: value for name, value in zip(UTM_FIELDS, (origin_e, origin_n)) if value != 0.0}
+    origins.update(schema.get('origins', {}))
+    return {'header_size': header_size, 'count': count, 'origin': (origin_e, origin_n), 'origins': origins,
+            'zone': schema['zone'], 'dialect': schema['dialect'], 'fields': fields}
+
+
+class BinaryTrack:
+    """
+    이진 트랙 파일을 numpy.memmap 으로 엽니다. 파일을 읽지 않고 레코드 배열 (records) 을 그대로 사용하며,
+    column(name) 은 파일 위의 뷰 (복사 없음, 원점이 없는 필드만) 를, local(name) 은 저장된 원점 기준 값의 뷰를 반환합니다.
+    compact 형식은 track_compact.CompactTrack.from_binary 로 float32 배열 그대로 사용할 수 있습니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        header = read_header(path)
+        self.zone = header['zone']
+        self.dialect = header['dialect']
+        self.origin = header['origin']
+        self.origins = header['origins']
+        self.fields = header['fields']
+        self.dtype = np.dtype(self.fields)
+        if header['count']:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=header['header_size'],
+                                     shape=(header['count'],))
+        else:
+            self.records = np.empty(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def local(self, name):
+        # 저장된 값 그대로 (origins 의 필드는 원점 기준)
+        return self.records[name]
+
+    def column(self, name):
+        values = self.records[name]
+        if name in self.origins:
+            residual = name + RESIDUAL_SUFFIX
+            return join_values(self.origins[name], values,
+                               self.records[residual] if residual in self.dtype.names else None)
+        return values
+
+    def xy(self):
+        # UTM 좌표 (N x 2, float64)
+        return np.column_stack([self.column('utm_easting'), self.column('utm_northing')]).astype(np.float64, copy=False)
+
+    def to_frame(self, start=0, stop=None):
+        """
+        레코드 범위를 표준 DataFrame 으로 변환합니다 (write_track 으로 CSV 저장).
+        """
+        data = {}
+        for name in self.dtype.names:
+            if name.endswith(RESIDUAL_SUFFIX) and name[:-len(RESIDUAL_SUFFIX)] in self.origins:
+                continue
+            values = np.asarray(self.column(name)[start:stop])
+            if self.dtype[name].kind == 'S':
+                values = np.char.decode(values, 'utf-8').astype(object)
+                values[values == ''] = np.nan
+            elif self.dtype[name].kind == 'f':
+                values = values.astype(np.float64)
+            data[name] = values
+        df = pd.DataFrame(data)
+        if 'utm_zone_number' not in df.columns:
+            df['utm_zone_number'] = self.zone if self.zone is not None else np.nan
+        extra = [c for c in df.columns if c not in CANONICAL_COLUMNS]
+        df = df[CANONICAL_COLUMNS + extra]
+        df.attrs['dialect'] = self.dialect
+        return df
+
+
+def write_binary(df, path, float32=(), compact=False):
+    """
+    표준 DataFrame (read_track 결과) 을 이진 트랙 파일로 저장합니다. compact 는 schema_for 참고.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    fields, zone, origins = schema_for(df, float32, compact)
+    with BinaryTrackWriter(path, fields, zone, df.attrs.get('dialect', 'lane'), origins) as writer:
+        writer.append(df)
+
+
+def read_binary(path):
+    return BinaryTrack(path).to_frame()
+
+
+def csv_to_binary(csv_path, path, float32=(), compact=False):
+    write_binary(read_track(csv_path), path, float32, compact)
+
+
+def binary_to_csv(path, csv_path, dialect=None, chunk_rows=1000000):
+    """
+    이진 트랙을 CSV 로 저장합니다 (dialect 가 없으면 원래 형식). chunk_rows 행씩 나누어 씁니다.
+    """
+    track = BinaryTrack(path)
+    dialect = dialect or track.dialect
+    if dialect not in ('lane', 'waypoint'):
+        dialect = 'lane'
+    for start in range(0, max(len(track), 1), chunk_rows):
+        to_dialect(track.to_frame(start, start + chunk_rows), dialect).to_csv(
+            csv_path, mode='a' if start else 'w', header=not start, index=False)
+
+
+def benchmark(path, points=10000000, csv_points=1000000, chunk_rows=1000000):
+    """
+    points 개 점의 이진 트랙을 chunk_rows 개씩 이어 써서 만들고 memmap 으로 여는 시간과 좌표를 모두 읽는 시간을,
+    csv_points 개 점의 lane CSV 를 read_track 으로 읽는 시간과 비교합니다.
+    """
+    rng = np.random.default_rng(0)
+
+    def chunk(n, position):
+        steps = 0.2 * rng.normal(size=(n, 2))
+        xy = position + np.cumsum(steps, axis=0)
+        latitude, longitude = utm_to_latlon(xy[:, 0], xy[:, 1], '52S')
+        return pd.DataFrame({'latitude': latitude, 'longitude': longitude,
+                             'utm_easting': xy[:, 0], 'utm_northing': xy[:, 1], 'utm_zone_number': '52S'})
+
+    if os.path.exists(path):
+        os.remove(path)
+    start = time.perf_counter()
+    position = np.array([332254.5, 4128604.6])
+    fields = [(name, '<f8') for name in CANONICAL_COLUMNS[:4]]
+    with BinaryTrackWriter(path, fields, '52S', 'lane') as writer:
+        for done in range(0, points, chunk_rows):
+            df = chunk(min(chunk_rows, points - done), position)
+            position = df[['utm_easting', 'utm_northing']].to_numpy()[-1]
+            writer.append(df)
+            writer.flush()
+    print(f"write: {points} points in {time.perf_counter() - start:.1f} s ({os.path.getsize(path) / 2 ** 20:.0f} MiB)")
+
+    start = time.perf_counter()
+    track = BinaryTrack(path)
+    opened = time.perf_counter() - start
+    start = time.perf_counter()
+    center = track.xy().mean(axis=0)
+    scanned = time.perf_counter() - start
+    print(f"binary: open {opened * 1000:.2f} ms, read all coordinates {scanned * 1000:.0f} ms (mean {center.round(1)})")
+
+    csv_path = path + '.csv'
+    chunk(csv_points, position).to_csv(csv_path, index=False)
+    start = time.perf_counter()
+    read_track(csv_path)
+    parsed = time.perf_counter() - start
+    os.remove(csv_path)
+    print(f"csv: read_track {csv_points} points in {parsed * 1000:.0f} ms "
+          f"(~{parsed * points / csv_points:.1f} s for {points} points)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV 트랙과 고정 길이 레코드 이진 트랙 (.wpb) 사이 변환")
+    parser.add_argument('command', choices=['to-binary', 'to-csv', 'info', 'benchmark'],
+                        help="to-binary: CSV -> 이진, to-csv: 이진 -> CSV, info: 머리 정보, benchmark: 10M 점 읽기 측정")
+    parser.add_argument('inputs', nargs='*', help="입력 파일 또는 디렉토리")
+    parser.add_argument('--output-dir', default=None, help="출력 디렉토리 (기본: 입력 파일 위치)")
+    parser.add_argument('--float32', nargs='*', default=[], help="float32 로 저장할 컬럼 (예: speed heading)")
+    parser.add_argument('--compact', action='store_true',
+                        help="위도/경도/UTM 좌표를 원점 기준 float32 + 정확한 복원용 잔차로 저장 (to-binary)")
+    parser.add_argument('--dialect', choices=['lane', 'waypoint'], default=None, help="to-csv 형식 (기본: 원래 형식)")
+    parser.add_argument('--points', type=int, default=10000000, help="benchmark 점 개수")
+    args = parser.parse_args()
+
+    if args.command == 'benchmark':
+        benchmark(args.inputs[0] if args.inputs else 'benchmark' + SUFFIX, args.points)
+        return
+
+    paths = []
+    for path in args.inputs:
+        if os.path.isdir(path) and args.command == 'to-binary':
+            paths.extend(list_csv_files(path))
+        elif os.path.isdir(path):
+            paths.extend(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(SUFFIX))
+        else:
+            paths.append(path)
+    if args.output_dir and not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    for path in paths:
+        if args.command == 'info':
+            header = read_header(path)
+            print(f"{path}: {header['count']} records, {header['dialect']}, zone {header['zone']}, "
+                  f"origins {header['origins']}, fields {header['fields']}")
+            continue
+        suffix = SUFFIX if args.command == 'to-binary' else '.csv'
+        output_path = os.path.join(args.output_dir or os.path.dirname(path),
+                                   os.path.splitext(os.path.basename(path))[0] + suffix)
+        start = time.perf_counter()
+        if args.command == 'to-binary':
+            csv_to_binary(path, output_path, args.float32, args.compact)
+        else:
+            binary_to_csv(path, output_path, args.dialect)
+        print(f"{path} -> {output_path} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import os
+import time
+import argparse
+import numpy as np
+
+from track_io import read_track, valid_mask, list_csv_files, CANONICAL_COLUMNS
+from spatial_index import SegmentIndex, split_chains
+
+# 원점 기준 float32 로 줄여 저장하는 좌표 컬럼
+# float32 의 간격 (ulp) 은 원점에서 16 km 이내 2 mm, 32 km 이내 4 mm 이므로 수십 km 범위에서 cm 정확도를 유지합니다.
+# 위도/경도도 원점 기준 0.3 도 (약 30 km) 이내에서 간격이 3e-8 도 (약 3 mm) 이하입니다.
+COMPACT_FIELDS = ('latitude', 'longitude', 'utm_easting', 'utm_northing')
+# 정확한 복원을 위한 잔차 컬럼 이름 접미사
+RESIDUAL_SUFFIX = '_residual'
+RESIDUAL_LIMIT = np.iinfo(np.int32).max
+
+
+def compact_origin(values):
+    """
+    유한한 값의 중앙값을 원점으로 정합니다 (튀는 점에 흔들리지 않도록 범위 가운데 대신 중앙값,
+    읽기 쉽도록 소수 셋째 자리에서 반올림). 값이 없으면 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return 0.0
+    return float(np.round(np.median(finite), 3))
+
+
+def join_values(origin, local, residual=None):
+    """
+    원점 기준 값을 float64 절대 값으로 되돌립니다. residual 이 있으면 원래 값과 비트 단위로 같은 값을 만듭니다.
+    """
+    values = origin + np.asarray(local, dtype=np.float64)
+    if residual is not None:
+        values += np.asarray(residual, dtype=np.float64) * (np.spacing(np.abs(values)) / 2.0)
+    return values
+
+
+def split_values(values, origin, dtype=np.float32):
+    """
+    float64 절대 값을 원점 기준 값 (dtype) 과 정수 잔차로 나눕니다.
+    잔차는 origin + 원점 기준 값 (float64 계산) 과 원래 값의 차이를 그 값의 ulp 절반 단위로 센 int32 이며,
+    join_values 로 원래 값을 정확히 되돌립니다. 원점에서 너무 멀거나 0 에 아주 가까워 되돌릴 수 없으면 ValueError.
+
+    Returns:
+    - (원점 기준 값 배열, int32 잔차 배열)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    local = (values - origin).astype(dtype)
+    approx = origin + local.astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        steps = np.round((values - approx) / (np.spacing(np.abs(approx)) / 2.0))
+    steps[(values == approx) | ~np.isfinite(steps)] = 0
+    residual = np.clip(steps, -RESIDUAL_LIMIT, RESIDUAL_LIMIT).astype(np.int32)
+    if not np.array_equal(join_values(origin, local, residual), values, equal_nan=True):
+        raise ValueError(f"원점 {origin} 기준 값으로 정확히 되돌릴 수 없는 값이 있습니다.")
+    return local, residual
+
+
+class CompactTrack:
+    """
+    좌표 컬럼을 float64 원점 + float32 원점 기준 값으로 들고 있는 트랙입니다.
+    작업 배열 (local) 은 float64 의 절반 크기이고, 정확한 복원용 잔차 (residual, int32) 는
+    내보낼 때만 사용합니다 (exact=False 로 만들면 잔차 없이 cm 정확도로만 복원).
+    좌표 저장과 구간 인덱스 (편집기의 lane map 스냅 포함) 만 다루며, 편집기의 트랙 모델 (DataFrame/GeoDataFrame) 과
+    지도 그리기는 float64 그대로입니다. test/lane_LR_v1.csv (11248 점) 에서 편집기 DataFrame 은 점당 132 바이트
+    (GeoDataFrame 사본과 KDTree 24 바이트는 별도) 인데 좌표 네 컬럼을 줄여 아끼는 양은 16 바이트이고,
+    편집한 트랙을 원래 값 그대로 저장하려면 잔차 16 바이트가 다시 필요하므로 절약이 없습니다.
+
+    - xy(): UTM 원점 기준 (N x 2, float32), origin: UTM 원점 (float64)
+    - index(): 원점 기준 float32 좌표 위의 구간 인덱스 (질의와 결과는 절대 UTM 좌표)
+    - to_frame(): float64 표준 DataFrame (write_track 으로 원래 CSV 형식 저장)
+    """
+
+    def __init__(self, origins, local, residual, columns, dialect='lane'):
+        self.origins = origins
+        self.local = local
+        self.residual = residual
+        self.columns = columns
+        self.dialect = dialect
+
+    @classmethod
+    def from_frame(cls, df, exact=True):
+        """
+        표준 DataFrame (read_track 결과) 을 원점 기준 float32 좌표로 바꿉니다.
+        exact 이면 잔차를 함께 저장하고, 되돌릴 수 없는 값이 있으면 ValueError 를 냅니다.
+        """
+        origins, local, residual = {}, {}, {}
+        for name in COMPACT_FIELDS:
+            values = df[name].to_numpy(dtype=np.float64)
+            origins[name] = compact_origin(values)
+            if exact:
+                local[name], residual[name] = split_values(values, origins[name])
+            else:
+                local[name] = (values - origins[name]).astype(np.float32)
+        columns = df.drop(columns=list(COMPACT_FIELDS))
+        return cls(origins, local, residual if exact else {}, columns, df.attrs.get('dialect', 'lane'))
+
+    @classmethod
+    def from_binary(cls, track):
+        """
+        compact 형식으로 저장한 이진 트랙 (track_binary.BinaryTrack) 의 레코드를 복사 없이 사용합니다.
+        """
+        missing = [name for name in COMPACT_FIELDS if name not in track.origins or track.dtype[name] != np.float32]
+        if missing:
+            raise ValueError(f"{track.path} 는 compact 형식이 아닙니다: {missing}")
+        local = {name: track.records[name] for name in COMPACT_FIELDS}
+        residual = {name: track.records[name + RESIDUAL_SUFFIX] for name in COMPACT_FIELDS
+                    if name + RESIDUAL_SUFFIX in track.dtype.names}
+        frame = track.to_frame()
+        columns = frame.drop(columns=list(COMPACT_FIELDS))
+        return cls(dict(track.origins), local, residual, columns, track.dialect)
+
+    def __len__(self):
+        return len(self.columns)
+
+    @property
+    def origin(self):
+        return np.array([self.origins['utm_easting'], self.origins['utm_northing']])
+
+    def xy(self):
+        return np.column_stack([self.local['utm_easting'], self.local['utm_northing']])
+
+    def column(self, name):
+        if name in self.local:
+            return join_values(self.origins[name], self.local[name], self.residual.get(name))
+        return self.columns[name].to_numpy()
+
+    def valid_mask(self):
+        return np.isfinite(self.local['utm_easting']) & np.isfinite(self.local['utm_northing'])
+
+    def index(self, max_gap=5.0, **params):
+        """
+        좌표가 있는 점들로 구간 인덱스를 만듭니다 (원점 기준 float32 좌표를 그대로 사용).
+        """
+        xy = self.xy()[self.valid_mask()]
+        return SegmentIndex(xy, split_chains(xy, max_gap), origin=self.origin, **params)
+
+    def to_frame(self):
+        df = self.columns.copy()
+        for name in COMPACT_FIELDS:
+            df[name] = self.column(name)
+        extra = [c for c in df.columns if c not in CANONICAL_COLUMNS]
+        df = df[CANONICAL_COLUMNS + extra]
+        df.attrs['dialect'] = self.dialect
+        return df
+
+    def nbytes(self):
+        # 좌표 작업 배열 크기와 잔차 크기 (바이트)
+        return (sum(values.nbytes for values in self.local.values()),
+                sum(values.nbytes for values in self.residual.values()))
+
+
+def index_nbytes(index):
+    # 구간 인덱스의 좌표/구간 배열 크기 (KDTree 는 scipy 가 항상 float64 로 저장하므로 제외)
+    return sum(getattr(index, name).nbytes for name in ('xy', 'a', 'b', 'd', 'length', 'length_sq'))
+
+
+def check_file(path, samples=20000, max_gap=5.0, seed=0):
+    """
+    트랙 하나를 compact 형식으로 바꿔 좌표 오차, 정확한 복원 여부, 구간 인덱스 결과 차이, 메모리 크기를 측정합니다.
+    """
+    df = read_track(path)
+    try:
+        track = CompactTrack.from_frame(df)
+    except ValueError:
+        # (0, 0) 같은 튀는 점이 원점에서 너무 멀면 잔차 없이 비교
+        track = CompactTrack.from_frame(df, exact=False)
+    exact = all(np.array_equal(track.column(name), df[name].to_numpy(dtype=np.float64), equal_nan=True)
+                for name in COMPACT_FIELDS)
+    xy = df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)
+    rounded = join_values(track.origin, track.xy())
+    error = np.nanmax(np.hypot(*(rounded - xy).T)) if len(xy) else 0.0
+    working, residual = track.nbytes()
+    result = {'points': len(df), 'exact': exact, 'error': float(error),
+              'float64': len(df) * len(COMPACT_FIELDS) * 8, 'compact': working, 'residual': residual}
+
+    xy = xy[valid_mask(df)]
+    if len(xy) > 2:
+        full = SegmentIndex(xy, split_chains(xy, max_gap))
+        compact = track.index(max_gap)
+        rng = np.random.default_rng(seed)
+        points = xy[rng.integers(len(xy), size=samples)] + rng.normal(scale=2.0, size=(samples, 2))
+        a, b = full.nearest(points), compact.nearest(points)
+        # 두 구간까지 거리가 같은 점 (꼭짓점 근처) 은 어느 쪽을 골라도 맞으므로 거리 차이로 같은 결과로 봄
+        same = a['segment'] == b['segment']
+        result.update(index_float64=index_nbytes(full), index_compact=index_nbytes(compact),
+                      distance_error=float(np.abs(a['distance'] - b['distance']).max()),
+                      proj_error=float(np.hypot(*(a['proj'][same] - b['proj'][same]).T).max()),
+                      same_segment=float(np.mean(same | (np.abs(a['distance'] - b['distance']) < 1e-3))))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="좌표를 float64 원점 + float32 원점 기준 값으로 저장했을 때의 오차와 메모리 확인")
+    parser.add_argument('inputs', nargs='+', help="CSV 파일 또는 디렉토리")
+    parser.add_argument('--samples', type=int, default=20000, help="구간 인덱스 비교에 사용할 질의 점 개수")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    totals = np.zeros(3)
+    for path in paths:
+        start = time.perf_counter()
+        result = check_file(path, args.samples)
+        totals += (result['float64'], result['compact'], result['residual'])
+        line = (f"{path}: {result['points']} points, exact {result['exact']}, "
+                f"max error {result['error'] * 1000:.3f} mm, "
+                f"coordinates {result['float64'] / 1024:.0f} -> {result['compact'] / 1024:.0f} KiB")
+        if 'proj_error' in result:
+            line += (f", index {result['index_float64'] / 1024:.0f} -> {result['index_compact'] / 1024:.0f} KiB, "
+                     f"projection diff {result['proj_error'] * 1000:.3f} mm, "
+                     f"distance diff {result['distance_error'] * 1000:.3f} mm, "
+                     f"same segment {result['same_segment'] * 100:.2f}%")
+        print(line + f" ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    if len(paths) > 1:
+        print(f"Total coordinates {totals[0] / 2 ** 20:.1f} MiB -> {totals[1] / 2 ** 20:.1f} MiB "
+              f"(+{totals[2] / 2 ** 20:.1f} MiB residuals for exact export)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import os
+import argparse
+import numpy as np
+
+from track_io import read_track, write_track, valid_mask, list_csv_files
+
+
+def dedup_mask(xy, radius=0.1, revisits=False):
+    """
+    중복/정지 포인트를 제거하고 남길 점의 마스크를 반환합니다.
+
+    - 기본 모드: 마지막으로 남긴 점에서 radius(m) 이내인 연속 점을 제거 (정지 중 기록된 점)
+    - revisits=True: 앞서 남긴 모든 점 중 radius 이내에 있는 점을 제거 (같은 곳을 다시 지나간 점)
+
+    기본 모드는 한 번의 선형 스캔, revisits 모드는 UTM 좌표를 radius 크기 격자로 나눈 해시(dict)에서
+    주변 9 칸만 검사하므로 두 모드 모두 O(n) 입니다.
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    n = len(xy)
+    keep = np.ones(n, dtype=bool)
+    if n < 2 or radius <= 0:
+        return keep
+
+    if not revisits:
+        # 바로 앞 점과의 간격이 radius 이상이면 무조건 남으므로, 짧은 간격이 이어지는 점만 검사
+        step = np.hypot(*np.diff(xy, axis=0).T)
+        candidates = np.flatnonzero(step < radius) + 1
+        anchor = 0
+        radius_sq = radius * radius
+        for i in candidates:
+            if keep[i - 1]:
+                anchor = i - 1
+            dx = xy[i, 0] - xy[anchor, 0]
+            dy = xy[i, 1] - xy[anchor, 1]
+            if dx * dx + dy * dy < radius_sq:
+                keep[i] = False
+        return keep
+
+    cells = np.floor(xy / radius).astype(np.int64)
+    grid = {}
+    radius_sq = radius * radius
+    for i in range(n):
+        cx, cy = cells[i]
+        duplicate = False
+        for nx in (cx - 1, cx, cx + 1):
+            for ny in (cy - 1, cy, cy + 1):
+                for j in grid.get((nx, ny), ()):
+                    dx = xy[i, 0] - xy[j, 0]
+                    dy = xy[i, 1] - xy[j, 1]
+                    if dx * dx + dy * dy < radius_sq:
+                        duplicate = True
+                        break
+                if duplicate:
+                    break
+            if duplicate:
+                break
+        if duplicate:
+            keep[i] = False
+        else:
+            grid.setdefault((cx, cy), []).append(i)
+    return keep
+
+
+def dedup_track(df, radius=0.1, revisits=False):
+    """
+    표준 DataFrame 에서 중복/정지 포인트를 제거한 새 DataFrame 을 반환합니다.
+    좌표가 없는 라벨 행은 그대로 유지합니다.
+
+    Returns:
+    - (결과 DataFrame, 제거된 원래 행 번호 배열)
+    """
+    valid = valid_mask(df)
+    rows = np.flatnonzero(valid)
+    keep = np.ones(len(df), dtype=bool)
+    keep[rows] = dedup_mask(df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows], radius, revisits)
+    removed = np.flatnonzero(~keep)
+    return df.loc[keep].reset_index(drop=True), removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="중복/정지 포인트 제거")
+    parser.add_argument('inputs', nargs='+', help="CSV 파일 또는 디렉토리")
+    parser.add_argument('--radius', type=float, default=0.1, help="중복으로 판단하는 거리 (m)")
+    parser.add_argument('--revisits', action='store_true', help="다시 지나간 점도 제거")
+    parser.add_argument('--output-dir', default=None, help="출력 디렉토리 (기본: 입력 파일 위치에 dedup_ 접두사)")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    if args.output_dir and not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    for path in paths:
+        df = read_track(path)
+        out, removed = dedup_track(df, args.radius, args.revisits)
+        if args.output_dir:
+            output_path = os.path.join(args.output_dir, os.path.basename(path))
+        else:
+            output_path = os.path.join(os.path.dirname(path), f"dedup_{os.path.basename(path)}")
+        write_track(out, output_path)
+        print(f"{path}: {len(df)} -> {len(out)} points ({len(removed)} removed), saved as {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import os
+import argparse
+import numpy as np
+
+from track_io import read_track, write_track, valid_mask, list_csv_files
+
+
+def segment_lengths(xy):
+    """
+    연속한 점 사이의 거리 (N-1 개)를 반환합니다.
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    return np.hypot(*np.diff(xy, axis=0).T) if len(xy) > 1 else np.empty(0)
+
+
+def arc_length(xy):
+    """
+    첫 점부터의 누적 거리 (N 개)를 반환합니다.
+    """
+    return np.concatenate([[0.0], np.cumsum(segment_lengths(xy))])
+
+
+def distinct_mask(xy, min_step=1e-3):
+    """
+    길이가 0 에 가까운 구간을 만드는 연속 중복점을 제외하는 마스크를 반환합니다.
+    """
+    if len(xy) < 2:
+        return np.ones(len(xy), dtype=bool)
+    step = np.hypot(*np.diff(xy, axis=0).T)
+    return np.concatenate([[True], step > min_step])
+
+
+def densify(xy, spacing):
+    """
+    폴리라인을 spacing(m) 이하 간격으로 나눈 점 배열과 각 점의 호 길이를 반환합니다 (원래 꼭짓점 포함).
+    """
+    seg = np.diff(xy, axis=0)
+    count = np.maximum(np.ceil(np.hypot(seg[:, 0], seg[:, 1]) / spacing).astype(np.int64), 1)
+    start = np.repeat(np.arange(len(seg)), count)
+    ratio = (np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)) / np.repeat(count, count)
+    points = xy[start] + seg[start] * ratio[:, None]
+    vertex_s = np.concatenate([[0.0], np.cumsum(np.hypot(seg[:, 0], seg[:, 1]))])
+    arc = vertex_s[start] + (vertex_s[start + 1] - vertex_s[start]) * ratio
+    return np.vstack([points, xy[-1:]]), np.concatenate([arc, vertex_s[-1:]])
+
+
+def resample_polyline(xy, spacing):
+    """
+    폴리라인을 호 길이 기준으로 spacing(m) 간격의 점들로 다시 나눕니다.
+    첫 점과 마지막 점은 항상 포함됩니다.
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    s = arc_length(xy)
+    if len(xy) < 2 or s[-1] == 0:
+        return xy.copy()
+    # 중복점 때문에 s 가 같은 값이 반복되면 보간이 흔들리므로 제거
+    keep = np.concatenate([[True], np.diff(s) > 0])
+    s, xy = s[keep], xy[keep]
+    count = max(int(np.ceil(s[-1] / spacing)), 1)
+    target = np.linspace(0.0, s[-1], count + 1)
+    return np.column_stack([np.interp(target, s, xy[:, 0]), np.interp(target, s, xy[:, 1])])
+
+
+# 경로에서 계산하여 추가하는 점별 기하 정보 컬럼
+GEOMETRY_COLUMNS = ['heading', 'curvature', 'segment_length', 'cumulative_distance']
+
+
+def compute_geometry(xy):
+    """
+    UTM 좌표 배열에서 점별 기하 정보를 유한 차분으로 한 번에 계산합니다.
+
+    Returns:
+    - dict:
+      heading: 진행 방향 (도, 동쪽 0 / 반시계 방향 양수, ENU yaw). 양 끝점은 한쪽 차분, 나머지는 중앙 차분
+      curvature: 앞/현재/뒤 세 점을 지나는 원의 부호 있는 곡률 (1/m, 왼쪽으로 돌면 양수). 양 끝점은 0
+      segment_length: 다음 점까지의 거리 (m). 마지막 점은 0
+      cumulative_distance: 첫 점부터의 누적 거리 (m)
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    n = len(xy)
+    heading = np.zeros(n)
+    curvature = np.zeros(n)
+    segment_length = np.zeros(n)
+    if n < 2:
+        return {
+            'heading': heading, 'curvature': curvature,
+            'segment_length': segment_length, 'cumulative_distance': np.zeros(n),
+        }
+
+    seg = np.diff(xy, axis=0)
+    step = np.hypot(seg[:, 0], seg[:, 1])
+    segment_length[:-1] = step
+
+    direction = np.empty_like(xy)
+    direction[0] = seg[0]
+    direction[-1] = seg[-1]
+    direction[1:-1] = xy[2:] - xy[:-2]
+    heading = np.degrees(np.arctan2(direction[:, 1], direction[:, 0]))
+
+    if n >= 3:
+        # Menger 곡률: 4 * 삼각형 넓이 / (세 변 길이의 곱)
+        cross = seg[:-1, 0] * seg[1:, 1] - seg[:-1, 1] * seg[1:, 0]
+        chord = np.hypot(*(xy[2:] - xy[:-2]).T)
+        denominator = step[:-1] * step[1:] * chord
+        with np.errstate(divide='ignore', invalid='ignore'):
+            curvature[1:-1] = np.where(denominator > 1e-12, 2.0 * cross / denominator, 0.0)
+
+    return {
+        'heading': heading,
+        'curvature': curvature,
+        'segment_length': segment_length,
+        'cumulative_distance': np.concatenate([[0.0], np.cumsum(step)]),
+    }
+
+
+def add_geometry_columns(df):
+    """
+    표준 DataFrame 에 기하 정보 컬럼을 추가한 새 DataFrame 을 반환합니다.
+    좌표가 없는 라벨 행은 NaN 으로 채웁니다.
+    """
+    df = df.copy()
+    rows = np.flatnonzero(valid_mask(df))
+    geometry = compute_geometry(df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows])
+    for column in GEOMETRY_COLUMNS:
+        values = np.full(len(df), np.nan)
+        values[rows] = geometry[column]
+        df[column] = values
+    return df
+
+
+def update_geometry(df, indices):
+    """
+    편집된 행 주변만 기하 정보를 다시 계산합니다 (df 를 직접 수정).
+
+    heading / curvature 는 앞뒤 한 점, segment_length 는 바로 앞 점까지 영향을 받으므로
+    변경된 행에서 ±2 범위의 연속 구간별로만 compute_geometry 를 다시 적용합니다.
+    cumulative_distance 는 가장 앞쪽 변경 위치부터 segment_length 의 누적합으로 이어 붙입니다.
+
+    Parameters:
+    - df: 기하 정보 컬럼을 가진 표준 DataFrame (행 추가/삭제 후라면 새 행 번호 기준)
+    - indices: 좌표가 바뀌었거나 새로 생긴 행, 또는 삭제된 행 바로 뒤의 행 번호
+    """
+    if not set(GEOMETRY_COLUMNS).issubset(df.columns):
+        geometry = add_geometry_columns(df)
+        for column in GEOMETRY_COLUMNS:
+            df[column] = geometry[column]
+        return df
+
+    rows = np.flatnonzero(valid_mask(df))
+    count = len(rows)
+    if count == 0:
+        return df
+    xy = df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows]
+
+    # 변경된 행을 유효 행 기준 위치로 바꾸고 영향 범위 (±2) 로 넓힘
+    position = np.searchsorted(rows, np.asarray(list(indices), dtype=np.int64))
+    if position.size == 0:
+        return df
+    affected = np.unique(np.clip(position[:, None] + np.arange(-2, 3), 0, count - 1))
+
+    values = {column: df[column].to_numpy(dtype=np.float64)[rows] for column in GEOMETRY_COLUMNS}
+    values['segment_length'] = np.nan_to_num(values['segment_length'])
+
+    # 연속된 위치끼리 묶어 블록마다 앞뒤 한 점씩 여유를 두고 다시 계산
+    blocks = np.split(affected, np.flatnonzero(np.diff(affected) > 1) + 1)
+    for block in blocks:
+        lo, hi = max(block[0] - 1, 0), min(block[-1] + 2, count)
+        local = compute_geometry(xy[lo:hi])
+        inner = slice(block[0] - lo, block[-1] - lo + 1)
+        for column in ('heading', 'curvature', 'segment_length'):
+            values[column][block[0]:block[-1] + 1] = local[column][inner]
+
+    start = affected[0]
+    base = values['cumulative_distance'][start - 1] + values['segment_length'][start - 1] if start > 0 else 0.0
+    values['cumulative_distance'][start:] = base + np.concatenate(
+        [[0.0], np.cumsum(values['segment_length'][start:-1])]
+    )
+
+    for column in GEOMETRY_COLUMNS:
+        full = df[column].to_numpy(dtype=np.float64).copy()
+        full[rows] = values[column]
+        df[column] = full
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="heading, curvature, segment_length, cumulative_distance 컬럼 추가")
+    parser.add_argument('inputs', nargs='+', help="CSV 파일 또는 디렉토리")
+    parser.add_argument('--output-dir', default=None, help="출력 디렉토리 (기본: 입력 파일 위치에 geometry_ 접두사)")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    if args.output_dir and not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    for path in paths:
+        df = add_geometry_columns(read_track(path))
+        if args.output_dir:
+            output_path = os.path.join(args.output_dir, os.path.basename(path))
+        else:
+            output_path = os.path.join(os.path.dirname(path), f"geometry_{os.path.basename(path)}")
+        write_track(df, output_path)
+        print(f"Processed {path}, saved as {output_path}")
+
+
+if __name__ == "__main__":
+    main()
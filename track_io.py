@@ -0,0 +1,214 @@
+import os
+import numpy as np
+import pandas as pd
+import utm
+
+# 프로젝트 내부에서 사용하는 표준 컬럼 (lane map 형식과 동일)
+CANONICAL_COLUMNS = ['latitude', 'longitude', 'utm_easting', 'utm_northing', 'utm_zone_number']
+
+# 저장 형식별 컬럼 순서
+LANE_COLUMNS = CANONICAL_COLUMNS
+WAYPOINT_COLUMNS = ['seq', 'latitude', 'longitude', 'latitude_utm', 'longitude_utm', 'option']
+
+# 예전 파일에 섞여 있는 컬럼 이름 (오타 포함)을 표준 이름으로 맞춤
+# waypoint 형식의 latitude_utm / longitude_utm 은 실제로 easting / northing 이다 (lane_to_waypoint.py 참고)
+COLUMN_ALIASES = {
+    'llatitude': 'latitude',
+    'longtitude': 'longitude',
+    'latitude_utm': 'utm_easting',
+    'llatitude_utm': 'utm_easting',
+    'longitude_utm': 'utm_northing',
+    'x': 'utm_easting',
+    'y': 'utm_northing',
+}
+
+# 존 정보가 없는 파일의 기본값 (utm_to_WG.py 와 동일하게 52S)
+DEFAULT_ZONE_NUMBER = 52
+DEFAULT_ZONE_LETTER = 'S'
+
+
+def parse_zone(zone):
+    """
+    '52S' 형태의 존 문자열을 (52, 'S') 로 분리합니다.
+    """
+    zone = str(zone).strip()
+    number = int(''.join(ch for ch in zone if ch.isdigit()) or DEFAULT_ZONE_NUMBER)
+    letter = ''.join(ch for ch in zone if ch.isalpha()).upper() or DEFAULT_ZONE_LETTER
+    return number, letter
+
+
+def latlon_to_utm(latitude, longitude, zone=None):
+    """
+    위도/경도 배열을 한 번에 UTM 으로 변환합니다.
+    zone 을 지정하지 않으면 첫 번째 점의 존을 사용합니다 (한 파일은 한 존 안에 있다고 가정).
+
+    Returns:
+    - easting, northing (numpy 배열), zone 문자열 ('52S')
+    """
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    if latitude.size == 0:
+        return latitude.copy(), longitude.copy(), f"{DEFAULT_ZONE_NUMBER}{DEFAULT_ZONE_LETTER}"
+    if zone is None:
+        easting, northing, zone_number, zone_letter = utm.from_latlon(latitude, longitude)
+    else:
+        zone_number, zone_letter = parse_zone(zone)
+        easting, northing, _, _ = utm.from_latlon(
+            latitude, longitude, force_zone_number=zone_number, force_zone_letter=zone_letter
+        )
+    return np.asarray(easting), np.asarray(northing), f"{zone_number}{zone_letter}"
+
+
+def utm_to_latlon(easting, northing, zone=None):
+    """
+    UTM 배열을 한 번에 위도/경도로 변환합니다.
+    """
+    easting = np.asarray(easting, dtype=np.float64)
+    northing = np.asarray(northing, dtype=np.float64)
+    if easting.size == 0:
+        return easting.copy(), northing.copy()
+    zone_number, zone_letter = parse_zone(zone if zone is not None else f"{DEFAULT_ZONE_NUMBER}{DEFAULT_ZONE_LETTER}")
+    latitude, longitude = utm.to_latlon(easting, northing, zone_number, zone_letter, strict=False)
+    return np.asarray(latitude), np.asarray(longitude)
+
+
+def detect_dialect(columns):
+    """
+    CSV 컬럼을 보고 파일 형식을 판별합니다.
+
+    - 'waypoint': seq, latitude, longitude, latitude_utm, longitude_utm, option
+    - 'lane': latitude, longitude, utm_easting, utm_northing, utm_zone_number
+    - 'latlon': latitude, longitude 만 있는 기록 파일
+    - 'utm': UTM 좌표만 있는 파일 (T_parking/tp_*.csv 등)
+    """
+    columns = set(columns)
+    if 'seq' in columns:
+        return 'waypoint'
+    if {'utm_easting', 'utm_northing'}.issubset(columns):
+        return 'lane'
+    if {'latitude', 'longitude'}.issubset(columns) or {'llatitude', 'longitude'}.issubset(columns):
+        return 'latlon'
+    return 'utm'
+
+
+def normalize_track(df, dialect=None):
+    """
+    어떤 형식의 DataFrame 이든 표준 컬럼을 모두 갖춘 DataFrame 으로 변환합니다.
+    표준 컬럼 이외의 컬럼 (seq, option 등)은 그대로 유지합니다.
+    """
+    if dialect is None:
+        dialect = detect_dialect(df.columns)
+    df = df.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if k in df.columns and v not in df.columns})
+
+    has_latlon = {'latitude', 'longitude'}.issubset(df.columns)
+    has_utm = {'utm_easting', 'utm_northing'}.issubset(df.columns)
+    if not has_latlon and not has_utm:
+        raise ValueError("CSV에는 위도/경도 또는 UTM 좌표 컬럼이 포함되어 있어야 합니다.")
+
+    zone = df['utm_zone_number'].iloc[0] if 'utm_zone_number' in df.columns and len(df) else None
+    if not has_utm:
+        easting, northing, zone = latlon_to_utm(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+        df['utm_easting'] = easting
+        df['utm_northing'] = northing
+    if not has_latlon:
+        latitude, longitude = utm_to_latlon(df['utm_easting'].to_numpy(), df['utm_northing'].to_numpy(), zone)
+        df['latitude'] = latitude
+        df['longitude'] = longitude
+    if 'utm_zone_number' not in df.columns:
+        df['utm_zone_number'] = zone if zone is not None else f"{DEFAULT_ZONE_NUMBER}{DEFAULT_ZONE_LETTER}"
+
+    extra = [c for c in df.columns if c not in CANONICAL_COLUMNS]
+    df = df[CANONICAL_COLUMNS + extra].reset_index(drop=True)
+    df.attrs['dialect'] = dialect
+    return df
+
+
+def valid_mask(df):
+    """
+    실제 좌표가 있는 행의 마스크를 반환합니다.
+    merge_waypoint 파일의 '06_start' 같은 라벨 행은 좌표가 비어 있거나 0 이므로 제외됩니다.
+    """
+    easting = df['utm_easting'].to_numpy(dtype=np.float64)
+    northing = df['utm_northing'].to_numpy(dtype=np.float64)
+    return np.isfinite(easting) & np.isfinite(northing) & (easting != 0) & (northing != 0)
+
+
+def split_labels(df):
+    """
+    좌표가 없는 라벨 행을 떼어 냅니다. 두 DataFrame 모두 원래 행 번호를 'row' 컬럼으로 가지므로
+    좌표 행을 편집한 뒤 merge_labels 로 라벨 행을 제자리에 다시 넣을 수 있습니다.
+
+    Returns:
+    - (좌표 행 DataFrame, 라벨 행 DataFrame)
+    """
+    mask = valid_mask(df)
+    df = df.assign(row=np.arange(len(df)))
+    return df[mask].reset_index(drop=True), df[~mask].reset_index(drop=True)
+
+
+def merge_labels(df, labels):
+    """
+    split_labels 로 떼어 낸 라벨 행을 편집한 좌표 행 사이에 끼워 넣고 'row' 컬럼을 지웁니다.
+    라벨 행은 원래 행 번호가 더 큰 첫 좌표 행 앞에 들어가며, 새로 추가한 점 ('row' 가 빈 행) 은 앞 점의 자리를 따릅니다.
+    """
+    if not len(labels):
+        return df.drop(columns='row')
+    anchor = np.maximum.accumulate(df['row'].ffill().fillna(-1).to_numpy(dtype=np.float64))
+    position = np.searchsorted(anchor, labels['row'].to_numpy(dtype=np.float64))
+    # 같은 자리의 라벨 행은 원래 순서대로 그 좌표 행 바로 앞에 놓임 (안정 정렬)
+    order = np.argsort(np.concatenate([np.arange(len(df)), position - 0.5]), kind='stable')
+    merged = pd.concat([df, labels], ignore_index=True).iloc[order]
+    return merged.drop(columns='row').reset_index(drop=True)
+
+
+def read_track(file_path):
+    """
+    CSV 파일을 읽어 표준 컬럼을 갖춘 DataFrame 으로 반환합니다.
+    원래 형식은 df.attrs['dialect'] 에 저장됩니다.
+    """
+    return normalize_track(pd.read_csv(file_path))
+
+
+def to_dialect(df, dialect='lane'):
+    """
+    표준 DataFrame 을 저장 형식에 맞게 변환합니다.
+    """
+    if dialect == 'waypoint':
+        out = df.rename(columns={'utm_easting': 'latitude_utm', 'utm_northing': 'longitude_utm'})
+        if 'seq' not in out.columns:
+            out['seq'] = range(1, len(out) + 1)
+        else:
+            # 라벨 행 (좌표 없음) 때문에 float 로 읽힌 seq 를 정수로 되돌림
+            out['seq'] = out['seq'].astype('Int64')
+        if 'option' not in out.columns:
+            out['option'] = 0
+        extra = [c for c in out.columns if c not in WAYPOINT_COLUMNS and c not in CANONICAL_COLUMNS]
+        out = out[WAYPOINT_COLUMNS + extra]
+    else:
+        extra = [c for c in df.columns if c not in CANONICAL_COLUMNS and c not in ('seq', 'option')]
+        out = df[LANE_COLUMNS + extra]
+    # 원본의 이름 없는 컬럼 (merge_waypoint 파일의 라벨 칸 등)은 빈 헤더로 되돌림
+    return out.rename(columns={c: '' for c in out.columns if str(c).startswith('Unnamed:')})
+
+
+def write_track(df, file_path, dialect=None):
+    """
+    DataFrame 을 지정한 형식 ('lane' 또는 'waypoint')으로 저장합니다.
+    dialect 가 없으면 읽을 때의 형식을 따르며, 'latlon' / 'utm' 형식은 lane 형식으로 저장합니다.
+    """
+    if dialect is None:
+        dialect = df.attrs.get('dialect', 'lane')
+    if dialect not in ('lane', 'waypoint'):
+        dialect = 'lane'
+    to_dialect(df, dialect).to_csv(file_path, index=False)
+
+
+def list_csv_files(directory):
+    """
+    디렉토리 안의 .csv 파일 경로를 이름순으로 반환합니다.
+    """
+    return [
+        os.path.join(directory, filename)
+        for filename in sorted(os.listdir(directory))
+        if filename.endswith('.csv')
+    ]
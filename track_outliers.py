@@ -0,0 +1,164 @@
+import os
+import argparse
+import numpy as np
+
+from track_io import read_track, write_track, valid_mask, utm_to_latlon, list_csv_files
+
+
+def detect_outliers(xy, max_step=None, step_factor=5.0, max_turn_deg=120.0, min_offset=1.0,
+                    max_accel=None, dt=0.1):
+    """
+    경로 전체의 구간 길이, 방향 변화, 가속도를 한 번에 계산하여 멀티패스 튐 점을 찾습니다.
+
+    판단 기준 (양 끝점은 제외):
+    - 'jump': 들어오는 구간과 나가는 구간이 모두 max_step 보다 긴 점
+    - 'turn': 방향이 max_turn_deg 이상 꺾이면서 앞뒤 점을 잇는 선에서 min_offset(m) 이상 벗어난 점
+    - 'accel': 일정한 기록 주기 dt(s)로 보았을 때 구간 길이 변화로 계산한 가속도가
+      바로 앞 점에서 +max_accel(m/s^2) 을, 바로 뒤 점에서 -max_accel 을 넘는 점
+
+    Parameters:
+    - xy: (N x 2) UTM 좌표
+    - max_step: 최대 구간 길이 (m). None 이면 중앙값 구간 길이 x step_factor
+
+    Returns:
+    - dict: step, turn_deg, accel, offset (점별 값), flags (점별 bool), reason (점별 문자열)
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    n = len(xy)
+    report = {
+        'step': np.zeros(n),
+        'turn_deg': np.zeros(n),
+        'accel': np.zeros(n),
+        'offset': np.zeros(n),
+        'flags': np.zeros(n, dtype=bool),
+        'reason': np.full(n, '', dtype=object),
+    }
+    if n < 3:
+        return report
+
+    seg = np.diff(xy, axis=0)
+    step = np.hypot(seg[:, 0], seg[:, 1])
+    if max_step is None:
+        moving = step[step > 0]
+        max_step = step_factor * float(np.median(moving)) if len(moving) else np.inf
+    report['step'][1:] = step
+
+    # 꼭짓점 i 의 값은 구간 i-1 (들어옴) 과 구간 i (나감) 으로 계산
+    step_in, step_out = step[:-1], step[1:]
+    heading = np.arctan2(seg[:, 1], seg[:, 0])
+    turn = np.degrees(np.abs((np.diff(heading) + np.pi) % (2 * np.pi) - np.pi))
+    # 꼭짓점 i 의 가속도 = (나가는 구간 길이 - 들어오는 구간 길이) / dt^2
+    accel = np.diff(step) / dt ** 2
+    accel_at = np.zeros(n)
+    accel_at[1:-1] = accel
+
+    # 앞뒤 점을 잇는 선분에서 벗어난 거리
+    a, b, p = xy[:-2], xy[2:], xy[1:-1]
+    chord = b - a
+    chord_sq = np.maximum(np.einsum('ij,ij->i', chord, chord), 1e-12)
+    t = np.clip(np.einsum('ij,ij->i', p - a, chord) / chord_sq, 0.0, 1.0)
+    offset = np.hypot(*(p - (a + chord * t[:, None])).T)
+
+    jump = (step_in > max_step) & (step_out > max_step)
+    sharp = (turn >= max_turn_deg) & (offset >= min_offset)
+    if max_accel is None:
+        spike_accel = np.zeros(n - 2, dtype=bool)
+    else:
+        # 튄 점은 바로 앞 점에서 급가속, 바로 뒤 점에서 급감속한 것처럼 보임
+        spike_accel = (accel_at[:-2] > max_accel) & (accel_at[2:] < -max_accel)
+
+    reason = np.full(n - 2, '', dtype=object)
+    for name, mask in (('jump', jump), ('turn', sharp), ('accel', spike_accel)):
+        reason[mask] = np.where(reason[mask] == '', name, reason[mask] + ',' + name)
+
+    report['turn_deg'][1:-1] = turn
+    report['accel'][1:-1] = accel
+    report['offset'][1:-1] = offset
+    report['flags'][1:-1] = jump | sharp | spike_accel
+    report['reason'][1:-1] = reason
+    return report
+
+
+def repair_outliers(xy, flags):
+    """
+    표시된 점을 앞뒤 정상 점 사이의 점 번호(기록 순서) 기준 선형 보간으로 대체합니다.
+    튄 점의 위치는 믿을 수 없으므로 거리 대신 번호로 보간합니다.
+    """
+    xy = np.asarray(xy, dtype=np.float64).copy()
+    flags = np.asarray(flags, dtype=bool)
+    good = np.flatnonzero(~flags)
+    bad = np.flatnonzero(flags)
+    if len(good) < 2 or len(bad) == 0:
+        return xy
+    xy[bad, 0] = np.interp(bad, good, xy[good, 0])
+    xy[bad, 1] = np.interp(bad, good, xy[good, 1])
+    return xy
+
+
+def check_track(df, repair=False, **params):
+    """
+    표준 DataFrame 을 검사하고 (repair=True 이면 보정한 DataFrame 과) 보고서를 반환합니다.
+    보고서의 점 번호는 DataFrame 의 행 번호입니다.
+    """
+    rows = np.flatnonzero(valid_mask(df))
+    xy = df[['utm_easting', 'utm_northing']].to_numpy(dtype=np.float64)[rows]
+    report = detect_outliers(xy, **params)
+    report['rows'] = rows
+    report['flagged'] = rows[report['flags']]
+
+    if not repair or not report['flags'].any():
+        return df, report
+
+    fixed = repair_outliers(xy, report['flags'])
+    changed = rows[report['flags']]
+    zone = df['utm_zone_number'].iloc[rows[0]]
+    latitude, longitude = utm_to_latlon(fixed[report['flags'], 0], fixed[report['flags'], 1], zone)
+    df = df.copy()
+    col = df.columns.get_loc
+    df.iloc[changed, col('utm_easting')] = fixed[report['flags'], 0]
+    df.iloc[changed, col('utm_northing')] = fixed[report['flags'], 1]
+    df.iloc[changed, col('latitude')] = latitude
+    df.iloc[changed, col('longitude')] = longitude
+    return df, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GPS 튐(outlier) 점 검사 및 보정")
+    parser.add_argument('inputs', nargs='+', help="CSV 파일 또는 디렉토리")
+    parser.add_argument('--max-step', type=float, default=None, help="최대 구간 길이 (m, 기본: 중앙값 x 5)")
+    parser.add_argument('--max-turn', type=float, default=120.0, help="최대 방향 변화 (도)")
+    parser.add_argument('--min-offset', type=float, default=1.0, help="튐으로 볼 최소 이탈 거리 (m)")
+    parser.add_argument('--max-accel', type=float, default=None, help="최대 가속도 (m/s^2)")
+    parser.add_argument('--dt', type=float, default=0.1, help="기록 주기 (s)")
+    parser.add_argument('--repair', action='store_true', help="튄 점을 보간하여 repaired_ 파일로 저장")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.inputs:
+        paths.extend(list_csv_files(path) if os.path.isdir(path) else [path])
+
+    total = 0
+    for path in paths:
+        df = read_track(path)
+        fixed, report = check_track(
+            df, repair=args.repair, max_step=args.max_step, max_turn_deg=args.max_turn,
+            min_offset=args.min_offset, max_accel=args.max_accel, dt=args.dt
+        )
+        flagged = report['flagged']
+        total += len(flagged)
+        print(f"{path}: {len(flagged)} outliers / {len(report['rows'])} points")
+        for position in np.flatnonzero(report['flags']):
+            print(
+                f"  row {report['rows'][position]}: {report['reason'][position]} "
+                f"(step {report['step'][position]:.2f} m, turn {report['turn_deg'][position]:.0f} deg, "
+                f"offset {report['offset'][position]:.2f} m)"
+            )
+        if args.repair and len(flagged):
+            output_path = os.path.join(os.path.dirname(path), f"repaired_{os.path.basename(path)}")
+            write_track(fixed, output_path)
+            print(f"  saved as {output_path}")
+    print(f"Total {total} outliers in {len(paths)} files")
+
+
+if __name__ == "__main__":
+    main()
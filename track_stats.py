@@ -0,0 +1,170 @@
+import numpy as np
+
+
+class TrackStats:
+    """
+    편집 중인 경로의 길이/간격 통계를 점 추가, 삭제, 이동마다 O(k log n) 으로 갱신하는 구조입니다.
+
+    점마다 슬롯(slot)을 하나씩 두고, 슬롯 값은 "그 점에서 다음 점까지의 구간 길이" 입니다.
+    세그먼트 트리의 각 노드에 살아있는 점 개수, 구간 길이 합/최소/최대를 저장하므로
+    - i 번째 점의 슬롯 찾기, 누적 길이 (prefix sum), 전체 길이, 최소/최대 간격을 모두 O(log n) 에 구합니다.
+    삭제된 점은 슬롯을 비워 두고 (개수 0), 추가된 점은 새 슬롯에 붙입니다 (용량이 차면 두 배로 재구성).
+    """
+
+    def __init__(self, xy):
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        self._build(xy, max(len(xy), 16))
+
+    def _build(self, xy, capacity):
+        size = 1
+        while size < capacity:
+            size *= 2
+        self.size = size
+        self.xy = np.zeros((size, 2))
+        self.xy[:len(xy)] = xy
+        self.used = len(xy)  # 지금까지 사용한 슬롯 수 (새 점은 여기에 추가)
+
+        leaf = np.zeros(size)
+        if len(xy) > 1:
+            leaf[:len(xy) - 1] = np.hypot(*np.diff(xy, axis=0).T)
+        alive = np.zeros(size, dtype=np.int64)
+        alive[:len(xy)] = 1
+        has_segment = np.zeros(size, dtype=bool)
+        has_segment[:max(len(xy) - 1, 0)] = True
+
+        self.count = np.zeros(2 * size, dtype=np.int64)
+        self.total = np.zeros(2 * size)
+        self.low = np.full(2 * size, np.inf)
+        self.high = np.full(2 * size, -np.inf)
+        self.count[size:] = alive
+        self.total[size:] = leaf
+        self.low[size:] = np.where(has_segment, leaf, np.inf)
+        self.high[size:] = np.where(has_segment, leaf, -np.inf)
+        # 아래 레벨부터 한 레벨씩 한 번에 합침
+        level = size // 2
+        while level:
+            nodes = np.arange(level, 2 * level)
+            left, right = 2 * nodes, 2 * nodes + 1
+            self.count[nodes] = self.count[left] + self.count[right]
+            self.total[nodes] = self.total[left] + self.total[right]
+            self.low[nodes] = np.minimum(self.low[left], self.low[right])
+            self.high[nodes] = np.maximum(self.high[left], self.high[right])
+            level //= 2
+
+    def _pull(self, node):
+        left, right = 2 * node, 2 * node + 1
+        self.count[node] = self.count[left] + self.count[right]
+        self.total[node] = self.total[left] + self.total[right]
+        self.low[node] = min(self.low[left], self.low[right])
+        self.high[node] = max(self.high[left], self.high[right])
+
+    def _set(self, slot, length=None, alive=None):
+        # length=None 이면 구간 없음 (마지막 점이거나 삭제된 점)
+        node = self.size + slot
+        if alive is not None:
+            self.count[node] = int(alive)
+        self.total[node] = 0.0 if length is None else length
+        self.low[node] = np.inf if length is None else length
+        self.high[node] = -np.inf if length is None else length
+        node //= 2
+        while node:
+            self._pull(node)
+            node //= 2
+
+    def __len__(self):
+        return int(self.count[1])
+
+    def slot(self, index):
+        """
+        index 번째 (0 부터) 살아있는 점의 슬롯 번호를 반환합니다.
+        """
+        if index < 0 or index >= len(self):
+            raise IndexError(index)
+        node = 1
+        while node < self.size:
+            if index < self.count[2 * node]:
+                node = 2 * node
+            else:
+                index -= self.count[2 * node]
+                node = 2 * node + 1
+        return node - self.size
+
+    def _prefix(self, slot):
+        # slot 앞 슬롯들의 구간 길이 합
+        node = self.size + slot
+        total = 0.0
+        while node > 1:
+            if node % 2 == 1:
+                total += self.total[node - 1]
+            node //= 2
+        return total
+
+    def _refresh(self, index):
+        # index 번째 점에서 다음 점까지의 구간 길이를 다시 계산
+        if index < 0 or index >= len(self):
+            return
+        slot = self.slot(index)
+        if index == len(self) - 1:
+            self._set(slot, None)
+        else:
+            following = self.slot(index + 1)
+            self._set(slot, float(np.hypot(*(self.xy[following] - self.xy[slot]))))
+
+    def append(self, x, y):
+        """
+        경로 끝에 점을 추가합니다.
+        """
+        if self.used == self.size:
+            alive = np.flatnonzero(self.count[self.size:self.size + self.used])
+            self._build(self.xy[alive], 2 * len(alive) + 16)
+        slot = self.used
+        self.used += 1
+        self.xy[slot] = (x, y)
+        self._set(slot, None, alive=True)
+        self._refresh(len(self) - 2)
+
+    def delete(self, indices):
+        """
+        현재 번호 기준으로 여러 점을 삭제합니다.
+        """
+        indices = sorted(set(int(i) for i in indices), reverse=True)
+        for index in indices:
+            self._set(self.slot(index), None, alive=False)
+            self._refresh(index - 1)
+
+    def move(self, indices, xy):
+        """
+        지정한 점들의 좌표를 바꿉니다. 바뀐 점과 그 앞 점의 구간 길이만 다시 계산합니다.
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        for index, point in zip(indices, xy):
+            self.xy[self.slot(int(index))] = point
+        for index in sorted(set(int(i) for i in indices) | set(int(i) - 1 for i in indices)):
+            self._refresh(index)
+
+    def cumulative(self, index):
+        """
+        첫 점부터 index 번째 점까지의 누적 거리 (m).
+        """
+        return self._prefix(self.slot(index))
+
+    def length_between(self, first, last):
+        """
+        first 번째 점부터 last 번째 점까지 경로를 따라간 거리 (m).
+        """
+        first, last = sorted((first, last))
+        return self.cumulative(last) - self.cumulative(first)
+
+    def summary(self):
+        """
+        dict: count, total_length, min_spacing, mean_spacing, max_spacing (구간이 없으면 간격은 0)
+        """
+        count = len(self)
+        segments = max(count - 1, 0)
+        return {
+            'count': count,
+            'total_length': float(self.total[1]),
+            'min_spacing': float(self.low[1]) if segments else 0.0,
+            'mean_spacing': float(self.total[1]) / segments if segments else 0.0,
+            'max_spacing': float(self.high[1]) if segments else 0.0,
+        }
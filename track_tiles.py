@@ -0,0 +1,456 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from track_io import normalize_track, detect_dialect, to_dialect, valid_mask, utm_to_latlon, CANONICAL_COLUMNS
+
+# 타일 저장소 형식 버전
+FORMAT_VERSION = 2
+INDEX_FILE = 'tiles.json'
+# 라벨 행과 문자열 컬럼을 행 번호로 저장하는 표
+SIDE_FILE = 'rows.csv'
+# 레코드의 기본 필드 (row: 원래 파일의 행 번호, 트랙 순서를 유지하는 키)
+BASE_FIELDS = [('row', '<i8'), ('latitude', '<f8'), ('longitude', '<f8'), ('utm_easting', '<f8'), ('utm_northing', '<f8')]
+
+
+class TileStore:
+    """
+    UTM 좌표를 tile_size(m) 정사각형 타일로 나누어 디스크에 저장한 트랙입니다.
+
+    - tiles.json: 존, 타일 크기, 레코드 필드 (이름, dtype), 문자열 컬럼 이름, 타일별 점 개수/범위/첫 행과 마지막 행 번호
+    - tiles/<ix>_<iy>.bin: 타일 안 점들의 고정 길이 레코드 (row 와 정수 컬럼 int64, 나머지 float64), row 오름차순
+    - rows.csv: 좌표가 없는 라벨 행 (label 1, 모든 컬럼) 과 문자열 값이 있는 점의 문자열 컬럼 (label 0) 을
+      row 로 찾는 작은 표 (문자열 컬럼이나 라벨 행이 없으면 만들지 않음)
+    타일 단위로 읽고 쓰므로 메모리 사용량은 한 번에 다루는 타일 수 (와 라벨 표 크기) 로만 정해집니다.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 타일 형식 버전입니다: {meta['version']}")
+        self.meta = meta
+        self.zone = meta['zone']
+        self.tile_size = meta['tile_size']
+        self.dtype = np.dtype([tuple(field) for field in meta['fields']])
+        self.fields = list(self.dtype.names)
+        self.text_fields = meta['text_fields']
+        self.side = self._read_side()
+        self._keys()
+
+    def _keys(self):
+        # 타일 번호 배열 (뷰포트 검색용)
+        keys = list(self.meta['tiles'])
+        self.keys = keys
+        self.grid = np.array([parse_key(key) for key in keys], dtype=np.int64).reshape(-1, 2)
+
+    @classmethod
+    def create(cls, directory, zone, fields, tile_size=100.0, dialect='lane', text_fields=(), columns=None):
+        # fields: 레코드 필드 (이름, dtype) 목록, text_fields: 라벨 표에 저장할 문자열 컬럼 이름,
+        # columns: 내보낼 때의 추가 컬럼 순서 (기본: 레코드 필드 다음 문자열 컬럼)
+        # 같은 디렉토리에 다시 만들면 이전 저장소의 타일 파일과 라벨 표를 지움 (append 가 타일 끝에 이어 쓰므로)
+        os.makedirs(os.path.join(directory, 'tiles'), exist_ok=True)
+        for name in os.listdir(os.path.join(directory, 'tiles')):
+            if name.endswith(('.bin', '.tmp')):
+                os.remove(os.path.join(directory, 'tiles', name))
+        if os.path.exists(os.path.join(directory, SIDE_FILE)):
+            os.remove(os.path.join(directory, SIDE_FILE))
+        meta = {'version': FORMAT_VERSION, 'zone': zone, 'tile_size': tile_size, 'dialect': dialect,
+                'fields': [list(field) for field in fields], 'text_fields': list(text_fields),
+                'columns': list(columns) if columns is not None else [name for name, _ in fields[len(BASE_FIELDS):]] + list(text_fields),
+                'next_row': 0, 'tiles': {}}
+        _write_json(os.path.join(directory, INDEX_FILE), meta)
+        return cls(directory)
+
+    def _read_side(self):
+        # 라벨 표 (row 인덱스, label, 레코드 필드, 문자열 컬럼). 파일이 없으면 빈 표
+        columns = ['label'] + self.fields[1:] + self.text_fields
+        path = os.path.join(self.directory, SIDE_FILE)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=columns, index=pd.Index([], name='row', dtype=np.int64))
+        side = pd.read_csv(path, index_col='row', dtype={name: object for name in self.text_fields},
+                           float_precision='round_trip')
+        return side[columns]
+
+    def save_side(self, side):
+        # 라벨 표를 row 순서로 통째로 다시 씀 (임시 파일 후 교체)
+        self.side = side.sort_index()
+        path = os.path.join(self.directory, SIDE_FILE)
+        self.side.to_csv(path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+    def side_rows(self, df, labels=False):
+        """
+        DataFrame (row 컬럼 필요) 에서 라벨 표에 넣을 행을 만듭니다. labels 이면 모든 행을 라벨 행으로,
+        아니면 문자열 값이 하나라도 있는 행의 문자열 컬럼만 넣습니다.
+        """
+        text = [name for name in self.text_fields if name in df.columns]
+        if labels:
+            keep = np.ones(len(df), dtype=bool)
+        else:
+            keep = df[text].notna().any(axis=1).to_numpy() if text else np.zeros(len(df), dtype=bool)
+        side = pd.DataFrame(index=pd.Index(df['row'].to_numpy(dtype=np.int64)[keep], name='row'))
+        side['label'] = int(labels)
+        for name in self.fields[1:] + self.text_fields:
+            if name in df.columns and (labels or name in text):
+                side[name] = df[name].to_numpy()[keep]
+            else:
+                side[name] = np.nan
+        return side
+
+    def save_index(self):
+        _write_json(os.path.join(self.directory, INDEX_FILE), self.meta)
+        self._keys()
+
+    def tile_path(self, key):
+        return os.path.join(self.directory, 'tiles', f'{key}.bin')
+
+    def tile_keys(self, easting, northing):
+        ix = np.floor(np.asarray(easting) / self.tile_size).astype(np.int64)
+        iy = np.floor(np.asarray(northing) / self.tile_size).astype(np.int64)
+        return ix, iy
+
+    def tiles_in(self, bounds):
+        """
+        UTM 범위 (min_e, min_n, max_e, max_n) 와 겹치는 타일 이름 목록을 반환합니다.
+        """
+        (x0, y0), (x1, y1) = self.tile_keys(bounds[0], bounds[1]), self.tile_keys(bounds[2], bounds[3])
+        inside = (self.grid[:, 0] >= x0) & (self.grid[:, 0] <= x1) & (self.grid[:, 1] >= y0) & (self.grid[:, 1] <= y1)
+        return [self.keys[i] for i in np.flatnonzero(inside)]
+
+    def points_in(self, keys):
+        return sum(self.meta['tiles'][key]['points'] for key in keys)
+
+    def read_records(self, key):
+        if key not in self.meta['tiles']:
+            return np.empty(0, dtype=self.dtype)
+        return np.fromfile(self.tile_path(key), dtype=self.dtype)
+
+    def _write_records(self, key, records):
+        # 타일 파일을 통째로 다시 쓰고 (임시 파일 후 교체) 목차를 갱신
+        if len(records) == 0:
+            if key in self.meta['tiles']:
+                os.remove(self.tile_path(key))
+                del self.meta['tiles'][key]
+            return
+        records = np.sort(records, order='row')
+        temp = self.tile_path(key) + '.tmp'
+        records.tofile(temp)
+        os.replace(temp, self.tile_path(key))
+        self.meta['tiles'][key] = _tile_info(records)
+
+    def append(self, records):
+        """
+        레코드들을 타일별로 나누어 각 타일 파일 끝에 붙입니다 (row 가 기존보다 커야 정렬이 유지됨).
+        """
+        ix, iy = self.tile_keys(records['utm_easting'], records['utm_northing'])
+        for (x, y), group in _group(records, ix, iy):
+            key = make_key(x, y)
+            with open(self.tile_path(key), 'ab') as f:
+                group.tofile(f)
+            info = _tile_info(group)
+            old = self.meta['tiles'].get(key)
+            if old is not None:
+                info = {
+                    'points': old['points'] + info['points'],
+                    'bounds': [min(old['bounds'][0], info['bounds'][0]), min(old['bounds'][1], info['bounds'][1]),
+                               max(old['bounds'][2], info['bounds'][2]), max(old['bounds'][3], info['bounds'][3])],
+                    'first_row': min(old['first_row'], info['first_row']),
+                    'last_row': max(old['last_row'], info['last_row']),
+                }
+            self.meta['tiles'][key] = info
+        self.meta['next_row'] = max(self.meta['next_row'], int(records['row'].max()) + 1 if len(records) else 0)
+
+    def read_tiles(self, keys):
+        """
+        여러 타일을 읽어 row 순서로 합친 표준 DataFrame 을 반환합니다. 'row' 컬럼은 저장할 때 행을 찾는 키입니다.
+        """
+        records = [self.read_records(key) for key in keys]
+        records = np.sort(np.concatenate(records), order='row') if records else np.empty(0, dtype=self.dtype)
+        df = pd.DataFrame({name: records[name] for name in self.fields})
+        df['utm_zone_number'] = self.zone
+        if self.text_fields:
+            text = self.side.loc[self.side['label'] == 0, self.text_fields].reindex(records['row'])
+            for name in self.text_fields:
+                df[name] = text[name].to_numpy()
+        extra = [c for c in df.columns if c not in CANONICAL_COLUMNS]
+        df = df[CANONICAL_COLUMNS + extra]
+        df.attrs['dialect'] = self.meta['dialect']
+        return df
+
+    def write_tiles(self, keys, df):
+        """
+        read_tiles(keys) 로 읽어 편집한 DataFrame 을 타일에 다시 씁니다.
+        - keys 타일의 기존 내용은 df 로 바뀝니다 (df 에 없는 행은 삭제된 것으로 봄)
+        - 'row' 가 비어 있는 행 (새로 추가한 점) 은 새 행 번호를 받습니다
+        - 다른 타일로 옮겨간 점은 그 타일에 합쳐집니다
+        - 문자열 컬럼 값은 라벨 표에 다시 씁니다 (라벨 행은 그대로)
+
+        Returns:
+        - 내용이 바뀐 타일 이름 목록
+        """
+        df = df[valid_mask(df)]
+        df = df.assign(row=self.row_numbers(df))
+        if self.text_fields:
+            old = np.concatenate([self.read_records(key)['row'] for key in keys]) if keys else []
+            side = self.side[(self.side['label'] == 1) | ~self.side.index.isin(old)]
+            self.save_side(pd.concat([side, self.side_rows(df)]))
+        records = self.to_records(df)
+        ix, iy = self.tile_keys(records['utm_easting'], records['utm_northing'])
+        groups = {make_key(x, y): group for (x, y), group in _group(records, ix, iy)}
+        changed = []
+        for key in set(keys) | set(groups):
+            group = groups.get(key, np.empty(0, dtype=self.dtype))
+            if key not in keys:
+                # 읽지 않은 타일로 옮겨간 점: 기존 내용에 합침 (같은 행이 이미 있으면 새 값으로 바꿈)
+                old = self.read_records(key)
+                group = np.concatenate([old[~np.isin(old['row'], group['row'])], group])
+            self._write_records(key, group)
+            changed.append(key)
+        self.save_index()
+        return changed
+
+    def row_numbers(self, df):
+        # 행 번호 배열 ('row' 가 비어 있는 새 점은 새 행 번호)
+        row = pd.to_numeric(df['row'], errors='coerce').to_numpy(dtype=np.float64, copy=True) if 'row' in df.columns \
+            else np.full(len(df), np.nan)
+        new = np.isnan(row)
+        row[new] = self.meta['next_row'] + np.arange(new.sum())
+        self.meta['next_row'] += int(new.sum())
+        return row.astype(np.int64)
+
+    def to_records(self, df):
+        # DataFrame 을 레코드 배열로 변환 (좌표가 없는 행은 제외, 정수 필드의 빈 값은 0)
+        df = df[valid_mask(df)]
+        records = np.zeros(len(df), dtype=self.dtype)
+        records['row'] = self.row_numbers(df)
+        for name in self.fields[1:]:
+            if name not in df.columns:
+                records[name] = 0 if records.dtype[name].kind == 'i' else np.nan
+                continue
+            values = pd.to_numeric(df[name], errors='coerce')
+            if records.dtype[name].kind == 'i':
+                values = values.fillna(0)
+            records[name] = values.to_numpy(dtype=records.dtype[name])
+        return records
+
+    def bounds(self):
+        boxes = np.array([info['bounds'] for info in self.meta['tiles'].values()]).reshape(-1, 4)
+        return boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()
+
+    def first_tile(self):
+        # 트랙이 시작하는 타일 (첫 행이 들어 있는 타일)
+        return min(self.meta['tiles'], key=lambda key: self.meta['tiles'][key]['first_row'])
+
+
+def make_key(ix, iy):
+    return f'{int(ix)}_{int(iy)}'
+
+
+def parse_key(key):
+    ix, iy = key.split('_')
+    return int(ix), int(iy)
+
+
+def _write_json(path, data):
+    temp = path + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(temp, path)
+
+
+def _tile_info(records):
+    return {
+        'points': len(records),
+        'bounds': [float(records['utm_easting'].min()), float(records['utm_northing'].min()),
+                   float(records['utm_easting'].max()), float(records['utm_northing'].max())],
+        'first_row': int(records['row'].min()),
+        'last_row': int(records['row'].max()),
+    }
+
+
+def _group(records, ix, iy):
+    # 레코드를 타일 번호별로 묶어 ((ix, iy), 레코드) 로 반환 (타일 안 순서는 유지)
+    if len(records) == 0:
+        return []
+    cells = np.stack([ix, iy], axis=1)
+    unique, inverse = np.unique(cells, axis=0, return_inverse=True)
+    order = np.argsort(inverse.ravel(), kind='stable')
+    splits = np.cumsum(np.bincount(inverse.ravel(), minlength=len(unique)))[:-1]
+    return zip(map(tuple, unique), np.split(records[order], splits))
+
+
+def _check_fields(store, df, csv_path):
+    # 뒤쪽 묶음의 값이 첫 묶음에서 정한 필드 형식에 맞지 않으면 (숫자 필드의 문자열, 정수 필드의 소수/빈 값) 거부
+    for name in store.fields[len(BASE_FIELDS):]:
+        values = pd.to_numeric(df[name], errors='coerce')
+        bad = values.isna() & df[name].notna()
+        if store.dtype[name].kind == 'i':
+            bad |= values.isna() | (values % 1 != 0)
+        if bad.any():
+            raise ValueError(f"{csv_path}: '{name}' 컬럼의 {df['row'][bad].iloc[0]} 번째 행 값이 "
+                             f"{store.dtype[name]} 형식이 아닙니다.")
+
+
+def build_tiles(csv_path, directory, tile_size=100.0, chunk_rows=200000):
+    """
+    CSV 파일을 chunk_rows 행씩 읽어 타일 저장소로 변환합니다. 파일 전체를 메모리에 올리지 않습니다.
+    숫자 컬럼은 레코드에 (정수 컬럼은 int64 로) 저장하고, 문자열 컬럼 (라벨 등) 값과 좌표가 없는 행은
+    라벨 표에 저장하므로 export_tiles 로 원래 파일을 되돌릴 수 있습니다.
+
+    Returns:
+    - TileStore
+    """
+    store = None
+    row = 0
+    sides = []
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, float_precision='round_trip'):
+        dialect = detect_dialect(chunk.columns)
+        df = normalize_track(chunk, dialect).assign(row=row + np.arange(len(chunk)))
+        valid = valid_mask(df)
+        row += len(chunk)
+        if store is None:
+            # 첫 묶음에서 값이 있는 숫자 컬럼만 레코드 필드로 (비어 있는 컬럼은 뒤에 문자열이 나올 수 있으므로 문자열)
+            extra = [c for c in df.columns if c not in CANONICAL_COLUMNS and c != 'row']
+            numeric = [c for c in extra if df[c].dtype.kind in 'biuf' and df[c].notna().any()]
+            fields = [(c, '<i8' if df[c].dtype.kind in 'biu' else '<f8') for c in numeric]
+            text = [c for c in extra if c not in numeric]
+            zone = str(df.loc[valid, 'utm_zone_number'].iloc[0]) if valid.any() else '52S'
+            store = TileStore.create(directory, zone, BASE_FIELDS + fields, tile_size, dialect, text, extra)
+        _check_fields(store, df[valid], csv_path)
+        sides += [store.side_rows(df[~valid], labels=True), store.side_rows(df[valid])]
+        store.append(store.to_records(df[valid]))
+    store.meta['next_row'] = row
+    store.save_index()
+    side = pd.concat(sides)
+    if len(side):
+        store.save_side(side)
+    return store
+
+
+def export_tiles(store, csv_path, dialect=None, window=200000):
+    """
+    타일 저장소를 원래 행 순서대로 CSV 로 저장합니다. 행 번호 window 개씩, 그 범위와 겹치는 타일만 읽어
+    모아 쓰므로 메모리 사용량은 window 와 타일 크기에 비례합니다.
+
+    Returns:
+    - 저장한 점 개수
+    """
+    dialect = dialect or store.meta['dialect']
+    if dialect not in ('lane', 'waypoint'):
+        dialect = 'lane'
+    tiles = store.meta['tiles']
+    first = np.array([tiles[key]['first_row'] for key in store.keys])
+    last = np.array([tiles[key]['last_row'] for key in store.keys])
+    written = 0
+    side = store.side
+    for start in range(0, store.meta['next_row'], window):
+        parts = []
+        for i in np.flatnonzero((first < start + window) & (last >= start)):
+            records = store.read_records(store.keys[i])
+            lo, hi = np.searchsorted(records['row'], [start, start + window])
+            parts.append(records[lo:hi])
+        labels = side[(side['label'] == 1) & (side.index >= start) & (side.index < start + window)]
+        if not parts and not len(labels):
+            continue
+        records = np.sort(np.concatenate(parts), order='row') if parts else np.empty(0, dtype=store.dtype)
+        df = pd.DataFrame({name: records[name] for name in store.fields[1:]}, index=records['row'])
+        if store.text_fields:
+            text = side.loc[side['label'] == 0, store.text_fields].reindex(df.index)
+            for name in store.text_fields:
+                df[name] = text[name].to_numpy()
+        if len(labels):
+            # 라벨 행을 제자리에 끼워 넣음 (정수 필드는 빈 값이 있을 수 있으므로 Int64)
+            df = pd.concat([df, labels.drop(columns='label')]).sort_index()
+            for name in store.fields[1:]:
+                if store.dtype[name].kind == 'i':
+                    df[name] = df[name].astype('Int64')
+        df = df[[name for name, _ in BASE_FIELDS[1:]] + store.meta['columns']].reset_index(drop=True)
+        df['utm_zone_number'] = store.zone
+        if dialect == 'waypoint' and 'seq' not in df.columns:
+            df['seq'] = written + np.arange(1, len(df) + 1)
+        to_dialect(df, dialect).to_csv(csv_path, mode='a' if written else 'w', header=not written, index=False)
+        written += len(df)
+    return written
+
+
+def synthetic_track(path, points, seed=0, chunk_rows=200000):
+    """
+    벤치마크용 긴 주행 기록 (lane 형식, 0.2 m 간격 무작위 주행) 을 chunk_rows 행씩 CSV 로 씁니다.
+    """
+    rng = np.random.default_rng(seed)
+    position, heading = np.array([332254.5, 4128604.6]), 0.0
+    for start in range(0, points, chunk_rows):
+        n = min(chunk_rows, points - start)
+        headings = heading + np.cumsum(rng.normal(0.0, 0.02, n))
+        steps = 0.2 * np.stack([np.cos(headings), np.sin(headings)], axis=1)
+        xy = position + np.cumsum(steps, axis=0)
+        position, heading = xy[-1], headings[-1]
+        latitude, longitude = utm_to_latlon(xy[:, 0], xy[:, 1], '52S')
+        pd.DataFrame({
+            'latitude': latitude, 'longitude': longitude,
+            'utm_easting': xy[:, 0], 'utm_northing': xy[:, 1], 'utm_zone_number': '52S',
+        }).to_csv(path, mode='a' if start else 'w', header=not start, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="큰 트랙/lane map 을 UTM 타일 저장소로 변환하고 되돌림")
+    parser.add_argument('command', choices=['build', 'info', 'export', 'benchmark'],
+                        help="build: CSV -> 타일, info: 타일 정보, export: 타일 -> CSV, benchmark: 큰 가상 기록으로 측정")
+    parser.add_argument('store', help="타일 저장소 디렉토리")
+    parser.add_argument('csv', nargs='?', help="입력 CSV (build) 또는 출력 CSV (export)")
+    parser.add_argument('--tile-size', type=float, default=100.0, help="타일 한 변 길이 (m)")
+    parser.add_argument('--chunk-rows', type=int, default=200000, help="한 번에 읽는 CSV 행 수")
+    parser.add_argument('--dialect', choices=['lane', 'waypoint'], default=None, help="export 형식 (기본: 원래 형식)")
+    parser.add_argument('--points', type=int, default=5000000, help="benchmark 가상 기록의 점 개수")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        store = build_tiles(args.csv, args.store, args.tile_size, args.chunk_rows)
+        print(f"Built {len(store.keys)} tiles ({store.points_in(store.keys)} points) "
+              f"in {time.perf_counter() - start:.2f} s, saved in {args.store}")
+    elif args.command == 'info':
+        store = TileStore(args.store)
+        sizes = np.array([store.meta['tiles'][key]['points'] for key in store.keys])
+        print(f"{args.store}: zone {store.zone}, {store.tile_size:g} m tiles, fields {store.fields}, "
+              f"text {store.text_fields}, {int((store.side['label'] == 1).sum())} label rows")
+        print(f"{len(sizes)} tiles, {sizes.sum()} points, per tile mean {sizes.mean():.0f} / max {sizes.max()}")
+    elif args.command == 'export':
+        start = time.perf_counter()
+        written = export_tiles(TileStore(args.store), args.csv, args.dialect)
+        print(f"Exported {written} points in {time.perf_counter() - start:.2f} s, saved as {args.csv}")
+    else:
+        import resource
+        csv_path = args.csv or os.path.join(args.store + '_synthetic.csv')
+        start = time.perf_counter()
+        synthetic_track(csv_path, args.points)
+        print(f"Wrote {args.points} synthetic points to {csv_path} in {time.perf_counter() - start:.1f} s")
+        start = time.perf_counter()
+        store = build_tiles(csv_path, args.store, args.tile_size, args.chunk_rows)
+        print(f"build: {len(store.keys)} tiles in {time.perf_counter() - start:.1f} s")
+
+        # 화면 하나 (타일 3 x 3 범위) 를 읽고, 점 하나를 옮겨 다시 씀
+        center = np.array(store.meta['tiles'][store.first_tile()]['bounds']).reshape(2, 2).mean(axis=0)
+        half = 1.5 * store.tile_size
+        start = time.perf_counter()
+        keys = store.tiles_in((center[0] - half, center[1] - half, center[0] + half, center[1] + half))
+        df = store.read_tiles(keys)
+        loaded = time.perf_counter() - start
+        df.loc[0, 'utm_easting'] += 0.1
+        start = time.perf_counter()
+        changed = store.write_tiles(keys, df)
+        print(f"viewport: {len(keys)} tiles / {len(df)} points loaded in {loaded * 1000:.1f} ms, "
+              f"{len(changed)} tiles written back in {(time.perf_counter() - start) * 1000:.1f} ms")
+        start = time.perf_counter()
+        export_tiles(store, csv_path + '.export.csv')
+        print(f"export: {time.perf_counter() - start:.1f} s")
+        print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
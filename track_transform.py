@@ -0,0 +1,128 @@
+import os
+import argparse
+import numpy as np
+
+from track_io import read_track, write_track, utm_to_latlon
+
+
+def affine_matrix(rotation_deg=0.0, pivot=(0.0, 0.0), distance_m=0.0, bearing_deg=0.0,
+                  scale=1.0, mirror_axis_deg=None):
+    """
+    UTM 평면에서 사용할 3x3 동차(homogeneous) 변환 행렬을 만듭니다.
+    pivot 을 기준으로 대칭 -> 확대/축소 -> 회전을 적용한 뒤 bearing 방향으로 평행 이동합니다.
+
+    Parameters:
+    - rotation_deg: 회전 각도 (도, 반시계 방향이 양수)
+    - pivot: 회전/확대/대칭의 기준점 (easting, northing)
+    - distance_m: 평행 이동 거리 (m)
+    - bearing_deg: 평행 이동 방향 (도, 북쪽 0 / 동쪽 90 의 방위각)
+    - scale: 확대/축소 배율
+    - mirror_axis_deg: 대칭축의 방위각 (도). None 이면 대칭하지 않음
+    """
+    px, py = pivot
+
+    to_origin = np.array([[1.0, 0.0, -px], [0.0, 1.0, -py], [0.0, 0.0, 1.0]])
+    from_origin = np.array([[1.0, 0.0, px], [0.0, 1.0, py], [0.0, 0.0, 1.0]])
+
+    linear = np.eye(3)
+    if mirror_axis_deg is not None:
+        # 방위각을 수학 각도 (동쪽 기준 반시계)로 바꾼 축에 대한 반사
+        axis = np.radians(90.0 - mirror_axis_deg)
+        c2, s2 = np.cos(2 * axis), np.sin(2 * axis)
+        linear = np.array([[c2, s2, 0.0], [s2, -c2, 0.0], [0.0, 0.0, 1.0]]) @ linear
+    linear = np.diag([scale, scale, 1.0]) @ linear
+    theta = np.radians(rotation_deg)
+    c, s = np.cos(theta), np.sin(theta)
+    linear = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]]) @ linear
+
+    bearing = np.radians(bearing_deg)
+    shift = np.array([
+        [1.0, 0.0, distance_m * np.sin(bearing)],
+        [0.0, 1.0, distance_m * np.cos(bearing)],
+        [0.0, 0.0, 1.0],
+    ])
+    return shift @ from_origin @ linear @ to_origin
+
+
+def apply_affine(df, matrix, indices=None):
+    """
+    표준 DataFrame 의 UTM 좌표에 변환 행렬을 한 번에 적용합니다.
+    indices 가 주어지면 해당 행만 변환하고, 위도/경도도 변환된 행만 다시 계산합니다.
+    원본은 변경하지 않고 새 DataFrame 을 반환합니다.
+    """
+    df = df.copy()
+    rows = np.arange(len(df)) if indices is None else np.asarray(sorted(indices), dtype=np.int64)
+    if rows.size == 0:
+        return df
+
+    easting = df['utm_easting'].to_numpy(dtype=np.float64)[rows]
+    northing = df['utm_northing'].to_numpy(dtype=np.float64)[rows]
+    points = np.column_stack([easting, northing, np.ones(rows.size)]) @ matrix.T
+
+    zone = df['utm_zone_number'].iloc[rows[0]]
+    latitude, longitude = utm_to_latlon(points[:, 0], points[:, 1], zone)
+
+    col = df.columns.get_loc
+    df.iloc[rows, col('utm_easting')] = points[:, 0]
+    df.iloc[rows, col('utm_northing')] = points[:, 1]
+    df.iloc[rows, col('latitude')] = latitude
+    df.iloc[rows, col('longitude')] = longitude
+    return df
+
+
+def resolve_pivot(df, pivot='centroid', indices=None):
+    """
+    pivot 지정값을 UTM 좌표로 변환합니다.
+    'centroid' (대상 포인트의 중심), 'first' (첫 번째 포인트) 또는 'E,N' 문자열/튜플을 받습니다.
+    """
+    rows = np.arange(len(df)) if indices is None else np.asarray(sorted(indices), dtype=np.int64)
+    easting = df['utm_easting'].to_numpy(dtype=np.float64)[rows]
+    northing = df['utm_northing'].to_numpy(dtype=np.float64)[rows]
+    if pivot == 'centroid':
+        return float(easting.mean()), float(northing.mean())
+    if pivot == 'first':
+        return float(easting[0]), float(northing[0])
+    if isinstance(pivot, str):
+        pivot = [float(v) for v in pivot.split(',')]
+    return float(pivot[0]), float(pivot[1])
+
+
+def transform_file(input_path, output_path, pivot='centroid', **params):
+    """
+    파일 전체에 변환을 적용하여 원래 형식 그대로 저장합니다.
+    params 는 affine_matrix 의 인자와 동일합니다.
+    """
+    df = read_track(input_path)
+    matrix = affine_matrix(pivot=resolve_pivot(df, pivot), **params)
+    write_track(apply_affine(df, matrix), output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="웨이포인트/차선 CSV 회전, 이동, 확대, 대칭 변환")
+    parser.add_argument('inputs', nargs='+', help="변환할 CSV 파일")
+    parser.add_argument('-o', '--output', help="출력 파일 (입력이 하나일 때만 사용)")
+    parser.add_argument('--rotate', type=float, default=0.0, help="회전 각도 (도, 반시계 방향)")
+    parser.add_argument('--pivot', default='centroid', help="기준점: centroid, first 또는 'E,N'")
+    parser.add_argument('--distance', type=float, default=0.0, help="평행 이동 거리 (m)")
+    parser.add_argument('--bearing', type=float, default=0.0, help="평행 이동 방위각 (도, 북쪽 0)")
+    parser.add_argument('--scale', type=float, default=1.0, help="확대/축소 배율")
+    parser.add_argument('--mirror', type=float, default=None, help="대칭축 방위각 (도)")
+    args = parser.parse_args()
+
+    if args.output and len(args.inputs) > 1:
+        parser.error("--output 은 입력 파일이 하나일 때만 사용할 수 있습니다.")
+
+    for input_path in args.inputs:
+        output_path = args.output or os.path.join(
+            os.path.dirname(input_path), f"transformed_{os.path.basename(input_path)}"
+        )
+        transform_file(
+            input_path, output_path, pivot=args.pivot,
+            rotation_deg=args.rotate, distance_m=args.distance, bearing_deg=args.bearing,
+            scale=args.scale, mirror_axis_deg=args.mirror,
+        )
+        print(f"Processed {input_path}, saved as {output_path}")
+
+
+if __name__ == "__main__":
+    main()
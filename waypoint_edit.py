@@ -1,4 +1,5 @@
 import sys
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 import matplotlib.pyplot as plt
@@ -7,18 +8,32 @@ from shapely.geometry import Point
 from scipy.spatial import KDTree
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QVBoxLayout,
-    QWidget, QFileDialog, QLabel, QMessageBox, QHBoxLayout, QTableWidget, QTableWidgetItem, QLineEdit
+    QWidget, QFileDialog, QLabel, QMessageBox, QHBoxLayout, QTableWidget, QTableWidgetItem, QLineEdit,
+    QInputDialog, QCheckBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QItemSelection, QItemSelectionModel, QTimer
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 
-# geopy 임포트
-from geopy.distance import geodesic
 import contextily as ctx
 import utm
-from shapely.affinity import translate
+
+from track_transform import affine_matrix, apply_affine
+from track_dedup import dedup_mask
+from track_outliers import check_track
+from track_geometry import GEOMETRY_COLUMNS, add_geometry_columns, update_geometry
+from speed_profile import add_speed_column
+from track_stats import TrackStats
+from track_io import latlon_to_utm, utm_to_latlon, read_track, write_track, split_labels, merge_labels
+import geodesy
+from gps_stream import FIX_FIELDS, FixBuffer, StreamReader, UdpSource, NmeaFileSource, TrackReplaySource
+from waypoint_recorder import WaypointRecorder
+from lane_clearance import BoundarySet, check_clearance
+from lane_snap import DEFAULT_LANE_MAP, lane_index, snap_to_lane
+from lane_graph import LaneGraph, build_route
+from track_tiles import TileStore
+from track_binary import SUFFIX as BINARY_SUFFIX, BinaryTrack
 
 # UTM 간소화
 from functools import lru_cache
@@ -27,6 +42,32 @@ from functools import lru_cache
 @lru_cache(maxsize=None)
 def convert_to_utm(latitude, longitude):
     return utm.from_latlon(latitude, longitude)
+
+# 포인트 테이블에 표시하는 컬럼 (헤더 순서와 같음)
+TABLE_COLUMNS = ['longitude', 'latitude', 'utm_easting', 'utm_northing', 'utm_zone_number']
+
+# 실시간 위치 궤적 화면 갱신 주기 (ms, 수신 속도와 관계없이 초당 10 번까지만 다시 그림)
+TRAIL_INTERVAL_MS = 100
+
+# 타일 모드에서 화면 이동/확대가 끝난 뒤 타일을 다시 고르기까지 기다리는 시간 (ms)
+TILE_DELAY_MS = 300
+# 타일 모드에서 한 번에 불러오는 최대 포인트 수 (넘으면 확대해야 불러옴)
+# 화면이 바뀔 때마다 테이블을 통째로 다시 만들므로 (QTableWidget 셀 생성) UI 가 멈추지 않는 정도로 제한
+MAX_TILE_POINTS = 20000
+
+# 위도/경도 배열을 Web Mercator (EPSG:3857) 좌표로 변환 (실시간 궤적은 매 프레임 변환하므로 geopandas 대신 직접 계산)
+def lonlat_to_mercator(longitude, latitude):
+    radius = 6378137.0
+    x = np.radians(longitude) * radius
+    y = np.log(np.tan(np.pi / 4 + np.radians(latitude) / 2)) * radius
+    return x, y
+
+# Web Mercator 좌표를 위도/경도로 되돌림 (타일 모드의 화면 범위 계산용)
+def mercator_to_lonlat(x, y):
+    radius = 6378137.0
+    longitude = np.degrees(np.asarray(x) / radius)
+    latitude = np.degrees(2 * np.arctan(np.exp(np.asarray(y) / radius)) - np.pi / 2)
+    return longitude, latitude
 class MapCanvas(FigureCanvas):
     def __init__(self, main_window, parent=None):
         self.fig = Figure(figsize=(10, 10))
@@ -39,38 +80,100 @@ class MapCanvas(FigureCanvas):
         self.is_adding_point = False  # 포인트 추가 모드 상태
         self.fill_points_mode = False  # 포인트 간격 채우기 모드 상태
         self.fill_points = []  # 채울 포인트의 두 점 저장
+        self.speed_params = {}  # 속도 프로파일 계산 조건
+        self.stats = None  # 경로 길이/간격 통계 (편집 시 변경된 부분만 갱신)
+        self.trail_xy = None  # 실시간 위치 궤적 (Web Mercator x, y 배열)
+        self.trail_line = None
+        self.trail_head = None
+        self.boundaries = None  # 여유 거리 검사용 차선/주차 구획 경계 (BoundarySet)
+        self.half_width = 0.95  # 차량 반폭 (m)
+        self.clearance = None  # 점별 경계까지 여유 거리 (편집 시 다시 계산)
+        self.lane_map_path = DEFAULT_LANE_MAP  # 차선 맞추기에 사용하는 lane map
+        self.lane_index = None  # lane map 구간 인덱스 (처음 맞출 때 생성)
+        self.lane_route_mode = False  # 차선 경로 생성 모드 상태
+        self.route_points = []  # 차선 경로의 출발/도착점 (UTM)
+        self.lane_graph = None  # lane map 차선 그래프 (처음 경로를 만들 때 생성)
+        self.tile_store = None  # 타일 모드의 타일 저장소 (TileStore, None 이면 일반 CSV 모드)
+        self.tile_keys = []  # 지금 불러온 타일 이름 목록
+        self.tiles_dirty = False  # 불러온 타일이 편집되었는지
+        self.dialect = 'lane'  # 저장할 CSV 형식 ('lane' 또는 'waypoint', 불러온 데이터를 따름)
+        self.labels = None  # 불러온 CSV 의 라벨 행 (좌표 없음, 저장할 때 merge_labels 로 제자리에 넣음)
+        self.modified = False  # 불러온 뒤 저장하지 않은 편집이 있는지
+        self.tile_timer = QTimer(self)  # 화면이 바뀐 뒤 타일을 다시 고르는 타이머
+        self.tile_timer.setSingleShot(True)
+        self.tile_timer.timeout.connect(self.update_viewport_tiles)
+        self.mpl_connect('draw_event', self.on_draw)
+
+    def confirm_discard(self):
+        """
+        저장하지 않은 편집이 있으면 버리고 계속할지 묻습니다. 타일 모드의 편집은 타일에 저장되므로 묻지 않습니다.
+
+        Returns:
+        - 계속해도 되면 True
+        """
+        if not self.modified or self.tile_store is not None:
+            return True
+        answer = QMessageBox.question(
+            self.main_window, "저장하지 않은 변경", "저장하지 않은 편집 내용이 있습니다. 버리고 계속하시겠습니까?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        return answer == QMessageBox.StandardButton.Yes
 
     def load_data(self, file_path):
         try:
-            # CSV 로드
-            self.df = pd.read_csv(file_path)
+            # CSV 또는 이진 트랙 (.wpb) 로드 (타일 모드였다면 편집 내용을 타일에 쓰고 종료)
+            self.close_tiles()
+            if file_path.endswith(BINARY_SUFFIX):
+                self.set_data(BinaryTrack(file_path).to_frame())
+            else:
+                # 형식을 알아내 표준 컬럼으로 읽고, 좌표가 없는 라벨 행은 떼어 두었다가 저장할 때 다시 넣음
+                self.set_data(*split_labels(read_track(file_path)))
+        except Exception as e:
+            QMessageBox.critical(self, "오류", f"데이터 로드 실패:\n{e}")
 
-            # 필요한 컬럼 확인 ('longitude'와 'latitude'가 맞는지 확인)
-            if not {'latitude', 'longitude', 'utm_easting', 'utm_northing', 'utm_zone_number'}.issubset(self.df.columns):
-                raise ValueError("CSV에는 'latitude', 'longitude', 'utm_easting', 'utm_northing', 'utm_zone_number' 컬럼이 포함되어 있어야 합니다.")
+    def set_data(self, df, labels=None):
+        """
+        새 경로 DataFrame 으로 지도, 인덱스, 통계, 테이블을 모두 다시 만듭니다.
+        저장 형식은 df.attrs['dialect'] 를 따릅니다 (없으면 lane 형식).
+        labels 는 split_labels 로 떼어 낸 라벨 행입니다 (df 에는 'row' 컬럼이 있어야 함).
+        """
+        self.df = df
+        self.labels = labels
+        self.dialect = df.attrs.get('dialect', 'lane')
+        self.modified = False
+        # 필요한 컬럼 확인 ('longitude'와 'latitude'가 맞는지 확인)
+        if not {'latitude', 'longitude', 'utm_easting', 'utm_northing', 'utm_zone_number'}.issubset(self.df.columns):
+            raise ValueError("CSV에는 'latitude', 'longitude', 'utm_easting', 'utm_northing', 'utm_zone_number' 컬럼이 포함되어 있어야 합니다.")
 
-            # GeoDataFrame으로 변환
-            geometry = [Point(xy) for xy in zip(self.df['longitude'], self.df['latitude'])]
-            self.gdf = gpd.GeoDataFrame(self.df, geometry=geometry)
+        # GeoDataFrame으로 변환
+        geometry = [Point(xy) for xy in zip(self.df['longitude'], self.df['latitude'])]
+        self.gdf = gpd.GeoDataFrame(self.df, geometry=geometry)
 
-            # CRS 설정 (WGS84)
-            self.gdf.set_crs(epsg=4326, inplace=True)
+        # CRS 설정 (WGS84)
+        self.gdf.set_crs(epsg=4326, inplace=True)
 
-            # Web Mercator로 변환
-            self.gdf = self.gdf.to_crs(epsg=3857)
+        # Web Mercator로 변환
+        self.gdf = self.gdf.to_crs(epsg=3857)
 
-            # KDTree 구축
-            coords = list(zip(self.gdf.geometry.x, self.gdf.geometry.y))
-            self.tree = KDTree(coords)
+        # KDTree 구축
+        coords = list(zip(self.gdf.geometry.x, self.gdf.geometry.y))
+        self.tree = KDTree(coords)
 
-            # 지도 그리기
-            self.plot_map()
+        # heading, curvature 등 기하 정보 컬럼 계산 (이후 편집 시 주변만 갱신)
+        self.df = add_geometry_columns(self.df)
 
-            # 테이블 업데이트
-            self.main_window.update_table(self.df)
+        # 경로 길이/간격 통계
+        self.stats = TrackStats(self.df[['utm_easting', 'utm_northing']].to_numpy(dtype=float))
 
-        except Exception as e:
-            QMessageBox.critical(self, "오류", f"데이터 로드 실패:\n{e}")
+        # 경계가 지정되어 있으면 새 경로의 여유 거리도 계산
+        if self.boundaries is not None:
+            self.clearance, _ = check_clearance(self.df, self.boundaries, self.half_width)
+
+        # 지도 그리기
+        self.plot_map()
+
+        # 테이블 업데이트
+        self.main_window.update_table(self.df)
 
     def plot_map(self):
         # 현재 축의 xlim과 ylim을 저장 (없을 경우 None 처리)
@@ -80,10 +183,22 @@ class MapCanvas(FigureCanvas):
             ylim = self.ax.get_ylim()
 
         self.ax.clear()
+        self.trail_line = None
+        self.trail_head = None
 
         # 좌표계가 Web Mercator (EPSG:3857)로 변환된 상태에서 포인트 플롯
         if self.gdf is not None and not self.gdf.empty:
-            self.gdf.plot(ax=self.ax, marker='o', color='blue', markersize=5, alpha=0.7)
+            if 'speed' in self.df.columns and len(self.df) == len(self.gdf):
+                # 속도 프로파일이 있으면 속도에 따라 색을 다르게 표시 (빨강: 느림, 초록: 빠름)
+                self.ax.scatter(
+                    self.gdf.geometry.x, self.gdf.geometry.y, c=self.df['speed'],
+                    cmap='RdYlGn', s=5, alpha=0.9
+                )
+            else:
+                self.gdf.plot(ax=self.ax, marker='o', color='blue', markersize=5, alpha=0.7)
+
+        if self.boundaries is not None:
+            self.draw_clearance()
 
         # Google Satellite 타일 URL
         google_tiles_url = "http://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}"
@@ -111,10 +226,84 @@ class MapCanvas(FigureCanvas):
                 self.ax.set_xlim(self.gdf.total_bounds[[0, 2]])
                 self.ax.set_ylim(self.gdf.total_bounds[[1, 3]])
 
+        if self.trail_xy is not None:
+            self.draw_trail()
+
         self.ax.set_axis_off()
         self.fig.tight_layout()
         self.draw()
 
+    def draw_clearance(self):
+        # 경계 선과 점별 여유 거리를 색으로 표시 (빨강: 반폭보다 가까움, 초록: 여유 있음)
+        latitude, longitude = self.boundaries.latlon.T
+        x, y = lonlat_to_mercator(longitude, latitude)
+        # 선이 바뀌는 자리에 NaN 을 넣어 한 번에 그림
+        starts = np.flatnonzero(self.boundaries.index.breaks)[1:]
+        x = np.insert(x, starts, np.nan)
+        y = np.insert(y, starts, np.nan)
+        self.ax.plot(x, y, '-', color='yellow', linewidth=1.0, alpha=0.8, zorder=3)
+
+        if self.clearance is not None and len(self.clearance) == len(self.gdf):
+            self.ax.scatter(
+                self.gdf.geometry.x, self.gdf.geometry.y, c=self.clearance, cmap='RdYlGn',
+                vmin=0.0, vmax=2.0 * self.half_width, s=12, zorder=4
+            )
+            violations = self.clearance < self.half_width
+            self.ax.scatter(
+                self.gdf.geometry.x[violations], self.gdf.geometry.y[violations],
+                facecolors='none', edgecolors='red', s=60, linewidths=1.5, zorder=4
+            )
+
+    def check_clearance(self, paths, half_width):
+        """
+        경계 파일들로 여유 거리 검사를 켜고 결과를 지도에 표시합니다. 이후 편집할 때마다 다시 계산합니다.
+
+        Returns:
+        - check_clearance 의 요약 dict
+        """
+        self.boundaries = BoundarySet.from_files(paths)
+        self.half_width = half_width
+        self.clearance, summary = check_clearance(self.df, self.boundaries, half_width)
+        self.highlight_selected_points()
+        return summary
+
+    def clear_clearance(self):
+        # 여유 거리 검사 표시 끄기
+        self.boundaries = None
+        self.clearance = None
+        self.highlight_selected_points()
+
+    def draw_trail(self):
+        # 실시간 위치 궤적과 현재 위치를 그림 (이미 그려져 있으면 데이터만 바꿈)
+        x, y = self.trail_xy
+        if self.trail_line is None:
+            self.trail_line, = self.ax.plot(x, y, '-', color='cyan', linewidth=1.5, zorder=5)
+            self.trail_head, = self.ax.plot(x[-1:], y[-1:], 'o', color='magenta', markersize=8, zorder=6)
+        else:
+            self.trail_line.set_data(x, y)
+            self.trail_head.set_data(x[-1:], y[-1:])
+
+    def update_trail(self, latitude, longitude):
+        """
+        실시간 위치 궤적을 갱신합니다. 편집 중인 경로 데이터 (df, gdf)와 KDTree 는 건드리지 않고
+        궤적 선만 다시 그립니다.
+        """
+        if len(latitude) == 0:
+            return
+        self.trail_xy = lonlat_to_mercator(np.asarray(longitude), np.asarray(latitude))
+        self.draw_trail()
+        self.draw_idle()
+
+    def clear_trail(self):
+        # 실시간 위치 궤적 제거
+        self.trail_xy = None
+        if self.trail_line is not None:
+            self.trail_line.remove()
+            self.trail_head.remove()
+            self.trail_line = None
+            self.trail_head = None
+            self.draw_idle()
+
     def highlight_selected_points(self):
         # 기존 포인트 그리기
         self.plot_map()
@@ -151,6 +340,16 @@ class MapCanvas(FigureCanvas):
                 QMessageBox.information(self.main_window, "포인트 채우기 완료", "두 점 사이에 포인트를 채웠습니다.")
             else:
                 QMessageBox.information(self.main_window, "포인트 선택", "두 번째 포인트를 선택하세요.")
+        elif self.lane_route_mode:
+            # 출발점과 도착점을 골라 차선을 따라가는 경로 생성
+            self.route_points.append((latitude, longitude))
+            if len(self.route_points) == 2:
+                start, goal = self.route_points
+                self.route_points = []
+                self.lane_route_mode = False
+                self.main_window.build_lane_route(start, goal)
+            else:
+                QMessageBox.information(self.main_window, "도착점 선택", "도착점을 선택하세요.")
         else:
             # 기존 클릭 처리
             self.main_window.show_coordinates(latitude, longitude)
@@ -160,24 +359,48 @@ class MapCanvas(FigureCanvas):
                 self.main_window.show_point_index(index)
 
     def add_point(self, latitude, longitude):
-        # 새로운 포인트를 DataFrame에 추가 (latitude, longitude 추가)
-        new_row = pd.DataFrame([[latitude, longitude]], columns=['latitude', 'longitude'])
+        # 새로운 포인트 하나를 추가
+        self.add_points([latitude], [longitude])
 
-        # UTM 좌표로 변환 (캐싱 사용)
-        utm_easting, utm_northing, utm_zone_number, utm_zone_letter = convert_to_utm(latitude, longitude)
+        # 포인트 추가 모드 계속 유지
+        # self.is_adding_point = False  # 이 줄을 제거하여 추가 모드 유지
 
-        # UTM 좌표와 존 넘버를 DataFrame에 추가
-        new_row['utm_easting'] = utm_easting
-        new_row['utm_northing'] = utm_northing
-        new_row['utm_zone_number'] = f"{utm_zone_number}{utm_zone_letter}"
+    def add_points(self, latitudes, longitudes):
+        """
+        여러 포인트를 DataFrame 끝에 한 번에 추가하고 KDTree, 지도, 테이블을 한 번만 갱신합니다.
+        """
+        latitudes = list(latitudes)
+        longitudes = list(longitudes)
+        if not latitudes:
+            return
 
-        self.df = pd.concat([self.df, new_row], ignore_index=True)
+        # UTM 좌표로 변환 (한 점이면 캐싱 사용, 여러 점이면 배열로 한 번에 변환)
+        if len(latitudes) == 1:
+            utm_easting, utm_northing, utm_zone_number, utm_zone_letter = convert_to_utm(latitudes[0], longitudes[0])
+            eastings, northings, zone = [utm_easting], [utm_northing], f"{utm_zone_number}{utm_zone_letter}"
+        else:
+            eastings, northings, zone = latlon_to_utm(latitudes, longitudes)
+
+        # 새로운 포인트를 DataFrame에 추가 (위도, 경도, UTM 좌표와 존 넘버)
+        new_rows = pd.DataFrame({
+            'latitude': latitudes,
+            'longitude': longitudes,
+            'utm_easting': eastings,
+            'utm_northing': northings,
+            'utm_zone_number': zone,
+        })
+        start = len(self.df)
+        self.df = pd.concat([self.df, new_rows], ignore_index=True)
+        self.geometry_changed(range(start, len(self.df)))
+        if self.stats is not None:
+            for easting, northing in zip(eastings, northings):
+                self.stats.append(easting, northing)
 
         # 새로운 포인트를 GeoDataFrame에 추가 (WGS84 좌표계에서 추가)
-        new_geometry = Point(longitude, latitude)
-        new_gdf_row = gpd.GeoDataFrame([[new_geometry]], columns=['geometry'], crs="EPSG:4326")
-        new_gdf_row = new_gdf_row.to_crs(epsg=3857)  # 좌표계를 Web Mercator로 변환
-        self.gdf = pd.concat([self.gdf, new_gdf_row], ignore_index=True)
+        new_gdf_rows = gpd.GeoDataFrame(
+            geometry=gpd.points_from_xy(longitudes, latitudes), crs="EPSG:4326"
+        ).to_crs(epsg=3857)  # 좌표계를 Web Mercator로 변환
+        self.gdf = pd.concat([self.gdf, new_gdf_rows], ignore_index=True)
 
         # KDTree 재생성 (새로운 포인트 포함)
         coords = list(zip(self.gdf.geometry.x, self.gdf.geometry.y))
@@ -185,14 +408,12 @@ class MapCanvas(FigureCanvas):
 
         # 테이블 및 지도 업데이트
         self.plot_map()  # 지도 업데이트
-        self.main_window.update_table(self.df)  # 테이블 업데이트
-
-        # 포인트 추가 모드 계속 유지
-        # self.is_adding_point = False  # 이 줄을 제거하여 추가 모드 유지
+        self.main_window.update_table(self.df, rows=range(start, len(self.df)))  # 새 행만 테이블에 추가
 
     def fill_between_points(self, point1, point2, interval_km=0.0002):
         """
         두 지점 사이를 interval_km 간격으로 포인트를 채웁니다.
+        포인트는 두 점을 잇는 측지선 위에 놓이며, 모두 계산한 뒤 한 번에 추가합니다.
         interval_km: 간격 (킬로미터 단위)
         """
         # 두 점의 위도와 경도
@@ -201,7 +422,7 @@ class MapCanvas(FigureCanvas):
         print(point1, point2)
 
         # 두 지점 사이의 전체 거리 계산
-        total_distance = geodesic((lat1, lon1), (lat2, lon2)).kilometers
+        total_distance = geodesy.inverse(lat1, lon1, lat2, lon2)[0] / 1000.0
         print(f"두 점 사이 거리: {total_distance:.6f} km")
 
         # 두 점이 같은 위치에 있을 때 예외 처리
@@ -212,17 +433,13 @@ class MapCanvas(FigureCanvas):
         # 생성할 포인트 수 계산
         num_points = max(int(total_distance / interval_km), 1)  # 최소 1개의 포인트는 생성
 
-        # 위도와 경도의 선형 보간 계산
-        lats = [lat1 + (lat2 - lat1) * i / (num_points + 1) for i in range(1, num_points + 1)]
-        lons = [lon1 + (lon2 - lon1) * i / (num_points + 1) for i in range(1, num_points + 1)]
+        # 측지선을 따라 등간격으로 나눈 위치 계산
+        fractions = [i / (num_points + 1) for i in range(1, num_points + 1)]
+        lats, lons = geodesy.intermediate(lat1, lon1, lat2, lon2, fractions)
         print(f"생성할 포인트 개수: {num_points}")
 
         # 계산된 포인트들을 모두 추가
-        for lat, lon in zip(lats, lons):
-            self.add_point(lat, lon)
-
-        # 지도를 업데이트하여 새로운 포인트를 반영
-        self.plot_map()
+        self.add_points(lats, lons)
         QMessageBox.information(self.main_window, "포인트 채우기 완료", f"두 점 사이에 {num_points}개의 포인트를 채웠습니다.")
 
     def remove_selected_points(self):
@@ -230,15 +447,25 @@ class MapCanvas(FigureCanvas):
             QMessageBox.warning(self.main_window, "경고", "삭제할 포인트가 선택되지 않았습니다.")
             return
 
-        # 선택된 인덱스 정렬 (내림차순으로 정렬하여 삭제할 때 인덱스 충돌 방지)
-        for index in sorted(self.selected_points, reverse=True):
-            self.df = self.df.drop(index)
-            self.gdf = self.gdf.drop(index)
+        self.remove_points(self.selected_points)
+
+    def remove_points(self, indices):
+        """
+        지정한 인덱스의 포인트들을 한 번에 삭제하고 KDTree, 지도, 테이블을 갱신합니다.
+        """
+        indices = sorted(set(indices))
+        self.df = self.df.drop(index=indices)
+        self.gdf = self.gdf.drop(index=indices)
 
         # 인덱스를 리셋하여 일관성 유지
         self.df.reset_index(drop=True, inplace=True)
         self.gdf.reset_index(drop=True, inplace=True)
 
+        # 삭제된 자리 (새 행 번호 기준) 주변의 기하 정보만 갱신
+        self.geometry_changed([index - order for order, index in enumerate(indices)])
+        if self.stats is not None:
+            self.stats.delete(indices)
+
         # KDTree 재생성
         if not self.gdf.empty:
             coords = list(zip(self.gdf.geometry.x, self.gdf.geometry.y))
@@ -249,84 +476,254 @@ class MapCanvas(FigureCanvas):
         # 선택된 포인트 목록 초기화
         self.selected_points = []
 
-        # 테이블 및 지도 업데이트
+        # 테이블 및 지도 업데이트 (삭제한 행만 테이블에서 제거)
         self.plot_map()
-        self.main_window.update_table(self.df)
+        self.main_window.update_table(self.df, removed=indices)
 
-        ### 변경됨: 포인트 이동 기능 추가
-    def move_points(self, direction, distance_cm):
+    def remove_duplicate_points(self, radius_m, revisits=False):
         """
-        선택된 포인트들만 지정된 방향으로 주어진 거리만큼 이동시킵니다.
+        radius_m 이내로 붙어 있는 중복/정지 포인트를 제거합니다.
 
-        Parameters:
-        - direction: 'east', 'west', 'north', 'south'
-        - distance_cm: 이동할 거리 (cm 단위)
+        Returns:
+        - 제거된 포인트 개수
         """
-        if not self.selected_points:
-            QMessageBox.warning(self.main_window, "경고", "이동할 포인트가 선택되지 않았습니다.")
-            return
-
-        # cm를 미터로 변환
-        distance_m = distance_cm / 100.0
-
-        # 방향에 따른 이동량 계산 (미터 단위)
-        if direction == 'east':
-            delta_x = distance_m
-            delta_y = 0
-        elif direction == 'west':
-            delta_x = -distance_m
-            delta_y = 0
-        elif direction == 'north':
-            delta_x = 0
-            delta_y = distance_m
-        elif direction == 'south':
-            delta_x = 0
-            delta_y = -distance_m
-        else:
-            QMessageBox.warning(self.main_window, "경고", "올바른 방향을 지정하세요.")
+        if self.gdf is None or self.df.empty:
+            QMessageBox.warning(self.main_window, "경고", "데이터가 로드되지 않았습니다.")
+            return 0
+
+        xy = self.df[['utm_easting', 'utm_northing']].to_numpy(dtype=float)
+        keep = dedup_mask(xy, radius_m, revisits)
+        removed = [int(i) for i in (~keep).nonzero()[0]]
+        if removed:
+            self.remove_points(removed)
+        return len(removed)
+
+    def geometry_changed(self, indices):
+        """
+        좌표가 바뀐 행 주변의 기하 정보를 갱신하고, 속도 프로파일이 있으면 다시 계산합니다.
+        """
+        update_geometry(self.df, indices)
+        self.modified = True
+        if self.tile_store is not None:
+            self.tiles_dirty = True
+        if 'speed' in self.df.columns:
+            self.df = add_speed_column(self.df, **self.speed_params)
+        if self.boundaries is not None:
+            self.clearance, _ = check_clearance(self.df, self.boundaries, self.half_width)
+
+    def compute_speed_profile(self, **params):
+        """
+        곡률 기반 목표 속도 (m/s)를 계산하여 'speed' 컬럼에 저장하고 지도를 속도 색으로 표시합니다.
+        """
+        if self.gdf is None or self.df.empty:
+            QMessageBox.warning(self.main_window, "경고", "데이터가 로드되지 않았습니다.")
             return
+        self.speed_params = params
+        self.df = add_speed_column(self.df, **params)
+        self.highlight_selected_points()
 
-        # 선택된 포인트들만 이동
-        for idx in self.selected_points:
-            original_geometry = self.gdf.at[idx, 'geometry']
-            translated_geometry = translate(original_geometry, xoff=delta_x, yoff=delta_y)
-            self.gdf.at[idx, 'geometry'] = translated_geometry
-
-        # WGS84 좌표계로 변환하여 latitude와 longitude 업데이트
-        gdf_wgs84 = self.gdf.to_crs(epsg=4326)
-
-        # DataFrame (`df`) 업데이트
-        for idx in self.selected_points:
-            longitude = gdf_wgs84.at[idx, 'geometry'].x
-            latitude = gdf_wgs84.at[idx, 'geometry'].y
-            self.df.at[idx, 'longitude'] = longitude
-            self.df.at[idx, 'latitude'] = latitude
-
-            # UTM 좌표로 변환 (캐싱 사용)
-            utm_easting, utm_northing, utm_zone_number, utm_zone_letter = convert_to_utm(latitude, longitude)
-
-            # UTM 좌표와 존 넘버 업데이트
-            self.df.at[idx, 'utm_easting'] = utm_easting
-            self.df.at[idx, 'utm_northing'] = utm_northing
-            self.df.at[idx, 'utm_zone_number'] = f"{utm_zone_number}{utm_zone_letter}"
+    def refresh_geometry(self, indices):
+        """
+        df 의 위도/경도가 바뀐 행만 Web Mercator geometry 를 다시 계산하고 KDTree 를 재생성합니다.
+        """
+        indices = list(indices)
+        if indices:
+            points = gpd.GeoSeries(
+                gpd.points_from_xy(self.df.loc[indices, 'longitude'], self.df.loc[indices, 'latitude']),
+                index=indices, crs="EPSG:4326"
+            ).to_crs(epsg=3857)
+            self.gdf.loc[indices, 'geometry'] = points
 
-        # KDTree 재생성
         if not self.gdf.empty:
             coords = list(zip(self.gdf.geometry.x, self.gdf.geometry.y))
             self.tree = KDTree(coords)
         else:
             self.tree = None
 
-        # 지도 및 테이블 업데이트
-        self.plot_map()
-        self.main_window.update_table(self.df)
+    def transform_points(self, rotation_deg=0.0, distance_m=0.0, bearing_deg=0.0, scale=1.0, mirror_axis_deg=None):
+        """
+        선택된 포인트들을 UTM 좌표계에서 한 번의 행렬 연산으로 변환합니다.
+        회전/확대/대칭의 기준점은 선택된 포인트들의 중심입니다.
+
+        Returns:
+        - 변환된 포인트 개수 (선택된 포인트가 없으면 0)
+        """
+        if not self.selected_points:
+            QMessageBox.warning(self.main_window, "경고", "변환할 포인트가 선택되지 않았습니다.")
+            return 0
 
-        # 사용자에게 이동 완료 알림
-        QMessageBox.information(
-            self.main_window, 
-            "포인트 이동 완료", 
-            f"{len(self.selected_points)}개의 선택된 포인트가 {direction}으로 {distance_cm}cm 이동되었습니다."
+        indices = sorted(self.selected_points)
+        pivot = (
+            self.df.loc[indices, 'utm_easting'].mean(),
+            self.df.loc[indices, 'utm_northing'].mean(),
         )
+        matrix = affine_matrix(
+            rotation_deg=rotation_deg, pivot=pivot, distance_m=distance_m, bearing_deg=bearing_deg,
+            scale=scale, mirror_axis_deg=mirror_axis_deg
+        )
+        self.df = apply_affine(self.df, matrix, indices)
+        self.geometry_changed(indices)
+        if self.stats is not None:
+            self.stats.move(indices, self.df.loc[indices, ['utm_easting', 'utm_northing']].to_numpy(dtype=float))
+        self.refresh_geometry(indices)
+
+        # 지도 및 테이블 업데이트 (선택 상태 유지, 옮긴 행만 테이블 갱신)
+        self.highlight_selected_points()
+        self.main_window.update_table(self.df, rows=indices)
+        return len(indices)
+
+    def snap_to_lane(self, lane_map_path, max_distance_m):
+        """
+        선택된 포인트들 (선택이 없으면 전체)을 가장 가까운 lane map 구간 위로 옮깁니다.
+        max_distance_m 보다 먼 포인트는 그대로 둡니다.
+
+        Returns:
+        - 행별 이동 거리 배열 (m, 옮기지 않은 행은 NaN)
+        """
+        if self.gdf is None or self.df.empty:
+            QMessageBox.warning(self.main_window, "경고", "데이터가 로드되지 않았습니다.")
+            return None
+
+        if self.lane_index is None or lane_map_path != self.lane_map_path:
+            # 원점 기준 float32 좌표 인덱스 (lane map 이 커도 구간 배열 메모리가 절반)
+            self.lane_index = lane_index(read_track(lane_map_path), compact=True)
+            self.lane_map_path = lane_map_path
+
+        self.df, moved = snap_to_lane(self.df, self.lane_index, max_distance_m, self.selected_points or None)
+        indices = [int(i) for i in np.flatnonzero(~np.isnan(moved))]
+        if indices:
+            self.geometry_changed(indices)
+            if self.stats is not None:
+                self.stats.move(indices, self.df.loc[indices, ['utm_easting', 'utm_northing']].to_numpy(dtype=float))
+            self.refresh_geometry(indices)
+
+            # 지도 및 테이블 업데이트 (선택 상태 유지, 옮긴 행만 테이블 갱신)
+            self.highlight_selected_points()
+            self.main_window.update_table(self.df, rows=indices)
+        return moved
+
+    def build_lane_route(self, start, goal, spacing_m=None):
+        """
+        lane map 차선 그래프에서 두 점 (위도, 경도) 사이의 최단 경로를 구해 현재 데이터를 그 경로로 바꿉니다.
+        lane map 의 차선 선은 기록 방향이 섞여 있으므로 차선마다 두 방향을 두는 그래프를 사용합니다
+        (경로 중간에 진행 방향이 뒤집히지는 않음). 경로는 waypoint 형식으로 저장됩니다.
+
+        Returns:
+        - 경로 길이 (m)
+        """
+        if self.lane_graph is None:
+            self.lane_graph = LaneGraph.from_file(self.lane_map_path)
+        easting, northing, _ = latlon_to_utm([start[0], goal[0]], [start[1], goal[1]], self.lane_graph.zone)
+        df, length = build_route(
+            self.lane_graph, (easting[0], northing[0]), (easting[1], northing[1]), spacing_m
+        )
+        self.close_tiles()
+        self.selected_points = []
+        self.set_data(df)
+        return length
+
+    def open_tiles(self, directory):
+        """
+        타일 저장소를 열고 트랙이 시작하는 타일 주변만 불러옵니다.
+        이후 화면을 옮기거나 확대/축소하면 화면과 겹치는 타일만 다시 불러오고, 편집한 타일은 내보내기 전에 저장합니다.
+        """
+        self.close_tiles()
+        self.tile_store = TileStore(directory)
+        if not self.tile_store.keys:
+            raise ValueError("타일 저장소에 포인트가 없습니다.")
+        e0, n0, e1, n1 = self.tile_store.meta['tiles'][self.tile_store.first_tile()]['bounds']
+        self.load_tiles(self.tile_store.tiles_in((e0, n0, e1, n1)))
+
+        # 첫 타일 범위로 화면 이동
+        latitude, longitude = utm_to_latlon(np.array([e0, e1]), np.array([n0, n1]), self.tile_store.zone)
+        x, y = lonlat_to_mercator(longitude, latitude)
+        self.ax.set_xlim(x)
+        self.ax.set_ylim(y)
+        self.draw()
+
+    def viewport_bounds(self):
+        # 현재 화면 범위를 UTM (min_e, min_n, max_e, max_n) 으로 변환
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        longitude, latitude = mercator_to_lonlat([x0, x0, x1, x1], [y0, y1, y0, y1])
+        easting, northing, _ = latlon_to_utm(latitude, longitude, self.tile_store.zone)
+        return easting.min(), northing.min(), easting.max(), northing.max()
+
+    def load_tiles(self, keys):
+        """
+        편집한 타일을 저장한 뒤 keys 타일만 읽어 현재 데이터로 바꿉니다.
+        """
+        self.flush_tiles()
+        df = self.tile_store.read_tiles(keys)
+        self.tile_keys = list(keys)
+        self.selected_points = []
+        self.set_data(df)
+        self.main_window.info_label.setText(
+            f"타일 {len(keys)}개 ({len(df)}개 포인트)를 불러왔습니다. "
+            f"전체 {len(self.tile_store.keys)}개 타일 중 화면과 겹치는 타일만 메모리에 있습니다."
+        )
+
+    def flush_tiles(self):
+        # 편집된 타일을 저장소에 다시 씀
+        if self.tile_store is not None and self.tiles_dirty:
+            self.tile_store.write_tiles(self.tile_keys, self.df)
+            self.tiles_dirty = False
+
+    def save_tiles(self):
+        # 편집 내용을 저장하고 같은 타일을 다시 읽어 새 점의 행 번호와 다른 타일로 옮긴 점을 반영
+        self.flush_tiles()
+        self.load_tiles(self.tile_keys)
+
+    def close_tiles(self):
+        self.flush_tiles()
+        self.tile_timer.stop()
+        self.tile_store = None
+        self.tile_keys = []
+
+    def on_draw(self, event):
+        # 화면이 다시 그려질 때마다 타이머를 새로 시작해 이동/확대가 끝난 뒤 한 번만 타일을 고름
+        if self.tile_store is not None:
+            self.tile_timer.start(TILE_DELAY_MS)
+
+    def update_viewport_tiles(self):
+        """
+        화면과 겹치는 타일이 바뀌었으면 그 타일들만 다시 불러옵니다.
+        """
+        if self.tile_store is None:
+            return
+        keys = self.tile_store.tiles_in(self.viewport_bounds())
+        if not keys or set(keys) == set(self.tile_keys):
+            return
+        points = self.tile_store.points_in(keys)
+        if points > MAX_TILE_POINTS:
+            self.main_window.info_label.setText(
+                f"화면 안 포인트가 {points}개로 너무 많습니다 (최대 {MAX_TILE_POINTS}개). 확대하면 불러옵니다."
+            )
+            return
+        try:
+            self.load_tiles(keys)
+        except Exception as e:
+            QMessageBox.critical(self.main_window, "오류", f"타일 불러오기 실패:\n{e}")
+
+        ### 변경됨: 포인트 이동 기능 추가
+    def move_points(self, direction, distance_cm):
+        """
+        선택된 포인트들만 지정된 방향으로 주어진 거리만큼 이동시킵니다.
+
+        Parameters:
+        - direction: 'east', 'west', 'north', 'south'
+        - distance_cm: 이동할 거리 (cm 단위)
+        """
+        bearings = {'north': 0.0, 'east': 90.0, 'south': 180.0, 'west': 270.0}
+        if direction not in bearings:
+            QMessageBox.warning(self.main_window, "경고", "올바른 방향을 지정하세요.")
+            return
+
+        # cm를 미터로 변환하여 UTM 좌표계에서 이동
+        count = self.transform_points(distance_m=distance_cm / 100.0, bearing_deg=bearings[direction])
+        if count:
+            self.main_window.info_label.setText(
+                f"{count}개의 선택된 포인트가 {direction}으로 {distance_cm}cm 이동되었습니다."
+            )
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -350,6 +747,11 @@ class MainWindow(QMainWindow):
         self.load_button.clicked.connect(self.load_csv)
         self.left_layout.addWidget(self.load_button)
 
+        # 타일 저장소 열기 버튼 (큰 트랙을 화면과 겹치는 타일만 불러와 편집)
+        self.tiles_button = QPushButton("타일 저장소 열기")
+        self.tiles_button.clicked.connect(self.open_tiles)
+        self.left_layout.addWidget(self.tiles_button)
+
         # 포인트 제거 버튼
         self.delete_button = QPushButton("선택된 포인트 제거")
         self.delete_button.clicked.connect(self.delete_points)
@@ -370,10 +772,72 @@ class MainWindow(QMainWindow):
         self.fill_button.clicked.connect(self.enable_fill_points)
         self.left_layout.addWidget(self.fill_button)
 
+        # 중복/정지 포인트 제거 버튼
+        self.dedup_layout = QHBoxLayout()
+        self.dedup_button = QPushButton("중복 포인트 제거")
+        self.dedup_button.clicked.connect(self.remove_duplicate_points)
+        self.dedup_layout.addWidget(self.dedup_button)
+        self.revisit_checkbox = QCheckBox("재방문 포함")
+        self.dedup_layout.addWidget(self.revisit_checkbox)
+        self.left_layout.addLayout(self.dedup_layout)
+
+        # 속도 프로파일 생성 버튼
+        self.speed_button = QPushButton("속도 프로파일 생성")
+        self.speed_button.clicked.connect(self.compute_speed_profile)
+        self.left_layout.addWidget(self.speed_button)
+
+        # GPS 튐 점 탐지 버튼 (탐지된 포인트를 자동 선택)
+        self.outlier_button = QPushButton("튐 포인트 탐지")
+        self.outlier_button.clicked.connect(self.detect_outliers)
+        self.left_layout.addWidget(self.outlier_button)
+
+        # 차선/주차 구획 경계 여유 거리 검사 버튼 (위반 포인트를 자동 선택)
+        self.clearance_layout = QHBoxLayout()
+        self.clearance_button = QPushButton("경계 여유 거리 검사")
+        self.clearance_button.clicked.connect(self.check_clearance)
+        self.clearance_layout.addWidget(self.clearance_button)
+        self.clear_clearance_button = QPushButton("검사 표시 끄기")
+        self.clear_clearance_button.clicked.connect(self.clear_clearance)
+        self.clearance_layout.addWidget(self.clear_clearance_button)
+        self.left_layout.addLayout(self.clearance_layout)
+
+        # lane map 에 맞추기 버튼 (선택된 포인트, 선택이 없으면 전체)
+        self.snap_button = QPushButton("차선에 맞추기")
+        self.snap_button.clicked.connect(self.snap_to_lane)
+        self.left_layout.addWidget(self.snap_button)
+
+        # 차선 경로 생성 버튼
+        self.route_button = QPushButton("차선 경로 생성")
+        self.route_button.clicked.connect(self.enable_lane_route)
+        self.left_layout.addWidget(self.route_button)
+
         # 변경된 데이터 저장 버튼
+        self.save_layout = QHBoxLayout()
         self.save_button = QPushButton("변경된 데이터 저장")
         self.save_button.clicked.connect(self.save_csv)
-        self.left_layout.addWidget(self.save_button)
+        self.save_layout.addWidget(self.save_button)
+        self.save_geometry_checkbox = QCheckBox("기하 정보 컬럼 포함")
+        self.save_layout.addWidget(self.save_geometry_checkbox)
+        self.left_layout.addLayout(self.save_layout)
+
+        # 실시간 위치 표시 (UDP NMEA/이진 스트림 또는 파일 재생)
+        self.stream_layout = QHBoxLayout()
+        self.stream_button = QPushButton("실시간 위치 시작")
+        self.stream_button.clicked.connect(self.toggle_stream)
+        self.stream_layout.addWidget(self.stream_button)
+        self.record_button = QPushButton("기록 시작")
+        self.record_button.clicked.connect(self.toggle_recording)
+        self.stream_layout.addWidget(self.record_button)
+        self.stream_label = QLabel("수신 안 함")
+        self.stream_layout.addWidget(self.stream_label)
+        self.left_layout.addLayout(self.stream_layout)
+        self.stream_reader = None
+        self.stream_buffer = None
+        self.recorder = None
+        self.trail_count = 0
+        self.trail_timer = QTimer(self)
+        self.trail_timer.setInterval(TRAIL_INTERVAL_MS)
+        self.trail_timer.timeout.connect(self.refresh_trail)
 
         ### 변경됨: cm 입력창 및 방향 버튼 추가
         # 이동 거리 입력창
@@ -413,6 +877,30 @@ class MainWindow(QMainWindow):
         self.left_layout.addLayout(self.direction_layout)
         ### 변경됨 끝
 
+        # 회전/임의 방향 이동/확대/대칭 변환 입력창
+        self.transform_layout = QHBoxLayout()
+        self.rotation_input = QLineEdit()
+        self.rotation_input.setPlaceholderText("회전 (도, 반시계)")
+        self.transform_layout.addWidget(self.rotation_input)
+        self.shift_input = QLineEdit()
+        self.shift_input.setPlaceholderText("이동 (m)")
+        self.transform_layout.addWidget(self.shift_input)
+        self.bearing_input = QLineEdit()
+        self.bearing_input.setPlaceholderText("방위각 (도)")
+        self.transform_layout.addWidget(self.bearing_input)
+        self.scale_input = QLineEdit()
+        self.scale_input.setPlaceholderText("배율")
+        self.transform_layout.addWidget(self.scale_input)
+        self.mirror_input = QLineEdit()
+        self.mirror_input.setPlaceholderText("대칭축 (도)")
+        self.transform_layout.addWidget(self.mirror_input)
+        self.left_layout.addLayout(self.transform_layout)
+
+        # 변환 적용 버튼
+        self.transform_button = QPushButton("선택된 포인트 변환")
+        self.transform_button.clicked.connect(self.transform_points)
+        self.left_layout.addWidget(self.transform_button)
+
         # 정보 레이블
         self.info_label = QLabel("지도에서 클릭하면 해당 위치의 경도와 위도가 표시됩니다. 포인트를 추가하려면 '포인트 추가' 버튼을 누르세요.")
         self.info_label.setWordWrap(True)
@@ -429,6 +917,11 @@ class MainWindow(QMainWindow):
         self.point_index_label.setStyleSheet("font-size: 14px; font-weight: bold;")
         self.left_layout.addWidget(self.point_index_label)
 
+        # 경로 통계 레이블 (전체 길이, 간격, 선택 구간 길이)
+        self.stats_label = QLabel("경로 통계: N/A")
+        self.stats_label.setStyleSheet("font-size: 14px;")
+        self.left_layout.addWidget(self.stats_label)
+
         # 포인트 테이블
         self.table = QTableWidget()
         self.table.setColumnCount(5)
@@ -480,19 +973,47 @@ class MainWindow(QMainWindow):
 
     def load_csv(self):
         file_name, _ = QFileDialog.getOpenFileName(
-            self, "CSV 파일 열기", "", "CSV Files (*.csv);;All Files (*)"
+            self, "CSV 파일 열기", "", "CSV Files (*.csv);;Binary Track (*.wpb);;All Files (*)"
         )
-        if file_name:
+        if file_name and self.canvas.confirm_discard():
             self.canvas.load_data(file_name)
 
+    def open_tiles(self):
+        # track_tiles.py build 로 만든 타일 저장소 디렉토리 선택
+        directory = QFileDialog.getExistingDirectory(self, "타일 저장소 선택")
+        if not directory or not self.canvas.confirm_discard():
+            return
+        try:
+            self.canvas.open_tiles(directory)
+        except Exception as e:
+            QMessageBox.critical(self, "오류", f"타일 저장소 열기 실패:\n{e}")
+
     def save_csv(self):
+        # 타일 모드에서는 편집한 타일을 저장소에 저장
+        if self.canvas.tile_store is not None:
+            self.canvas.save_tiles()
+            QMessageBox.information(self, "저장 완료", "변경된 타일을 저장소에 저장했습니다.")
+            return
+
         # CSV 파일로 저장
         file_name, _ = QFileDialog.getSaveFileName(
             self, "CSV 파일로 저장", "", "CSV Files (*.csv);;All Files (*)"
         )
         if file_name:
-            # canvas에 있는 데이터를 CSV 파일로 저장
-            self.canvas.df.to_csv(file_name, index=False)
+            # canvas에 있는 데이터를 불러온 형식으로 저장 (기하 정보 컬럼은 선택한 경우에만)
+            df = self.canvas.df
+            if not self.save_geometry_checkbox.isChecked():
+                df = df.drop(columns=[c for c in GEOMETRY_COLUMNS if c in df.columns])
+            if self.canvas.dialect == 'waypoint':
+                # 추가/삭제한 포인트가 있으므로 seq 를 다시 매기고, 새 포인트의 option 은 0
+                df = df.assign(seq=range(1, len(df) + 1))
+                if 'option' in df.columns:
+                    df['option'] = df['option'].fillna(0).astype(int)
+            if self.canvas.labels is not None:
+                # 불러올 때 떼어 둔 라벨 행을 제자리에 다시 넣음
+                df = merge_labels(df, self.canvas.labels)
+            write_track(df, file_name, self.canvas.dialect)
+            self.canvas.modified = False
             QMessageBox.information(self, "저장 완료", "변경된 데이터를 저장했습니다.")
 
     def show_coordinates(self, latitude, longitude):
@@ -516,16 +1037,49 @@ class MainWindow(QMainWindow):
         if confirm == QMessageBox.StandardButton.Yes:
             self.canvas.remove_selected_points()
 
-    def update_table(self, df):
-        # 테이블을 새로 고침하여 위도, 경도, UTM 좌표를 표시
+    def update_table(self, df, rows=None, removed=None):
+        """
+        테이블에 위도, 경도, UTM 좌표를 표시합니다.
+        rows 와 removed 가 모두 없으면 전체를 다시 만들고, 있으면 (TrackStats.move/delete 처럼)
+        removed 행 (삭제 전 번호) 을 빼고 rows 행 (현재 번호) 만 다시 씁니다.
+        """
+        rebuild = rows is None and removed is None
+        if rebuild:
+            rows = range(len(df))
+        else:
+            # 연속된 삭제 행은 뒤쪽 묶음부터 한 번에 제거
+            removed = sorted(set(removed or []))
+            runs = np.split(np.asarray(removed, dtype=np.int64), np.flatnonzero(np.diff(removed) != 1) + 1)
+            for run in reversed(runs):
+                if len(run):
+                    self.table.model().removeRows(int(run[0]), len(run))
+            rows = sorted(set(rows or []))
         self.table.setRowCount(len(df))
-        for i, row in df.iterrows():
-            self.table.setItem(i, 0, QTableWidgetItem(str(row['longitude'])))
-            self.table.setItem(i, 1, QTableWidgetItem(str(row['latitude'])))
-            self.table.setItem(i, 2, QTableWidgetItem(str(row['utm_easting'])))
-            self.table.setItem(i, 3, QTableWidgetItem(str(row['utm_northing'])))
-            self.table.setItem(i, 4, QTableWidgetItem(str(row['utm_zone_number'])))
-        self.table.resizeColumnsToContents()
+        values = df[TABLE_COLUMNS].iloc[list(rows)].itertuples(index=False)
+        for i, row in zip(rows, values):
+            for column, value in enumerate(row):
+                self.table.setItem(i, column, QTableWidgetItem(str(value)))
+        if rebuild:
+            self.table.resizeColumnsToContents()
+        self.update_stats()
+
+    def update_stats(self):
+        # 경로 통계 레이블 갱신 (선택된 포인트가 있으면 첫 선택점부터 마지막 선택점까지의 경로 길이도 표시)
+        stats = self.canvas.stats
+        if stats is None:
+            self.stats_label.setText("경로 통계: N/A")
+            return
+        summary = stats.summary()
+        text = (
+            f"포인트 {summary['count']}개, 전체 길이 {summary['total_length']:.2f} m, "
+            f"간격 최소 {summary['min_spacing'] * 100:.1f} / 평균 {summary['mean_spacing'] * 100:.1f} / "
+            f"최대 {summary['max_spacing'] * 100:.1f} cm"
+        )
+        selected = [i for i in self.canvas.selected_points if 0 <= i < len(stats)]
+        if selected:
+            length = stats.length_between(min(selected), max(selected))
+            text += f"\n선택 구간 ({min(selected)} ~ {max(selected)}) 길이 {length:.2f} m"
+        self.stats_label.setText(text)
 
     def on_table_selection(self):
         # 테이블에서 선택된 포인트를 지도에 강조
@@ -533,6 +1087,7 @@ class MainWindow(QMainWindow):
         selected_indices = [index.row() for index in selected_rows]
         self.canvas.selected_points = selected_indices  # 선택된 포인트를 업데이트
         self.canvas.highlight_selected_points()  # 선택된 포인트를 빨간색으로 강조
+        self.update_stats()
 
     def enable_add_point(self):
         # 포인트 추가 모드를 활성화
@@ -561,6 +1116,276 @@ class MainWindow(QMainWindow):
 
         # 포인트 이동 함수 호출
         self.canvas.move_points(direction, distance_cm)
+
+    def select_points(self, indices):
+        # 테이블에서 여러 행을 한 번에 선택 (선택 변경 시그널은 한 번만 발생)
+        model = self.table.model()
+        selection = QItemSelection()
+        for i in indices:
+            selection.select(model.index(i, 0), model.index(i, self.table.columnCount() - 1))
+        self.table.selectionModel().select(
+            selection,
+            QItemSelectionModel.SelectionFlag.ClearAndSelect | QItemSelectionModel.SelectionFlag.Rows
+        )
+
+    def compute_speed_profile(self):
+        # 최대 속도와 횡가속도 제한 입력
+        max_speed, ok = QInputDialog.getDouble(self, "속도 프로파일", "최대 속도 (km/h):", 18.0, 1.0, 200.0, 1)
+        if not ok:
+            return
+        max_lat_accel, ok = QInputDialog.getDouble(self, "속도 프로파일", "최대 횡가속도 (m/s^2):", 1.5, 0.1, 10.0, 2)
+        if not ok:
+            return
+
+        self.canvas.compute_speed_profile(max_speed=max_speed / 3.6, max_lat_accel=max_lat_accel)
+        if 'speed' in self.canvas.df.columns:
+            speed = self.canvas.df['speed'] * 3.6
+            self.info_label.setText(f"속도 프로파일: 평균 {speed.mean():.1f} km/h, 최대 {speed.max():.1f} km/h")
+
+    def detect_outliers(self):
+        # 전체 경로에서 튐 포인트를 찾아 선택
+        if self.canvas.gdf is None or self.canvas.df.empty:
+            QMessageBox.warning(self, "경고", "데이터가 로드되지 않았습니다.")
+            return
+
+        _, report = check_track(self.canvas.df)
+        flagged = [int(i) for i in report['flagged']]
+        self.select_points(flagged)
+        self.info_label.setText(
+            f"{len(flagged)}개의 튐 포인트를 찾아 선택했습니다. '선택된 포인트 제거'로 삭제할 수 있습니다."
+        )
+
+    def check_clearance(self):
+        # 경계 파일과 차량 반폭을 입력받아 여유 거리 검사
+        if self.canvas.gdf is None or self.canvas.df.empty:
+            QMessageBox.warning(self, "경고", "데이터가 로드되지 않았습니다.")
+            return
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "경계 CSV 파일 선택", "utm/dcu", "CSV Files (*.csv);;All Files (*)"
+        )
+        if not paths:
+            return
+        half_width, ok = QInputDialog.getDouble(
+            self, "경계 여유 거리 검사", "차량 반폭 (m):", self.canvas.half_width, 0.1, 5.0, 2
+        )
+        if not ok:
+            return
+
+        try:
+            summary = self.canvas.check_clearance(paths, half_width)
+        except Exception as e:
+            QMessageBox.critical(self, "오류", f"여유 거리 검사 실패:\n{e}")
+            return
+        violations = [int(i) for i in summary['violations']]
+        self.select_points(violations)
+        self.info_label.setText(
+            f"최소 여유 거리 {summary['min_clearance']:.2f} m (포인트 {summary['min_index']}), "
+            f"반폭 {half_width:.2f} m 보다 가까운 포인트 {len(violations)}개 ({len(summary['runs'])}개 구간)를 선택했습니다."
+        )
+
+    def clear_clearance(self):
+        # 여유 거리 검사 표시 끄기
+        self.canvas.clear_clearance()
+        self.info_label.setText("여유 거리 검사 표시를 껐습니다.")
+
+    def snap_to_lane(self):
+        # lane map 파일과 최대 이동 거리를 입력받아 포인트를 차선 위로 옮김
+        if self.canvas.gdf is None or self.canvas.df.empty:
+            QMessageBox.warning(self, "경고", "데이터가 로드되지 않았습니다.")
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "lane map CSV 선택", self.canvas.lane_map_path, "CSV Files (*.csv);;All Files (*)"
+        )
+        if not path:
+            return
+        max_distance_cm, ok = QInputDialog.getDouble(self, "차선에 맞추기", "최대 이동 거리 (cm):", 50.0, 1.0, 1000.0, 1)
+        if not ok:
+            return
+
+        try:
+            moved = self.canvas.snap_to_lane(path, max_distance_cm / 100.0)
+        except Exception as e:
+            QMessageBox.critical(self, "오류", f"차선에 맞추기 실패:\n{e}")
+            return
+        if moved is None:
+            return
+        snapped = moved[~np.isnan(moved)]
+        target = len(self.canvas.selected_points) or len(self.canvas.df)
+        if len(snapped):
+            self.info_label.setText(
+                f"{target}개 중 {len(snapped)}개의 포인트를 차선에 맞췄습니다 "
+                f"(이동 평균 {snapped.mean() * 100:.1f} cm, 최대 {snapped.max() * 100:.1f} cm)."
+            )
+        else:
+            self.info_label.setText(f"{max_distance_cm:.0f} cm 안에 차선이 있는 포인트가 없습니다.")
+
+    def enable_lane_route(self):
+        # 차선 경로 생성 모드를 활성화
+        self.canvas.lane_route_mode = True
+        self.canvas.route_points = []
+        QMessageBox.information(self, "차선 경로 생성", "지도에서 출발점과 도착점을 차례로 클릭하세요.")
+
+    def build_lane_route(self, start, goal):
+        # 점 간격을 입력받아 두 점 사이 차선 경로를 만들고 현재 데이터로 불러옴
+        if not self.canvas.confirm_discard():
+            return
+        spacing_cm, ok = QInputDialog.getDouble(self, "차선 경로 생성", "점 간격 (cm, 0 이면 lane map 점 그대로):", 0.0, 0.0, 1000.0, 1)
+        if not ok:
+            return
+        try:
+            length = self.canvas.build_lane_route(start, goal, spacing_cm / 100.0 or None)
+        except Exception as e:
+            QMessageBox.critical(self, "오류", f"차선 경로 생성 실패:\n{e}")
+            return
+        self.info_label.setText(
+            f"길이 {length:.1f} m, {len(self.canvas.df)}개 포인트의 차선 경로를 만들었습니다. "
+            f"'변경된 데이터 저장'으로 waypoint 파일을 저장할 수 있습니다."
+        )
+
+    def remove_duplicate_points(self):
+        # 중복으로 판단할 거리 입력
+        radius_cm, ok = QInputDialog.getDouble(self, "중복 포인트 제거", "중복 판단 거리 (cm):", 10.0, 0.1, 1000.0, 1)
+        if not ok:
+            return
+
+        count = self.canvas.remove_duplicate_points(radius_cm / 100.0, self.revisit_checkbox.isChecked())
+        self.info_label.setText(f"{count}개의 중복 포인트를 제거했습니다.")
+
+    def open_stream_source(self):
+        # 위치 스트림 소스 선택 (취소하면 None)
+        kinds = ["UDP (NMEA)", "UDP (이진)", "NMEA 파일 재생", "CSV 경로 재생"]
+        kind, ok = QInputDialog.getItem(self, "실시간 위치", "소스:", kinds, 0, False)
+        if not ok:
+            return None
+        if kind.startswith("UDP"):
+            port, ok = QInputDialog.getInt(self, "실시간 위치", "UDP 포트:", 5601, 1, 65535)
+            return UdpSource(port, binary=kind == "UDP (이진)") if ok else None
+
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, "재생할 파일 열기", "",
+            "CSV Files (*.csv);;All Files (*)" if kind == "CSV 경로 재생" else "NMEA Files (*.nmea *.txt *.log);;All Files (*)"
+        )
+        if not file_name:
+            return None
+        rate, ok = QInputDialog.getDouble(self, "실시간 위치", "재생 주기 (Hz):", 10.0, 0.1, 1000.0, 1)
+        if not ok:
+            return None
+        if kind == "CSV 경로 재생":
+            return TrackReplaySource(file_name, rate, loop=True)
+        return NmeaFileSource(file_name, rate, loop=True)
+
+    def toggle_stream(self):
+        # 실시간 위치 수신 시작/정지
+        if self.stream_reader is not None:
+            self.stop_stream()
+            return
+
+        source = self.open_stream_source()
+        if source is None:
+            return
+        self.stream_buffer = FixBuffer()
+        self.stream_reader = StreamReader(source, self.stream_buffer)
+        self.stream_reader.start()
+        self.trail_count = 0
+        self.trail_timer.start()
+        self.stream_button.setText("실시간 위치 정지")
+        self.stream_label.setText("수신 대기 중")
+
+    def toggle_recording(self):
+        # 수신 중인 위치를 웨이포인트 파일로 기록 시작/정지
+        if self.recorder is not None:
+            self.stop_recording()
+            return
+        if self.stream_reader is None:
+            QMessageBox.warning(self, "경고", "먼저 실시간 위치 수신을 시작하세요.")
+            return
+
+        file_name, _ = QFileDialog.getSaveFileName(self, "기록할 웨이포인트 파일", "", "CSV Files (*.csv);;Binary Track (*.wpb);;All Files (*)")
+        if not file_name:
+            return
+        spacing_cm, ok = QInputDialog.getDouble(self, "기록", "기록 간격 (cm):", 50.0, 1.0, 10000.0, 1)
+        if not ok:
+            return
+        self.recorder = WaypointRecorder(file_name, spacing=spacing_cm / 100.0)
+        # 수신 스레드가 순회 중인 목록을 바꾸지 않도록 새 목록으로 교체
+        self.stream_reader.callbacks = self.stream_reader.callbacks + [self.recorder.add]
+        self.record_button.setText("기록 정지")
+
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+        if self.stream_reader is not None:
+            self.stream_reader.callbacks = [c for c in self.stream_reader.callbacks if c != self.recorder.add]
+        self.recorder.close()
+        self.info_label.setText(
+            f"{self.recorder.recorded}개 포인트를 기록했습니다 (수신 {self.recorder.received}개): {self.recorder.path}"
+        )
+        self.recorder = None
+        self.record_button.setText("기록 시작")
+
+    def stop_stream(self):
+        self.stop_recording()
+        self.trail_timer.stop()
+        if self.stream_reader is not None:
+            self.stream_reader.stop()
+            if self.stream_reader.error:
+                QMessageBox.warning(self, "경고", f"위치 스트림 오류:\n{self.stream_reader.error}")
+        self.stream_reader = None
+        self.canvas.clear_trail()
+        self.stream_button.setText("실시간 위치 시작")
+        self.stream_label.setText("수신 안 함")
+
+    def refresh_trail(self):
+        # 타이머마다 새 위치가 있을 때만 궤적을 다시 그림
+        if self.stream_reader is not None and not self.stream_reader.is_alive():
+            self.stop_stream()
+            return
+        if self.recorder is not None:
+            # 위치가 뜸하게 들어와도 모아 둔 행이 주기적으로 파일에 써지도록 함
+            self.recorder.flush(force=False)
+        count = self.stream_buffer.count
+        if count == self.trail_count:
+            return
+        self.trail_count = count
+        fixes = self.stream_buffer.snapshot()
+        self.canvas.update_trail(fixes[:, FIX_FIELDS.index('latitude')], fixes[:, FIX_FIELDS.index('longitude')])
+        latest = self.stream_buffer.latest()
+        text = f"{count}개 수신, 위도 {latest['latitude']:.7f}, 경도 {latest['longitude']:.7f}, 품질 {latest['quality']:.0f}"
+        if self.recorder is not None:
+            text += f", {self.recorder.recorded}개 기록"
+        self.stream_label.setText(text)
+
+    def closeEvent(self, event):
+        # 창을 닫을 때 편집한 타일 저장, 수신 스레드 정리
+        self.canvas.close_tiles()
+        if self.stream_reader is not None:
+            self.stream_reader.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        super().closeEvent(event)
+
+    def transform_points(self):
+        # 빈 입력창은 변환하지 않는 기본값으로 처리
+        def read_value(line_edit, default):
+            text = line_edit.text().strip()
+            return float(text) if text else default
+
+        try:
+            rotation_deg = read_value(self.rotation_input, 0.0)
+            distance_m = read_value(self.shift_input, 0.0)
+            bearing_deg = read_value(self.bearing_input, 0.0)
+            scale = read_value(self.scale_input, 1.0)
+            mirror_axis_deg = read_value(self.mirror_input, None)
+        except ValueError:
+            QMessageBox.warning(self, "경고", "변환 값은 숫자로 입력하세요.")
+            return
+
+        count = self.canvas.transform_points(
+            rotation_deg=rotation_deg, distance_m=distance_m, bearing_deg=bearing_deg,
+            scale=scale, mirror_axis_deg=mirror_axis_deg
+        )
+        if count:
+            self.info_label.setText(f"{count}개의 선택된 포인트를 변환했습니다.")
     ### 변경됨 끝
 
 def main():
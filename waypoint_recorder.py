@@ -0,0 +1,279 @@
+import os
+import math
+import time
+import argparse
+import threading
+import tracemalloc
+
+from track_io import LANE_COLUMNS, WAYPOINT_COLUMNS, parse_zone
+from gps_stream import StreamReader, FixBuffer, open_source
+from track_binary import SUFFIX, BinaryTrack, BinaryTrackWriter, read_header
+import numpy as np
+import utm
+
+# 위도 1 도의 길이 (m). 기록 간격 판단은 직전 기록점 주변의 평면 근사로 충분함
+METERS_PER_DEGREE = 111319.49
+
+# 이진 트랙 (.wpb) 으로 기록할 때의 레코드 필드
+BINARY_FIELDS = [('latitude', '<f8'), ('longitude', '<f8'), ('utm_easting', '<f8'), ('utm_northing', '<f8')]
+BINARY_WAYPOINT_FIELDS = BINARY_FIELDS + [('seq', '<i8'), ('option', '<i8')]
+
+
+class WaypointRecorder:
+    """
+    들어오는 위치를 웨이포인트 CSV 에 바로 이어 쓰는 기록기입니다.
+
+    - 거리 간격 추림: 직전에 기록한 점에서 spacing(m) 이상 떨어진 위치만 기록
+    - 정지 점 억제: 속도를 아는 위치는 stationary_speed(m/s) 미만이면 기록하지 않음
+    - min_quality 를 주면 측위 품질 (GGA, RTK 고정 4)이 그보다 낮은 위치는 버림
+
+    기록할 행은 메모리에 최대 flush_rows 개만 모았다가, 그 개수가 차거나 flush_interval(s)이 지나면
+    한 번에 쓰고 fsync 합니다. 파일에는 항상 완전한 줄 단위로 이어 쓰므로 비정상 종료 시에도
+    마지막 flush 까지의 기록은 남고, 다시 열 때 끝의 잘린 줄은 잘라내고 seq 를 이어서 매깁니다.
+    기존 파일의 헤더가 기록 형식 (WAYPOINT_COLUMNS / LANE_COLUMNS) 과 다르면 파일을 건드리지 않고 ValueError 를 냅니다
+    (lane map 같은 다른 형식의 파일을 잘못 지정한 경우).
+    경로가 .wpb 로 끝나면 CSV 대신 이진 트랙 (track_binary) 에 레코드를 이어 씁니다.
+    """
+
+    def __init__(self, path, spacing=0.5, stationary_speed=0.3, min_quality=None,
+                 dialect='waypoint', zone=None, flush_rows=100, flush_interval=1.0):
+        self.path = path
+        self.spacing = spacing
+        self.stationary_speed = stationary_speed
+        self.min_quality = min_quality
+        self.dialect = dialect
+        self.zone = parse_zone(zone) if zone else None
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+
+        self.received = 0
+        self.recorded = 0
+        self.last = None  # 직전 기록점 (위도, 경도)
+        self.pending = []
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.binary = path.endswith(SUFFIX)
+        self.closed = False
+        self.seq = self._open_binary() if self.binary else self._open()
+
+    def _open_binary(self):
+        # 기존 파일이면 개수 뒤의 잘린 레코드를 버리고 이어 씀. 새 파일은 첫 기록점의 존을 알고 나서 만듦
+        self.file = None
+        if not (os.path.exists(self.path) and os.path.getsize(self.path) > 0):
+            return 1
+        fields = BINARY_WAYPOINT_FIELDS if self.dialect == 'waypoint' else BINARY_FIELDS
+        zone = read_header(self.path)['zone']
+        self.file = BinaryTrackWriter(self.path, fields, zone, self.dialect)
+        if zone:
+            self.zone = parse_zone(zone)
+        track = BinaryTrack(self.path)
+        return int(track.records['seq'][-1]) + 1 if self.dialect == 'waypoint' and len(track) else 1
+
+    def _open(self):
+        # 기존 파일의 헤더가 기록 형식과 같으면 이어 쓰고, 다르면 (다른 형식의 파일) 건드리지 않고 거부
+        columns = WAYPOINT_COLUMNS if self.dialect == 'waypoint' else LANE_COLUMNS
+        header = ','.join(columns)
+        next_seq = 1
+        lines = []
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as file:
+                data = file.read()
+            lines = data.decode('utf-8', errors='replace').splitlines()
+            if not lines or lines[0].strip() != header:
+                raise ValueError(
+                    f"{self.path} 의 헤더가 {self.dialect} 기록 형식 ({header}) 과 다릅니다. 다른 파일을 지정하세요."
+                )
+            # 줄바꿈 없이 끝난 마지막 줄은 완전한 행이면 줄바꿈을 붙여 살리고, 잘린 행이면 잘라냄
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                with open(self.path, 'rb+') as file:
+                    if len(lines) > 1 and self._complete_row(lines[-1], columns):
+                        file.seek(0, os.SEEK_END)
+                        file.write(b'\n')
+                    else:
+                        file.truncate(end)
+                        lines = lines[:-1]
+            if self.dialect == 'waypoint':
+                last = next((line for line in reversed(lines[1:]) if self._complete_row(line, columns)), None)
+                if last is not None:
+                    next_seq = int(last.split(',', 1)[0]) + 1
+        self.file = open(self.path, 'a', encoding='utf-8', newline='')
+        if not lines:
+            self.file.write(header + '\n')
+            self.file.flush()
+        return next_seq
+
+    @staticmethod
+    def _complete_row(line, columns):
+        # 컬럼 개수가 맞고 존 번호 외의 값이 모두 숫자이면 완전한 행 (waypoint 의 seq 는 정수)
+        values = line.split(',')
+        if len(values) != len(columns):
+            return False
+        try:
+            for name, value in zip(columns, values):
+                if name == 'seq':
+                    int(value)
+                elif name != 'utm_zone_number':
+                    float(value)
+        except ValueError:
+            return False
+        return True
+
+    def add(self, fix):
+        """
+        위치 하나를 처리합니다 (StreamReader 의 callback 으로 사용). 기록했으면 True 를 반환합니다.
+        """
+        with self.lock:
+            self.received += 1
+            if self.closed:
+                return False
+            if self.min_quality is not None and fix['quality'] < self.min_quality:
+                return False
+            speed = fix.get('speed')
+            if speed is not None and not math.isnan(speed) and speed < self.stationary_speed:
+                return False
+
+            latitude, longitude = fix['latitude'], fix['longitude']
+            if self.last is not None:
+                dy = (latitude - self.last[0]) * METERS_PER_DEGREE
+                dx = (longitude - self.last[1]) * METERS_PER_DEGREE * math.cos(math.radians(latitude))
+                if dx * dx + dy * dy < self.spacing * self.spacing:
+                    return False
+
+            # 기록할 점만 UTM 으로 변환 (존은 첫 기록점 기준으로 고정)
+            if self.zone is None:
+                easting, northing, number, letter = utm.from_latlon(latitude, longitude)
+                self.zone = (number, letter)
+            else:
+                easting, northing, _, _ = utm.from_latlon(
+                    latitude, longitude, force_zone_number=self.zone[0], force_zone_letter=self.zone[1]
+                )
+            if self.binary:
+                row = (latitude, longitude, easting, northing) + ((self.seq, 0) if self.dialect == 'waypoint' else ())
+            elif self.dialect == 'waypoint':
+                row = f"{self.seq},{latitude:.9f},{longitude:.9f},{easting:.4f},{northing:.4f},0\n"
+            else:
+                row = f"{latitude:.9f},{longitude:.9f},{easting:.4f},{northing:.4f},{self.zone[0]}{self.zone[1]}\n"
+            self.pending.append(row)
+            self.seq += 1
+            self.recorded += 1
+            self.last = (latitude, longitude)
+
+            if len(self.pending) >= self.flush_rows or time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+            return True
+
+    def _flush(self):
+        if self.pending and self.binary:
+            if self.file is None:
+                fields = BINARY_WAYPOINT_FIELDS if self.dialect == 'waypoint' else BINARY_FIELDS
+                self.file = BinaryTrackWriter(self.path, fields, f"{self.zone[0]}{self.zone[1]}", self.dialect)
+            self.file.append(np.array(self.pending, dtype=self.file.dtype))
+            self.pending = []
+            self.file.flush()
+        elif self.pending:
+            self.file.write(''.join(self.pending))
+            self.pending = []
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+
+    def flush(self, force=True):
+        """
+        모아 둔 행을 파일에 씁니다 (위치가 들어오지 않을 때 주기적으로 호출).
+        force=False 이면 마지막으로 쓴 뒤 flush_interval 이 지났을 때만 씁니다.
+        """
+        with self.lock:
+            if not self.closed and (force or time.monotonic() - self.last_flush >= self.flush_interval):
+                self._flush()
+
+    def close(self):
+        with self.lock:
+            if not self.closed:
+                self._flush()
+                if self.file is not None:
+                    self.file.close()
+                self.file = None
+                self.closed = True
+
+
+def benchmark(path, count=100000, rate=100.0):
+    """
+    rate(Hz) 로 달리는 차량의 위치 count 개를 기록기에 최대 속도로 넣어 처리량과 메모리 증가를 측정합니다.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    recorder = WaypointRecorder(path)
+    speed = 5.0
+    heading = math.radians(30.0)
+    latitude, longitude = 37.2889, 127.1076
+    fixes = []
+    for i in range(count):
+        # 10 초마다 2 초씩 정지
+        moving = (i / rate) % 10.0 < 8.0
+        step = speed / rate if moving else 0.0
+        latitude += step * math.cos(heading) / METERS_PER_DEGREE
+        longitude += step * math.sin(heading) / (METERS_PER_DEGREE * math.cos(math.radians(latitude)))
+        fixes.append({
+            'time': i / rate, 'latitude': latitude, 'longitude': longitude,
+            'speed': speed if moving else 0.0, 'course': 30.0, 'quality': 4,
+        })
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i, fix in enumerate(fixes):
+        recorder.add(fix)
+        if i == count // 10:
+            baseline = tracemalloc.get_traced_memory()[0]
+    elapsed = time.perf_counter() - start
+    grown = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    recorder.close()
+
+    print(f"{count} fixes in {elapsed * 1000:.0f} ms ({count / elapsed:,.0f} fixes/s, {count / rate:.0f} s of {rate:.0f} Hz input)")
+    print(f"  recorded {recorder.recorded} waypoints to {path}, memory change after warm-up {grown / 1024:.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="실시간 위치를 웨이포인트 CSV 로 기록 (거리 간격 추림, 정지 점 억제)")
+    parser.add_argument('source', nargs='?', help="udp:PORT, NMEA 파일 또는 재생할 CSV")
+    parser.add_argument('-o', '--output', required=True, help="기록할 CSV 파일 (같은 형식이면 이어서 기록, .wpb 이면 이진 트랙)")
+    parser.add_argument('--spacing', type=float, default=0.5, help="기록 간격 (m)")
+    parser.add_argument('--stationary-speed', type=float, default=0.3, help="정지로 보는 속도 (m/s)")
+    parser.add_argument('--min-quality', type=int, default=None, help="최소 측위 품질 (RTK 고정 4)")
+    parser.add_argument('--lane', action='store_true', help="lane map 형식으로 기록 (기본: waypoint 형식)")
+    parser.add_argument('--binary', action='store_true', help="UDP 이진 레코드 형식")
+    parser.add_argument('--rate', type=float, default=None, help="파일 재생 주기 (Hz)")
+    parser.add_argument('--benchmark', type=int, default=None, metavar='COUNT', help="100 Hz 모의 입력 COUNT 개로 처리량 측정")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.output, args.benchmark)
+        return
+    if not args.source:
+        parser.error("source 를 지정하세요.")
+
+    try:
+        recorder = WaypointRecorder(
+            args.output, args.spacing, args.stationary_speed, args.min_quality, 'lane' if args.lane else 'waypoint'
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    reader = StreamReader(open_source(args.source, args.rate, args.binary), FixBuffer(), [recorder.add])
+    reader.start()
+    try:
+        while reader.is_alive():
+            reader.join(1.0)
+            recorder.flush()
+            print(f"received {recorder.received}, recorded {recorder.recorded}")
+    except KeyboardInterrupt:
+        pass
+    reader.stop()
+    recorder.close()
+    if reader.error:
+        print(f"Stream error: {reader.error}")
+    print(f"Recorded {recorder.recorded} of {recorder.received} fixes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()